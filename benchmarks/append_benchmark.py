@@ -0,0 +1,38 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from file_system_manager import FileSystemManager  # noqa: E402
+
+"""
+Measure the cost of an append as files grow.
+Two files are appended in turns, so no append can grow the last extent in place: every append adds an extent, and
+the number of extents of each file grows with its size. The average time per append should stay flat.
+Run from the repository root: python benchmarks/append_benchmark.py
+"""
+
+APPENDS_PER_ROUND = 2000
+ROUNDS = 10
+CHUNK = b"x" * 100
+
+
+def run_benchmark() -> None:
+    file_system_manager = FileSystemManager(check_for_backup_files=False)
+    file_names = ["/log_a.txt", "/log_b.txt"]
+    for file_name in file_names:
+        file_system_manager.create_file_or_dir(file_name, file=True)
+    file_nodes = [file_system_manager.path_handler.get_node_by_path(file_name) for file_name in file_names]
+    print(f"{'appends':>10} {'extents per file':>17} {'file size':>10} {'us per append':>14}")
+    for round_index in range(1, ROUNDS + 1):
+        start_time = time.perf_counter()
+        for append_index in range(APPENDS_PER_ROUND):
+            file_system_manager.write_bytes(file_nodes[append_index % 2], CHUNK)
+        elapsed_time = time.perf_counter() - start_time
+        print(f"{round_index * APPENDS_PER_ROUND:>10} {len(file_nodes[0].file_memory_allocations):>17} "
+              f"{file_nodes[0].size:>10} {elapsed_time / APPENDS_PER_ROUND * 1e6:>14.1f}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
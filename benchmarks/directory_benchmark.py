@@ -0,0 +1,63 @@
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from tree_node import TreeNode  # noqa: E402
+
+"""
+Measure the cost of adding and removing children of a large directory, and of a paginated scan while the directory
+is being written to. The sorted index is kept up to date by the adds and removes, so the time per add and remove, and
+the time of a page read after a change, should stay flat from 10k to 300k entries.
+Run from the repository root: python benchmarks/directory_benchmark.py
+"""
+
+SIZES = [10000, 30000, 100000, 300000]
+PAGE_SIZE = 100  # Children read by each page of the paginated scan
+PAGES = 100  # Pages read, with one child added before each of them
+
+
+def read_page(directory: TreeNode, after: str) -> str:
+    # Read one page of the sorted children after a cursor, return the cursor of the next page
+    for count, child in enumerate(directory.iter_sorted_children(after=after), 1):
+        after = child.name
+        if count == PAGE_SIZE:
+            break
+    return after
+
+
+def run_benchmark() -> None:
+    print(f"{'entries':>10} {'us per add':>11} {'us per remove':>14} {'ms per page after a write':>26}")
+    add_times = {}
+    for size in SIZES:
+        directory = TreeNode("directory", is_file=False, parent_node=None)
+        names = [f"entry-{random.getrandbits(64):016x}" for _ in range(size)]
+        nodes = [TreeNode(name, is_file=True, parent_node=directory) for name in names]
+        list(directory.iter_sorted_children())  # Build the sorted index, the adds below keep it up to date
+        start_time = time.perf_counter()
+        for node in nodes:
+            directory.add_child(node)
+        add_time = time.perf_counter() - start_time
+        # A writer adds a child between the pages read by a listing
+        after = ""
+        start_time = time.perf_counter()
+        for _ in range(PAGES):
+            new_name = f"entry-{random.getrandbits(64):016x}"
+            directory.add_child(TreeNode(new_name, is_file=True, parent_node=directory))
+            after = read_page(directory, after)
+        page_time = (time.perf_counter() - start_time) / PAGES
+        start_time = time.perf_counter()
+        for name in names:
+            directory.remove_child(name)
+        remove_time = time.perf_counter() - start_time
+        add_times[size] = add_time / size
+        print(f"{size:>10} {add_time / size * 1e6:>11.2f} {remove_time / size * 1e6:>14.2f} "
+              f"{page_time * 1e3:>26.3f}")
+    # A cost per add that grows with the directory (like a sorted list insert) would grow about 30 times here
+    print(f"Add cost ratio {SIZES[-1]} / {SIZES[0]} entries: {add_times[SIZES[-1]] / add_times[SIZES[0]]:.2f}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
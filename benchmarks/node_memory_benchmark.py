@@ -0,0 +1,83 @@
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from extent_map import ExtentMap  # noqa: E402
+from node_table import NodeTable  # noqa: E402
+from tree_node import TreeNode  # noqa: E402
+
+"""
+Measure the memory used per node by the file system metadata.
+The tree is made of directories holding files. It is measured with the TreeNode layout before __slots__ (every
+attribute in a per-node __dict__), with the current TreeNode, and as a columnar NodeTable snapshot.
+Run from the repository root: python benchmarks/node_memory_benchmark.py
+"""
+
+DIRECTORIES = 1000
+FILES_PER_DIRECTORY = 100
+
+
+class DictTreeNode:
+    # The TreeNode attributes stored in a per-node __dict__ (the layout before __slots__), kept for the comparison
+    def __init__(self, name: str, is_file: bool, parent_node):
+        self.name = name
+        self.is_file = is_file
+        self.parent_node = parent_node
+        self.creation_time = time.time()
+        self.is_dirty = False
+        self.last_modified = time.time()
+        self.size = 0
+        if is_file:
+            self.file_memory_allocations = ExtentMap()
+            self.generation = 0
+            self.compressed = False
+            self.last_access = time.time()
+        else:
+            self.children = []
+
+    def add_child(self, node) -> None:
+        # The children were a plain list in that layout
+        self.children.append(node)
+
+
+def build_tree(node_class):
+    root = node_class("/", False, None)
+    for directory_index in range(DIRECTORIES):
+        directory = node_class(f"dir{directory_index}", False, root)
+        root.add_child(directory)
+        for file_index in range(FILES_PER_DIRECTORY):
+            file_node = node_class(f"file{file_index}.txt", True, directory)
+            file_node.file_memory_allocations.append(0, 10, 10)
+            directory.add_child(file_node)
+    return root
+
+
+def measure(build) -> tuple:
+    # Return the result of build() and the bytes it allocated
+    tracemalloc.start()
+    result = build()
+    allocated_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, allocated_bytes
+
+
+def run_benchmark() -> None:
+    nodes_count = 1 + DIRECTORIES * (1 + FILES_PER_DIRECTORY)
+    _, dict_bytes = measure(lambda: build_tree(DictTreeNode))
+    root, slots_bytes = measure(lambda: build_tree(TreeNode))
+    node_table, _ = measure(lambda: NodeTable(root))
+    columns_bytes = sum(column.nbytes for column in (node_table.parent, node_table.name_id, node_table.size,
+                                                     node_table.creation_time, node_table.last_modified,
+                                                     node_table.flags, node_table.subtree_end))
+    print(f"{nodes_count} nodes")
+    print(f"{'layout':>30} {'bytes per node':>15}")
+    print(f"{'TreeNode with __dict__':>30} {dict_bytes / nodes_count:>15.1f}")
+    print(f"{'TreeNode with __slots__':>30} {slots_bytes / nodes_count:>15.1f}")
+    print(f"{'NodeTable columns':>30} {columns_bytes / nodes_count:>15.1f}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -17,4 +17,9 @@ class ErrorMessages(Enum):
     NoSearchCriteriaError = "Error: You must specify at least one search criteria."
     ExceedsMaxMemoryFileError = "Memory allocation exceeds max memory for file: "
     ExceedsMaxSizeError = "Memory allocation exceeds memory buffer size"
+    InvalidOffsetError = "Invalid offset. It should be between 0 and the file size: "
+    InvalidLengthError = "Invalid length. Please provide a positive integer value"
+    InvalidLimitError = "Invalid limit. Please provide a positive integer value"
+    InvalidTimeBudgetError = "Invalid time budget. Please provide a positive integer value"
+    WriteBackError = "The buffered appends are kept and committed again later, they could not be written to file: "
 
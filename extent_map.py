@@ -0,0 +1,126 @@
+import math
+from bisect import bisect_right
+from typing import Iterator, List, Optional
+
+"""
+ExtentMap is the layout of a file in the memory buffer: an ordered list of [start index, end index, used range]
+extents, indexed by the file offset of each extent.
+Appending, the file size and the allocated capacity are O(1), and mapping a file offset to its extent is a binary
+search, so the cost of large files does not grow with the number of extents.
+"""
+
+
+class ExtentMap:
+    __slots__ = ("extents", "offsets", "size", "capacity")
+
+    def __init__(self, extents: Optional[List[List[int]]] = None):
+        self.extents: List[List[int]] = []  # [start index, end index, used range] of each extent, in file order
+        self.offsets: List[int] = []  # File offset of the first byte of each extent
+        self.size = 0  # Number of used bytes (the size of the content)
+        self.capacity = 0  # Number of allocated bytes
+        for start_index, end_index, used_range in extents or []:
+            self.append(start_index, end_index, used_range)
+
+    def __len__(self) -> int:
+        return len(self.extents)
+
+    def __iter__(self) -> Iterator[List[int]]:
+        return iter(self.extents)
+
+    def __getitem__(self, index: int) -> List[int]:
+        return self.extents[index]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, ExtentMap):
+            return self.extents == other.extents
+        if isinstance(other, list):
+            return self.extents == other
+        return NotImplemented
+
+    def append(self, start_index: int, end_index: int, used_range: int = 0) -> None:
+        # Add an extent at the end of the file
+        self.offsets.append(self.size)
+        self.extents.append([start_index, end_index, used_range])
+        self.size += used_range
+        self.capacity += end_index - start_index
+
+    def append_shared(self, extent: List[int]) -> None:
+        # Add an extent owned by another file too, the list is shared so moving the extent updates every owner
+        self.offsets.append(self.size)
+        self.extents.append(extent)
+        self.size += extent[2]
+        self.capacity += extent[1] - extent[0]
+
+    def replace(self, index: int, extent: List[int]) -> None:
+        # Replace an extent by another one holding the same content (same capacity and used range)
+        self.extents[index] = extent
+
+    def last(self) -> Optional[List[int]]:
+        # Return the last extent of the file
+        return self.extents[-1] if self.extents else None
+
+    def grow_last(self, size: int) -> None:
+        # Extend the last extent by `size` bytes
+        self.extents[-1][1] += size
+        self.capacity += size
+
+    def add_used(self, size: int, index: int = -1) -> None:
+        # Mark `size` more bytes of an extent as used, shifting the file offsets of the extents after it
+        index %= len(self.extents)
+        self.extents[index][2] += size
+        for following_index in range(index + 1, len(self.offsets)):
+            self.offsets[following_index] += size
+        self.size += size
+
+    def find(self, offset: int) -> int:
+        # Return the index of the extent holding the given file offset
+        return bisect_right(self.offsets, offset) - 1
+
+    def truncate(self, size: int, block_size: int) -> List[List[int]]:
+        """
+        Cut the content to its first `size` bytes. The extents after the new end are removed, and the extent holding
+        the new end keeps only the blocks it still uses. Returns the [start index, end index] memory ranges that are
+        no longer used.
+        """
+        released_ranges = []
+        index = self.find(size - 1) if size else -1  # The last extent that still holds content
+        for start_index, end_index, _ in self.extents[index + 1:]:
+            released_ranges.append([start_index, end_index])
+            self.capacity -= end_index - start_index
+        del self.extents[index + 1:]
+        del self.offsets[index + 1:]
+        if index >= 0:
+            extent = self.extents[index]
+            extent[2] = size - self.offsets[index]
+            new_end_index = extent[0] + math.ceil(extent[2] / block_size) * block_size
+            if new_end_index < extent[1]:
+                released_ranges.append([new_end_index, extent[1]])
+                self.capacity -= extent[1] - new_end_index
+                extent[1] = new_end_index
+        self.size = size
+        return released_ranges
+
+    def check_consistency(self) -> bool:
+        # Debug check: compute the size, the capacity and the offsets again from the extents and compare them
+        offsets = []
+        size = capacity = 0
+        for start_index, end_index, used_range in self.extents:
+            offsets.append(size)
+            size += used_range
+            capacity += end_index - start_index
+        return self.size == size and self.capacity == capacity and self.offsets == offsets
+
+    def clear(self) -> List[List[int]]:
+        # Remove all the extents and return them
+        extents = self.extents
+        self.extents, self.offsets = [], []
+        self.size = self.capacity = 0
+        return extents
+
+    def copy(self) -> List[List[int]]:
+        # Return a copy of the extents as a list
+        return [extent.copy() for extent in self.extents]
+
+    def to_list(self) -> List[List[int]]:
+        # Serialize the extents as a list of [start index, end index, used range] lists
+        return self.copy()
@@ -1,20 +1,36 @@
+import codecs
+import hashlib
 import math
 import os
+import shlex
 from dataclasses import dataclass
 from datetime import datetime
 
-from path_handler import PathHandler
+from free_space import FreeSpaceIndex
+from memory_arena import MemoryArena, MemoryMappedArena, SEGMENT_SIZE
+from extent_map import ExtentMap
+from node_table import NodeTable
+from path_handler import PathHandler, PathComponents
 from tree_node import TreeNode
 from error_messages import ErrorMessages
-from typing import Dict, List, Union, Callable, Type, Optional
+from typing import Dict, Iterator, List, Union, Callable, Type, Optional, Tuple
 import numpy as np
 import json
 import time
+import zlib
+from itertools import islice
 
 MEM_SIZE = 2 * 1024 * 1024
 MAX_MEM_SIZE = 4 * 2 * 1024 * 1024
 DEFAULT_FILE_SIZE = 10
-MAX_FILE_SIZE = 100
+MAX_FILE_SIZE = MAX_MEM_SIZE  # By default a single file may use the whole memory buffer
+COMPACTION_THRESHOLD = 0.5  # Fraction of the used memory that is free holes, above which compaction starts
+COMPACTION_STEP_TIME = 0.005  # Time budget (in seconds) of a single background compaction step
+WRITE_BACK_DELAY = 1.0  # Maximum time (in seconds) an append may wait in a write-back buffer
+COMPRESSION_LEVEL = 6  # zlib compression level of the cold files
+COMPRESSION_MIN_SIZE = 64  # Smaller files are not worth compressing
+DEDUP_MIN_SIZE = 256  # Extents smaller than this are not deduplicated, the index would cost more than it saves
+DEBUG_CONSISTENCY_CHECKS = False  # Check the incremental size bookkeeping against the extents after every write
 
 JSON_FILE = "filesystem.json"
 NUMPY_FILE = "numpy_data.npy"
@@ -60,17 +76,48 @@ class FileSystemManager:
         # Return the existing singleton instance if it exists
         return cls._instance
 
-    def __init__(self, check_for_backup_files=True):
-        if not check_for_backup_files or (not os.path.exists(JSON_FILE) or not os.path.exists(NUMPY_FILE)):
+    def __init__(self, check_for_backup_files=True, memory_map_file: Optional[str] = None, mem_size: int = MEM_SIZE,
+                 max_mem_size: int = MAX_MEM_SIZE, max_file_size: int = MAX_FILE_SIZE,
+                 block_size: int = DEFAULT_FILE_SIZE, segment_size: int = SEGMENT_SIZE, write_back_size: int = 0,
+                 write_back_delay: float = WRITE_BACK_DELAY, dedup: bool = False,
+                 compress_after: Optional[float] = None, node_table: bool = False):
+        # When memory_map_file is given, the content of the files is stored in a memory-mapped file on disk
+        self.memory_map_file = memory_map_file
+        self.mem_size = mem_size  # Initial (and minimal) size of the memory buffer
+        self.max_mem_size = max_mem_size  # Maximum size of the memory buffer
+        self.max_file_size = max_file_size  # Maximum memory that can be allocated to a single file
+        self.block_size = block_size  # Allocation granularity, extents sizes are multiples of it
+        self.segment_size = segment_size  # Size of the segments the memory buffer is made of
+        # Appends smaller than write_back_size are collected per file and committed in batches (0 disables it)
+        self.write_back_size = write_back_size
+        self.write_back_delay = write_back_delay  # Maximum time an append waits before it is committed
+        self.write_back_buffers: Dict[TreeNode, bytearray] = {}  # Pending appends of each file
+        self.write_back_times: Dict[TreeNode, float] = {}  # Time of the first pending append of each file
+        self.dedup = dedup  # When True, extents with identical content are stored once and shared
+        # Files not accessed for compress_after seconds are compressed between commands (None disables it)
+        self.compress_after = compress_after
+        self.next_compression_time = 0.0  # Earliest time a file may become cold
+        # Nodes left to visit by the running pass over the cold files, None when no pass is running
+        self.compression_nodes_to_visit: Optional[List[TreeNode]] = None
+        self.compression_pass_next_time = 0.0  # Earliest time a file visited by the running pass becomes cold
+        # When node_table is True, searches run vectorized over a columnar snapshot of the tree metadata
+        self.use_node_table = node_table
+        self.node_table: Optional[NodeTable] = None  # The snapshot, built again after the tree changes
+        content_file = memory_map_file if memory_map_file else NUMPY_FILE
+        if not check_for_backup_files or (not os.path.exists(JSON_FILE) or not os.path.exists(content_file)):
             self.root = TreeNode("/", is_file=False, parent_node=None)  # Create the root directory
             self.path_handler: PathHandler = PathHandler(self.root)
-            self.memory_buffer = np.empty(dtype=np.int8, shape=(MEM_SIZE,))
-            self.buffer_size = MEM_SIZE
+            self.memory_buffer = self.create_memory_buffer(mem_size)  # Segmented memory for the files content
+            self.buffer_size = self.memory_buffer.size
             self.next_available_end_buffer_index = 0  # Track the current used length
-            self.allocation_available = []
+            self.free_space = FreeSpaceIndex()  # Sorted index of the free ranges below the high-water mark
+            self.extent_refcounts: Dict[int, int] = {}  # Number of files sharing an extent, by extent start index
+            self.extents_by_start: Dict[int, List[int]] = {}  # Every extent in the memory buffer, by its start index
+            self.extent_hashes: Dict[int, str] = {}  # Content hash of the deduplicated extents, by extent start index
+            self.content_index: Dict[str, List[int]] = {}  # Map a content hash to the extent holding that content
         else:
             self.restore_backup()
-            self.path_handler: PathHandler = PathHandler(self.root)
+        self.compaction_running = False  # True while a background compaction has not finished yet
 
         """
         dict of commands: for each command, includes:
@@ -128,7 +175,7 @@ class FileSystemManager:
                 ["name"],
                 {
                     "command": "Delete a file or directory.",
-                    "name": "Name of the file or directory to be deleted."
+                    "name": "Name of the file or directory to be deleted (may use the wildcards *, ?, [...] and **)."
                 },
                 "Successfully deleted ",
                 "Failed to delete "
@@ -140,7 +187,7 @@ class FileSystemManager:
                 ['source_path', 'destination_path'],
                 {
                     "command": "Copy a file or directory to a new location.",
-                    "source_path": "Path of the source file or directory.",
+                    "source_path": "Path of the source file or directory (with wildcards, copy all the matches).",
                     "destination_path": "Path of the destination directory.",
                     "recursive": "(optional, default: False): Copy recursively (true/false)."
                 },
@@ -154,7 +201,7 @@ class FileSystemManager:
                 ["source_path", "destination_path"],
                 {
                     "command": "Move a file or directory to a new location.",
-                    "source_path": "Path of the source file or directory.",
+                    "source_path": "Path of the source file or directory (with wildcards, move all the matches).",
                     "destination_path": "Path of the destination directory.",
                     "recursive": "(optional, default: False): Move recursively (true/false)."
                 },
@@ -163,12 +210,15 @@ class FileSystemManager:
             ),
             "list": CommandLayout(
                 self.display_directory_content,
-                {"name": "", "recursive": False},
+                {"name": "", "recursive": False, "prefix": "", "limit": "", "after": ""},
                 ["name"],
                 {
                     "command": "List the content of a directory.",
-                    "name": "Name of the directory to list.",
-                    "recursive": "(optional, default: False): List recursively (true/false)."
+                    "name": "Name of the directory to list (may use wildcards).",
+                    "recursive": "(optional, default: False): List recursively (true/false).",
+                    "prefix": "(optional): List only the entries whose name starts with this prefix, sorted by name.",
+                    "limit": "(optional): Maximum number of entries to list, sorted by name.",
+                    "after": "(optional): List the entries sorted by name after this one (to continue a listing)."
                 },
                 "Successfully listed contents of ",
                 "Failed to list contents of ",
@@ -180,7 +230,7 @@ class FileSystemManager:
                 ["name"],
                 {
                     "command": "Get the size in bytes.",
-                    "name": "Name of the file/directory."
+                    "name": "Name of the file/directory (with wildcards, the size of each match)."
                 },
                 "Successfully retrieved size of ",
                 "Failed to retrieve size of "
@@ -245,6 +295,39 @@ class FileSystemManager:
                 "Successfully navigated to the previous directory",
                 "Failed to navigate to the previous directory"
             ),
+            "truncate": CommandLayout(
+                self.truncate_file,
+                {"name": "", "length": ""},
+                ["name", "length"],
+                {
+                    "command": "Cut a file to a given length (or extend it with zero bytes).",
+                    "name": "Name of the file to truncate.",
+                    "length": "The new length of the file in bytes."
+                },
+                "Successfully truncated file ",
+                "Failed to truncate file "
+            ),
+            "compact": CommandLayout(
+                self.compact_memory_buffer,
+                {"time_budget": ""},
+                [],
+                {
+                    "command": "Defragment the memory buffer by moving the file contents together.",
+                    "time_budget": "(optional): Time budget in milliseconds, run a single compaction step."
+                },
+                "Successfully compacted the memory buffer",
+                "Failed to compact the memory buffer"
+            ),
+            "stats": CommandLayout(
+                self.display_stats,
+                {},
+                [],
+                {
+                    "command": "Show how much memory the content of the files uses, and the savings of sharing it."
+                },
+                "Successfully displayed the memory statistics",
+                "Failed to display the memory statistics"
+            ),
             "quit": CommandLayout(
                 lambda: True,
                 {},
@@ -266,107 +349,413 @@ class FileSystemManager:
     def get_failure_message_from_name(self, command_name: str) -> str:
         return self.command_mappings[command_name].failure_message
 
-    def allocate_memory_buffer(self, file_node: TreeNode) -> bool:
-        # Allocate memory for a file
-        # Check if the file has reached the maximum allowed memory allocations
-        if file_node.file_memory_allocations:
-            count_allocations = len(file_node.file_memory_allocations)
-            if count_allocations == MAX_FILE_SIZE // DEFAULT_FILE_SIZE:
-                print(f"{ErrorMessages.ExceedsMaxMemoryFileError.value}{file_node.name}")
-                return False
-        # Check if there is available memory space
-        if not self.allocation_available:
-            # If there's no available space, calculate the start and end indexes for memory allocation
-            start_index = self.next_available_end_buffer_index
-            end_index = start_index + DEFAULT_FILE_SIZE
-            # Check if the memory allocation exceeds the memory buffer size
-            if end_index > self.buffer_size:
-                if end_index > MAX_MEM_SIZE:
-                    # If the allocation exceeds the maximum memory size, return an error message
-                    print(ErrorMessages.ExceedsMaxSizeError.value)
-                    return False
-                else:
-                    """
-                    If the allocation smaller than the max buffer size allowed but exceeds the buffer size, 
-                    expand the buffer by creating a new memory buffer with doubled size
-                    """
-                    new_memory_buffer = np.empty(dtype=np.int8, shape=(self.buffer_size * 2,))
-                    new_memory_buffer[:self.buffer_size] = self.memory_buffer
-                    self.memory_buffer = new_memory_buffer
-                    self.buffer_size *= 2
-            new_allocation = True
-        else:
-            # If there are available memory allocations, use the first one
-            free_indexes = self.allocation_available.pop(0)
-            start_index, end_index = free_indexes
-            new_allocation = False
+    def create_memory_buffer(self, size: int) -> MemoryArena:
+        # Create the memory buffer, in RAM or mapped to the memory map file
+        if self.memory_map_file:
+            return MemoryMappedArena(self.memory_map_file, size, self.segment_size)
+        return MemoryArena(size, self.segment_size)
+
+    def flush_memory_buffer(self) -> bool:
+        # Write the changed segments of a memory-mapped buffer to disk, only done with the metadata by a backup
+        self.memory_buffer.flush()
+        return True
 
+    def allocate_memory_buffer(self, file_node: TreeNode, size: int = 0) -> bool:
+        """
+        Allocate memory for a file as a variable-size extent.
+        The request is rounded up to the block granularity. The file's last extent is grown in place when the
+        memory right after it is free, otherwise a new contiguous extent of the requested size is added.
+        """
+        size = max(self.block_size, math.ceil(size / self.block_size) * self.block_size)
+        # Check if the allocation would exceed the maximum allowed memory for a file
+        if file_node.file_memory_allocations.capacity + size > self.max_file_size:
+            print(f"{ErrorMessages.ExceedsMaxMemoryFileError.value}{file_node.name}")
+            return False
+        last_allocation = file_node.file_memory_allocations.last()
+        if last_allocation and not self.is_extent_shared(last_allocation):
+            # Try to grow the last extent in place
+            if self.grow_allocation_in_place(last_allocation[1], size):
+                file_node.file_memory_allocations.grow_last(size)
+                return True
+        start_index = self.reserve_memory_range(size)
+        if start_index is None:
+            return False
         # Add the memory allocation information to the file node
-        file_node.file_memory_allocations.append([start_index, end_index, 0])
-        if new_allocation:
-            # Update the buffer index to point to the next available space in the buffer
-            self.next_available_end_buffer_index += DEFAULT_FILE_SIZE
+        file_node.file_memory_allocations.append(start_index, start_index + size)
+        self.extents_by_start[start_index] = file_node.file_memory_allocations.last()
         return True
 
+    def reserve_memory_range(self, size: int) -> Optional[int]:
+        # Reserve a contiguous range of `size` bytes and return its start index
+        # Look for the smallest free range that is big enough (best fit)
+        start_index = self.free_space.take_best_fit(size)
+        if start_index is None:
+            if self.next_available_end_buffer_index + size > self.max_mem_size and \
+                    self.next_available_end_buffer_index - self.free_space.free_size + size <= self.max_mem_size:
+                # The memory is full of holes, compact it and try again if that freed memory at the end
+                end_index = self.next_available_end_buffer_index
+                self.compact_memory_buffer()
+                if self.next_available_end_buffer_index < end_index:
+                    return self.reserve_memory_range(size)
+            # If there's no available space, allocate at the end of the used part of the buffer
+            start_index = self.reserve_buffer_tail(size)
+            if start_index is None:
+                return None
+        return start_index
+
+    def grow_allocation_in_place(self, end_index: int, size: int) -> bool:
+        # Reserve `size` bytes starting exactly at end_index, if that memory is free
+        if end_index == self.next_available_end_buffer_index:
+            return end_index + size <= self.max_mem_size and self.reserve_buffer_tail(size) is not None
+        return self.free_space.take_at(end_index, size)
+
+    def reserve_buffer_tail(self, size: int) -> Optional[int]:
+        # Reserve `size` bytes at the end of the used part of the buffer and return the start index
+        start_index = self.next_available_end_buffer_index
+        end_index = start_index + size
+        # Check if the memory allocation exceeds the memory buffer size
+        if end_index > self.buffer_size:
+            if end_index > self.max_mem_size:
+                # If the allocation exceeds the maximum memory size, return an error message
+                print(ErrorMessages.ExceedsMaxSizeError.value)
+                return None
+            # If the allocation smaller than the max buffer size allowed but exceeds the buffer size,
+            # add segments to the memory buffer (the existing content is not copied)
+            self.memory_buffer.grow(end_index)
+            self.buffer_size = self.memory_buffer.size
+        # Update the buffer index to point to the next available space in the buffer
+        self.next_available_end_buffer_index = end_index
+        return start_index
+
     def delete_memory_buffer(self, file_node: TreeNode) -> bool:
         """
         This method frees memory space previously allocated to a file and marks the allocated
         memory blocks as available for future use.
         """
-        if not file_node.file_memory_allocations:
-            # If there are no memory allocations for the file, return True (nothing to delete)
+        self.release_memory_ranges(self.drop_file_content(file_node))
+        return True
+
+    def drop_file_content(self, file_node: TreeNode) -> List[List[int]]:
+        # Remove the extents of a file and return the [start index, end index] ranges no other file uses anymore
+        file_node.generation += 1
+        file_node.compressed = False
+        # The pending appends of the file are dropped with its content
+        self.write_back_buffers.pop(file_node, None)
+        self.write_back_times.pop(file_node, None)
+        return [[start_index, end_index] for start_index, end_index, _ in file_node.file_memory_allocations.clear()
+                if self.drop_extent_reference(start_index)]
+
+    def is_extent_shared(self, extent: List[int]) -> bool:
+        # Check if an extent is shared by several files (after a copy), or may be shared (indexed by its content)
+        return self.extent_refcounts.get(extent[0], 1) > 1 or extent[0] in self.extent_hashes
+
+    def release_extent(self, start_index: int, end_index: int) -> None:
+        # Drop one reference to an extent, its memory is released when no file uses it anymore
+        if self.drop_extent_reference(start_index):
+            self.release_memory_range(start_index, end_index)
+
+    def drop_extent_reference(self, start_index: int) -> bool:
+        # Drop one reference to an extent, return True if no file uses it anymore (its memory has to be released)
+        refcount = self.extent_refcounts.pop(start_index, 1) - 1
+        if refcount > 1:
+            self.extent_refcounts[start_index] = refcount
+        elif refcount == 0:
+            self.remove_content_hash(start_index)
             return True
-        else:
-            while file_node.file_memory_allocations:
-                # Iterate through the file's memory allocations and release the memory
-                start_index, end_index, _ = file_node.file_memory_allocations.pop(0)
-                # Set the memory block to 0 (freeing the memory)
-                self.memory_buffer[start_index:end_index] = 0
-                # Mark the released memory block as available for future use
-                self.allocation_available.append([start_index, end_index])
+        return False
+
+    def remove_content_hash(self, start_index: int) -> None:
+        # Remove an extent from the content index, so it can be modified in place again
+        content_hash = self.extent_hashes.pop(start_index, None)
+        if content_hash is not None:
+            del self.content_index[content_hash]
+
+    def deduplicate_extents(self, file_node: TreeNode, first_index: int = 0, seal_last: bool = False) -> None:
+        """
+        Index the sealed extents of a file by a hash of their content, starting at first_index.
+        The last extent is the open tail of the file, appends grow it in place, so it is only sealed (and indexed)
+        when seal_last is True, after the whole content was written at once. Extents smaller than DEDUP_MIN_SIZE are
+        not indexed.
+        An extent whose content is already stored is replaced by the stored extent (its reference count grows) and
+        its own memory is released. Indexed extents are never modified in place, a write copies them first.
+        """
+        allocations = file_node.file_memory_allocations
+        if seal_last and allocations.size >= DEDUP_MIN_SIZE:
+            # An indexed extent has no unused space, so no file appends into memory other files may share
+            for start_index, end_index in allocations.truncate(allocations.size, block_size=1):
+                self.release_extent(start_index, end_index)
+        sealed_count = len(allocations) if seal_last else len(allocations) - 1
+        for index in range(first_index, sealed_count):
+            start_index, end_index, used_range = allocations[index]
+            if start_index in self.extent_hashes or used_range < DEDUP_MIN_SIZE:
+                continue
+            content_hash = hashlib.sha256(self.memory_buffer.gather([(start_index, used_range)])).hexdigest()
+            stored_extent = self.content_index.get(content_hash)
+            if stored_extent is None:
+                self.content_index[content_hash] = allocations[index]
+                self.extent_hashes[start_index] = content_hash
+            else:
+                self.extent_refcounts[stored_extent[0]] = self.extent_refcounts.get(stored_extent[0], 1) + 1
+                allocations.replace(index, stored_extent)
+                self.release_extent(start_index, end_index)
+
+    def make_extents_private(self, file_node: TreeNode, offset: int, length: int) -> bool:
+        # Copy the shared extents holding a range of the file before the file writes to them (copy-on-write)
+        allocations = file_node.file_memory_allocations
+        index = max(allocations.find(offset), 0)
+        while index < len(allocations) and allocations.offsets[index] < offset + length:
+            if self.extent_refcounts.get(allocations[index][0], 1) == 1:
+                # The extent is only indexed by its content, drop it from the index instead of copying it
+                self.remove_content_hash(allocations[index][0])
+            elif self.is_extent_shared(allocations[index]):
+                new_start_index = self.reserve_memory_range(allocations[index][1] - allocations[index][0])
+                if new_start_index is None:
+                    return False
+                # Read the extent after the reservation, a compaction may have moved it
+                start_index, end_index, used_range = allocations[index]
+                self.memory_buffer.move(start_index, new_start_index, used_range)
+                new_extent = [new_start_index, new_start_index + end_index - start_index, used_range]
+                allocations.replace(index, new_extent)
+                self.extents_by_start[new_start_index] = new_extent
+                self.release_extent(start_index, end_index)
+            index += 1
+        return True
+
+    def share_file_content(self, source_node: TreeNode, destination_node: TreeNode) -> bool:
+        """
+        Make a file hold the same content as another one by sharing its extents instead of copying the bytes.
+        The shared extents are reference counted, and copied only when one of the files writes to them.
+        """
+        if source_node is destination_node:
+            return True
+        if not self.flush_write_back(source_node):
+            return False
+        self.delete_memory_buffer(destination_node)
+        source_allocations = source_node.file_memory_allocations
+        # A shared extent has no unused space, so neither file appends into memory the other one can see
+        for start_index, end_index in source_allocations.truncate(source_allocations.size, block_size=1):
+            self.release_extent(start_index, end_index)
+        for extent in source_allocations:
+            self.extent_refcounts[extent[0]] = self.extent_refcounts.get(extent[0], 1) + 1
+            destination_node.file_memory_allocations.append_shared(extent)
+        # A compressed file is shared compressed, the size of the content is the size of the source
+        destination_node.compressed = source_node.compressed
+        destination_node.size = source_node.size
+        last_modified_time = time.time()
+        destination_node.last_modified = last_modified_time
+        self.update_file_size(destination_node)
+        self.update_parents(node_to_start_to_update=destination_node.parent_node,
+                            last_modification_time=last_modified_time)
+        return True
+
+    def rebuild_extent_refcounts(self) -> None:
+        # Share again the extents that several files hold (they are stored once per file in the backup)
+        self.extent_refcounts = {}
+        self.content_index = {}
+        self.extents_by_start = extents_by_start_index = {}
+        nodes_to_visit = [self.root]
+        while nodes_to_visit:
+            node = nodes_to_visit.pop()
+            if not node.is_file:
+                nodes_to_visit.extend(node.children)
+                continue
+            for index, extent in enumerate(node.file_memory_allocations):
+                shared_extent = extents_by_start_index.setdefault(extent[0], extent)
+                if shared_extent is not extent:
+                    node.file_memory_allocations.replace(index, shared_extent)
+                    self.extent_refcounts[extent[0]] = self.extent_refcounts.get(extent[0], 1) + 1
+                elif extent[0] in self.extent_hashes:
+                    self.content_index[self.extent_hashes[extent[0]]] = extent
+
+    def get_memory_stats(self) -> Dict[str, Union[int, float]]:
+        # Compare the size of the files content with the memory it uses, shared extents are counted once
+        self.flush_write_back()
+        stored_extents = {}
+        compressed_files = compression_saved_size = 0
+        nodes_to_visit = [self.root]
+        while nodes_to_visit:
+            node = nodes_to_visit.pop()
+            if node.is_file:
+                stored_extents.update((id(extent), extent) for extent in node.file_memory_allocations)
+                if node.compressed:
+                    compressed_files += 1
+                    compression_saved_size += node.size - node.file_memory_allocations.size
+            else:
+                nodes_to_visit.extend(node.children)
+        stored_size = sum(used_range for _, _, used_range in stored_extents.values())
+        # The dedup ratio compares the content with what would be stored without compression
+        uncompressed_stored_size = stored_size + compression_saved_size
+        return {
+            "logical_size": self.root.size,
+            "stored_size": stored_size,
+            "shared_extents": len(self.extent_refcounts),
+            "indexed_extents": len(self.extent_hashes),
+            "dedup_ratio": self.root.size / uncompressed_stored_size if uncompressed_stored_size else 1.0,
+            "compressed_files": compressed_files,
+            "compression_saved_size": compression_saved_size
+        }
+
+    def display_stats(self) -> bool:
+        # Print the memory statistics
+        stats = self.get_memory_stats()
+        print(f"Content size: {stats['logical_size']} bytes")
+        print(f"Stored size: {stats['stored_size']} bytes")
+        print(f"Shared extents: {stats['shared_extents']}")
+        print(f"Deduplicated extents: {stats['indexed_extents']}")
+        print(f"Dedup ratio: {stats['dedup_ratio']:.2f}")
+        print(f"Compressed files: {stats['compressed_files']}")
+        print(f"Saved by compression: {stats['compression_saved_size']} bytes")
+        print(f"Path cache: {self.path_handler.cache_hits} hits, {self.path_handler.cache_misses} misses")
+        return True
+
+    def release_memory_range(self, start_index: int, end_index: int) -> None:
+        # Set the memory block to 0 (freeing the memory)
+        self.memory_buffer[start_index:end_index] = 0
+        # Mark the released memory block as available for future use, merged with its free neighbours
+        self.free_space.add(start_index, end_index)
+        self.shrink_buffer_tail()
+        # The range is a whole extent or the end of one, no extent starts there anymore
+        self.extents_by_start.pop(start_index, None)
+
+    def release_memory_ranges(self, ranges: List[List[int]]) -> None:
+        """
+        Release many memory ranges at once (the extents of a deleted subtree). The ranges are sorted and the adjacent
+        ones merged, so each run of released memory is zeroed with one slice assignment and added to the free space
+        index once, and the tail of the buffer is shrunk once at the end.
+        """
+        if not ranges:
+            return
+        for start_index, _ in ranges:
+            self.extents_by_start.pop(start_index, None)
+        ranges.sort()
+        merged_ranges = [list(ranges[0])]
+        for start_index, end_index in ranges[1:]:
+            if start_index == merged_ranges[-1][1]:
+                merged_ranges[-1][1] = end_index
+            else:
+                merged_ranges.append([start_index, end_index])
+        for start_index, end_index in merged_ranges:
+            self.memory_buffer[start_index:end_index] = 0
+            self.free_space.add(start_index, end_index)
+        self.shrink_buffer_tail()
+
+    def shrink_buffer_tail(self) -> None:
+        # Give the free range at the end of the used part of the buffer back to the high-water mark
+        tail_start_index = self.free_space.pop_range_ending_at(self.next_available_end_buffer_index)
+        if tail_start_index is not None:
+            self.next_available_end_buffer_index = tail_start_index
+            # Drop the trailing segments that are no longer used
+            self.memory_buffer.shrink(max(self.next_available_end_buffer_index, self.mem_size))
+            self.buffer_size = self.memory_buffer.size
+
+    def is_memory_available(self, start_index: int, end_index: int) -> bool:
+        # Check if a range of the memory buffer is free (either a free range or above the high-water mark)
+        if start_index >= self.next_available_end_buffer_index:
             return True
+        return self.free_space.contains(start_index, min(end_index, self.next_available_end_buffer_index))
 
-    def update_parents(self, node_to_start_to_update:TreeNode, last_modification_time: float,
-                       delta_size: Optional[int] = None):
-        # Start updating parent nodes from the given node up to the root
-        parent_node = node_to_start_to_update
-        while parent_node is not None:
-            # Update the last modification time of the current parent node
-            parent_node.last_modified = last_modification_time
-            # If delta_size is provided and not zero, update the size of the parent node
-            if delta_size and delta_size != 0:
-                parent_node.size += delta_size
-            # Move to the next parent node (if any)
-            parent_node = parent_node.parent_node
+    def get_fragmentation(self) -> float:
+        # Return the fraction of the used part of the buffer that is free holes
+        if not self.next_available_end_buffer_index:
+            return 0.0
+        return self.free_space.free_size / self.next_available_end_buffer_index
+
+    def compaction_step(self, time_budget: Optional[float] = None) -> bool:
+        """
+        Move the file extents down to the start of the memory buffer, filling the free holes.
+        Each move takes the extent that starts where the first hole ends (looked up by its start index, so no plan of
+        the whole buffer is needed) and moves it down with one bulk copy: the hole moves up and merges with the next
+        one. The work stops when the time budget (in seconds) runs out, and the next step continues from the first
+        hole, whatever changed in between. Returns True when the memory buffer is fully compacted.
+        """
+        deadline = time.perf_counter() + time_budget if time_budget is not None else None
+        while len(self.free_space):
+            hole_start_index, hole_end_index = self.free_space.first()
+            allocation = self.extents_by_start.get(hole_end_index)
+            if allocation is None or not self.free_space.take_at(hole_start_index, hole_end_index - hole_start_index):
+                # No known extent after the hole (memory lost by an inconsistent backup), it cannot be moved down
+                break
+            start_index, end_index, used_range = allocation
+            new_start_index = hole_start_index
+            new_end_index = new_start_index + end_index - start_index
+            self.memory_buffer.move(start_index, new_start_index, used_range)
+            allocation[0], allocation[1] = new_start_index, new_end_index
+            self.extents_by_start[new_start_index] = self.extents_by_start.pop(start_index)
+            if start_index in self.extent_refcounts:
+                # The extent is shared, its owners see the move through the shared list
+                self.extent_refcounts[new_start_index] = self.extent_refcounts.pop(start_index)
+            if start_index in self.extent_hashes:
+                self.extent_hashes[new_start_index] = self.extent_hashes.pop(start_index)
+            # The hole moves up, right after the moved extent
+            self.free_space.add(new_end_index, end_index)
+            self.shrink_buffer_tail()
+            if deadline is not None and len(self.free_space) and time.perf_counter() > deadline:
+                return False
+        self.compaction_running = False
+        return True
+
+    def compact_memory_buffer(self, time_budget: str = "") -> bool:
+        # Compact the memory buffer completely, or run a single step limited by a time budget in milliseconds
+        if time_budget:
+            if not self.is_positive_or_zero_integer(time_budget):
+                print(ErrorMessages.InvalidTimeBudgetError.value)
+                return False
+            self.compaction_running = not self.compaction_step(int(time_budget) / 1000)
+        else:
+            self.compaction_step()
+        return True
+
+    def maintain_memory_buffer(self) -> None:
+        """
+        Use the time between commands: commit the write-back buffers that waited too long, and run a short
+        compaction step when a compaction is running or the memory is too fragmented.
+        """
+        now = time.time()
+        for file_node, first_append_time in list(self.write_back_times.items()):
+            if now - first_append_time >= self.write_back_delay:
+                self.flush_write_back(file_node)  # A failed commit is reported and kept for a later step
+        if self.compress_after is not None and (self.compression_nodes_to_visit is not None
+                                                or now >= self.next_compression_time):
+            self.compress_cold_files(now, COMPACTION_STEP_TIME)
+        if self.compaction_running or self.get_fragmentation() > COMPACTION_THRESHOLD:
+            self.compaction_running = not self.compaction_step(COMPACTION_STEP_TIME)
+
+    def update_parents(self, node_to_start_to_update: TreeNode, last_modification_time: float) -> None:
+        """
+        Record a change in a directory. Instead of walking up to the root on every change, the directory and its
+        ancestors are marked dirty, and their sizes and modification times are computed when they are read.
+        """
+        if node_to_start_to_update is not None:
+            node_to_start_to_update.mark_dirty(last_modification_time)
+        self.node_table = None
 
 
     def update_file_size(self, file_node: TreeNode) -> int:
         """
         Get the size of the content in the node.
-        For files, it calculates the sum of memory allocations.
+        For files, it is the number of used bytes in the file's extents. The extents map keeps it up to date from the
+        bytes written and released, so it is not summed again over the extents.
         """
         if file_node.is_file:
-            if file_node.file_memory_allocations:
-                size_content = 0  # Initialize
-
-                for allocation in file_node.file_memory_allocations:
-                    start_index, end_index, used_range = allocation
-                    # Calculate the length of content in this allocation block
-                    size_content += used_range
-                file_node.size = size_content
-                return size_content
-            else:
-                return 0  # File not found in memory allocations
+            if DEBUG_CONSISTENCY_CHECKS:
+                assert file_node.file_memory_allocations.check_consistency(), \
+                    f"Inconsistent size bookkeeping for file {file_node.name}"
+            if not file_node.compressed:
+                file_node.size = file_node.file_memory_allocations.size
+            return file_node.size
 
     def _create_file_or_dir(self, new_name: str, parent_node: TreeNode, file: bool = False,
-                            content: str = "") -> Union[bool, TreeNode]:
+                            content: Union[str, bytes] = "") -> Union[bool, TreeNode]:
         # Create a new directory or file node and add it as a child to the parent node
         is_file = file
         new_node = TreeNode(new_name, is_file, parent_node)
         parent_node.add_child(new_node)
         if is_file and content:
             # If it's a file and content is provided, write the content to the file
-            write_success = self.write_to_file(new_node, content, append=False)
+            if isinstance(content, str):
+                write_success = self.write_to_file(new_node, content, append=False)
+            else:
+                write_success = self.write_bytes(new_node, content, append=False)
             if not write_success:
                 return False
         else:
@@ -375,13 +764,18 @@ class FileSystemManager:
             self.update_parents(node_to_start_to_update=parent_node, last_modification_time=last_modified_time)
         return new_node
 
-    def create_file_or_dir(self, name: str, file: bool = False, content: str = "", recursive: bool = False) -> bool:
+    def create_file_or_dir(self, name: Union[str, PathComponents], file: bool = False, content: Union[str, bytes] = "",
+                           recursive: bool = False) -> bool:
         # Create a directory or a file with the given content
         if content and not file:
             print(f"{ErrorMessages.IsADirectoryError.value}Cannot write to a directory")
             return False
-        parent_path, new_name = self.path_handler.split_path(name)
-        parent_node = self.path_handler.get_node_by_path(parent_path, show_errors=False)
+        path_components = self.path_handler.normalize_path(name)
+        if not path_components:
+            print(f"/{ErrorMessages.ExistsError.value}")
+            return False
+        parent_path, new_name = self.path_handler.to_path(path_components[:-1]), path_components[-1]
+        parent_node = self.path_handler.get_node_by_path(path_components[:-1], show_errors=False)
         if parent_node:
             if parent_node.is_file:  # the parent node should be a path, not a file
                 print(f"{ErrorMessages.InvalidPath.value}{name} The parent node should be a directory, not a file")
@@ -406,15 +800,14 @@ class FileSystemManager:
                 return False
 
             else:  # handle case of recursive creation
-                if name.startswith("/"):
-                    current_node = self.root
-                else:
-                    current_node = self.path_handler.get_node_by_path(self.path_handler.current_directory,
-                                                                      show_errors=False)
-                path_components = name.strip("/").split("/")
+                current_node = self.root
                 for i in range(len(path_components)):
                     new_node = current_node.get_child_by_name(path_components[i])
                     if new_node:
+                        if new_node.is_file and i < len(path_components) - 1:
+                            print(f"{ErrorMessages.InvalidPath.value}{self.path_handler.to_path(path_components)}"
+                                  f" The parent node should be a directory, not a file")
+                            return False
                         current_node = new_node
                     else:
                         if i == len(path_components) - 1:
@@ -429,6 +822,17 @@ class FileSystemManager:
                             current_node = result
         return False
 
+    def get_file_content(self, file_node: TreeNode) -> memoryview:
+        """
+        Gather the content of a file from its extents in one vectorized step.
+        The result is a memoryview of bytes; for a file stored in a single extent it is a view of the memory buffer
+        itself, so it is only valid until the file is modified.
+        """
+        if not self.load_file_content(file_node):
+            return memoryview(b"")
+        return self.memory_buffer.gather([(start_index, used_range) for start_index, _, used_range
+                                          in file_node.file_memory_allocations if used_range])
+
     def read_file(self, name: Union[TreeNode, str], print_text=True) -> Union[bool, str]:
         # Read and return the content of a file
         if isinstance(name, TreeNode):
@@ -438,27 +842,13 @@ class FileSystemManager:
         if not file_node:
             return False
         if file_node.is_file:
-            if file_node.file_memory_allocations:
-                # Check if the file has allocations
-                content = bytearray()  # Initialize an empty bytearray for the content
-                for allocation in file_node.file_memory_allocations:
-                    start_index, end_index, used_range = allocation
-                    # Calculate the length of content in this allocation block
-                    content_length = used_range
-                    # Retrieve content from the memory buffer
-                    content.extend(self.memory_buffer[start_index:start_index + content_length])
-                # Decode the content from bytes to string using utf-8 encoding
-                if print_text:
-                    print(bytes(content).decode("utf-8"))
-                    return True
-                else:
-                    return bytes(content).decode("utf-8")
+            # Decode the content from bytes to string using utf-8 encoding, only once it is gathered
+            content = str(self.get_file_content(file_node), "utf-8", errors="replace")
+            if print_text:
+                print(content)
+                return True
             else:
-                if print_text:
-                    print("")
-                    return True
-                else:
-                    return ""
+                return content
         else:
             print(f"{ErrorMessages.IsADirectoryError.value}Cannot read a directory")
             return False
@@ -472,247 +862,614 @@ class FileSystemManager:
         if not file_node:
             return False
         if file_node.is_file:
-            if not append:
-                self.delete_memory_buffer(file_node)
-            content_length = len(content)
-            # Check if the file has an allocation, if not, allocate memory
-            if not file_node.file_memory_allocations:
-                allocation_success = self.allocate_memory_buffer(file_node)
-                if not allocation_success:
-                    return False
-            # Retrieve the last allocated block's information
-            last_allocated_ranges = file_node.file_memory_allocations[-1]
-            start_index, end_index, used_range = last_allocated_ranges
-            available_space = end_index - start_index - used_range
-            new_start_index = start_index + used_range
-            if content_length <= available_space:
-                # Content fits within the available space
-                self.memory_buffer[new_start_index:new_start_index + content_length] = bytearray(content,
-                                                                                                 "utf-8")
-                file_node.file_memory_allocations[-1] = [start_index, end_index,
-                                                         used_range + content_length]
-                # Update the last modification time of the file to the current time
-                last_modified_time = time.time()
-                file_node.last_modified = last_modified_time
-                # Calculate the change in file size (delta) after writing the content
-                old_file_size = file_node.size
-                delta_file_size = self.update_file_size(file_node) - old_file_size
-                # Update the modification times and sizes of parent directories
-                # Starting from the parent node of the file
-                self.update_parents(node_to_start_to_update=file_node.parent_node,
-                                    last_modification_time=last_modified_time, delta_size=delta_file_size)
-                return True
-            else:
-                if available_space > 0:
-                    self.memory_buffer[new_start_index:new_start_index + available_space] = bytearray(
-                        content[:available_space], "utf-8")
-                    file_node.file_memory_allocations[-1] = [start_index, end_index,
-                                                             used_range + available_space]
-                    updated_content = content[available_space:]
-                    content_length = len(updated_content)
-                else:
-                    updated_content = content
-                new_blocks_count = math.ceil(content_length / DEFAULT_FILE_SIZE)
-                for i in range(int(new_blocks_count)):
-                    allocation_success = self.allocate_memory_buffer(file_node)
-                    if not allocation_success:
-                        return False
-                    self.write_to_file(file_node, updated_content
-                                       [DEFAULT_FILE_SIZE * i:DEFAULT_FILE_SIZE * (i + 1)], append=True)
-                return True
+            # Encode the content once, the rest of the write works on bytes
+            return self.write_content(file_node, memoryview(content.encode("utf-8")), append=append)
         else:
             print(f"{ErrorMessages.IsADirectoryError.value}Cannot write to a directory")
             return False
 
-    def delete_file_or_dir(self, name: str) -> bool:
+    def read_bytes(self, name: Union[TreeNode, str]) -> Union[bool, bytes]:
+        # Read and return the content of a file as bytes, without decoding it
+        if isinstance(name, TreeNode):
+            file_node = name
+        else:
+            file_node = self.path_handler.get_node_by_path(name, show_errors=True)
+        if not file_node:
+            return False
+        if not file_node.is_file:
+            print(f"{ErrorMessages.IsADirectoryError.value}Cannot read a directory")
+            return False
+        return bytes(self.get_file_content(file_node))
+
+    def write_bytes(self, name: Union[TreeNode, str], data, append: bool = True) -> bool:
+        # Write any buffer-protocol object (bytes, bytearray, memoryview, NumPy array) to a file, without encoding it
+        if isinstance(name, TreeNode):
+            file_node = name
+        else:
+            file_node = self.path_handler.get_node_by_path(name, show_errors=True)
+        if not file_node:
+            return False
+        if not file_node.is_file:
+            print(f"{ErrorMessages.IsADirectoryError.value}Cannot write to a directory")
+            return False
+        data_view = memoryview(data)
+        if not data_view.c_contiguous:
+            # A strided buffer (like a sliced NumPy array) cannot be cast, copy it to contiguous bytes first
+            data_view = memoryview(data_view.tobytes())
+        return self.write_content(file_node, data_view.cast("B"), append=append)
+
+    def get_file_ranges(self, file_node: TreeNode, offset: int, length: int) -> List[Tuple[int, int]]:
+        # Map a range of the file content to (memory index, length) ranges of the memory buffer
+        allocations = file_node.file_memory_allocations
+        memory_ranges = []
+        index = max(allocations.find(offset), 0)
+        while length > 0 and index < len(allocations):
+            start_index, _, used_range = allocations[index]
+            extent_offset = offset - allocations.offsets[index]
+            part_length = min(used_range - extent_offset, length)
+            if part_length > 0:
+                memory_ranges.append((start_index + extent_offset, part_length))
+                offset += part_length
+                length -= part_length
+            index += 1
+        return memory_ranges
+
+    def get_file_node(self, name: Union[TreeNode, str]) -> Union[bool, TreeNode]:
+        # Get the node of an existing file, print an error if it is not found or is a directory
+        file_node = name if isinstance(name, TreeNode) else self.path_handler.get_node_by_path(name, show_errors=True)
+        if not file_node:
+            return False
+        if not file_node.is_file:
+            print(f"{ErrorMessages.IsADirectoryError.value}Expected a file, not a directory")
+            return False
+        if not self.load_file_content(file_node):
+            return False
+        return file_node
+
+    def load_file_content(self, file_node: TreeNode) -> bool:
+        # Make the content of a file ready to be accessed: decompressed, with its pending appends committed
+        file_node.last_access = time.time()
+        if file_node.compressed and not self.decompress_file(file_node):
+            return False
+        return self.flush_write_back(file_node)
+
+    def compress_file(self, file_node: TreeNode) -> bool:
+        # Store the content of a file compressed with zlib in a single extent, when it makes the file smaller
+        allocations = file_node.file_memory_allocations
+        content = self.memory_buffer.gather([(start_index, used_range) for start_index, _, used_range in allocations])
+        compressed_content = zlib.compress(content, COMPRESSION_LEVEL)
+        if len(compressed_content) >= allocations.size or not self.replace_file_extents(file_node, compressed_content):
+            return False
+        file_node.compressed = True
+        file_node.generation += 1
+        return True
+
+    def decompress_file(self, file_node: TreeNode) -> bool:
+        # Store the content of a compressed file uncompressed again, it stays so until it is cold again
+        allocations = file_node.file_memory_allocations
+        content = zlib.decompress(self.memory_buffer.gather([(start_index, used_range)
+                                                             for start_index, _, used_range in allocations]))
+        if not self.replace_file_extents(file_node, content):
+            return False
+        file_node.compressed = False
+        return True
+
+    def replace_file_extents(self, file_node: TreeNode, data: bytes) -> bool:
+        """
+        Move the content of a file to a single new extent holding `data`, without changing its size or times.
+        The new extent is reserved while the old ones still belong to the file, so a compaction triggered by the
+        reservation moves them safely.
+        """
+        size = max(self.block_size, math.ceil(len(data) / self.block_size) * self.block_size)
+        start_index = self.reserve_memory_range(size)
+        if start_index is None:
+            return False
+        self.memory_buffer[start_index:start_index + len(data)] = data
+        for old_start_index, old_end_index, _ in file_node.file_memory_allocations.clear():
+            self.release_extent(old_start_index, old_end_index)
+        file_node.file_memory_allocations.append(start_index, start_index + size, len(data))
+        self.extents_by_start[start_index] = file_node.file_memory_allocations.last()
+        return True
+
+    def is_attached(self, node: TreeNode) -> bool:
+        # Check if a node is still in the tree, a deleted subtree keeps its parent pointers but is not a child anymore
+        while node.parent_node is not None:
+            if node.parent_node.get_child_by_name(node.name) is not node:
+                return False
+            node = node.parent_node
+        return node is self.root
+
+    def compress_cold_files(self, now: float, time_budget: Optional[float] = None) -> bool:
+        """
+        Compress the files that were not accessed for compress_after seconds.
+        The walk stops when the time budget (in seconds) runs out, the nodes left to visit are kept and the next call
+        continues from there. Returns True when the whole tree was visited.
+        """
+        deadline = time.perf_counter() + time_budget if time_budget is not None else None
+        if self.compression_nodes_to_visit is None:
+            self.compression_nodes_to_visit = [self.root]
+            self.compression_pass_next_time = now + self.compress_after
+        nodes_to_visit = self.compression_nodes_to_visit
+        while nodes_to_visit:
+            node = nodes_to_visit.pop()
+            if not node.is_file:
+                nodes_to_visit.extend(node.children)
+            elif not (node.compressed or node.size < COMPRESSION_MIN_SIZE or node in self.write_back_buffers):
+                cold_time = node.last_access + self.compress_after
+                if cold_time > now:
+                    self.compression_pass_next_time = min(self.compression_pass_next_time, cold_time)
+                elif self.is_attached(node) and not self.compress_file(node):  # A deleted file is skipped
+                    node.last_access = now  # The content does not compress, try again when it is cold again
+            if deadline is not None and nodes_to_visit and time.perf_counter() > deadline:
+                return False
+        self.compression_nodes_to_visit = None
+        self.next_compression_time = self.compression_pass_next_time
+        return True
+
+    def iter_file_chunks(self, name: Union[TreeNode, str], chunk_size: int = SEGMENT_SIZE) -> Iterator[memoryview]:
+        """
+        Yield the content of a file, extent by extent, as memoryview slices of at most chunk_size bytes.
+        The slices are views of the memory buffer (nothing is copied), so a slice is only valid until the next one is
+        requested. The extents are looked up again for each chunk, so compacting the memory buffer between chunks is
+        safe, but changing the content of the file during the iteration (a write, a truncation or a delete) raises a
+        RuntimeError.
+        """
+        if chunk_size < 1:
+            raise ValueError(f"Invalid chunk size {chunk_size}, it should be a positive integer")
+        file_node = self.get_file_node(name)
+        if not file_node:
+            return iter(())
+        return self.iter_node_chunks(file_node, chunk_size)
+
+    def iter_node_chunks(self, file_node: TreeNode, chunk_size: int) -> Iterator[memoryview]:
+        # The generator behind iter_file_chunks: yield the stored bytes of a file (compressed if the file is)
+        generation = file_node.generation
+        position = 0
+        while True:
+            if file_node.generation != generation:
+                raise RuntimeError(f"File {file_node.name} changed during iteration")
+            if position >= file_node.file_memory_allocations.size:
+                return
+            memory_ranges = self.get_file_ranges(file_node, position, chunk_size)
+            if not memory_ranges:
+                raise RuntimeError(f"File {file_node.name} has no content at offset {position}")
+            for memory_index, length in memory_ranges:
+                for segment, segment_start, segment_end, _ in \
+                        self.memory_buffer.iter_ranges(memory_index, memory_index + length):
+                    if file_node.generation != generation:
+                        raise RuntimeError(f"File {file_node.name} changed during iteration")
+                    yield memoryview(segment[segment_start:segment_end]).cast("B")
+                position += length
+
+    def iter_content_chunks(self, file_node: TreeNode) -> Iterator[Union[memoryview, bytes]]:
+        """
+        Yield the content of a file chunk by chunk without changing how it is stored: a compressed file is decompressed
+        while it is streamed (it is not rewritten and its last access time is kept), and the pending appends come last.
+        """
+        if file_node.compressed:
+            decompressor = zlib.decompressobj()
+            for chunk in self.iter_node_chunks(file_node, SEGMENT_SIZE):
+                yield decompressor.decompress(chunk)
+            yield decompressor.flush()
+        else:
+            yield from self.iter_node_chunks(file_node, SEGMENT_SIZE)
+        pending_data = self.write_back_buffers.get(file_node)
+        if pending_data:
+            yield bytes(pending_data)
+
+    def file_contains_text(self, file_node: TreeNode, text: str) -> bool:
+        # Check if a file contains a text (case-insensitive), decoding the content chunk by chunk
+        text = text.lower()
+        overlap_length = len(text) - 1  # A match can span two chunks, keep the end of the previous chunk
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        previous_tail = ""
+        for chunk in self.iter_content_chunks(file_node):
+            window = previous_tail + decoder.decode(chunk).lower()
+            if text in window:
+                return True
+            previous_tail = window[max(len(window) - overlap_length, 0):] if overlap_length else ""
+        return text in previous_tail + decoder.decode(b"", final=True).lower()
+
+    def read_at(self, name: Union[TreeNode, str], offset: int, length: int) -> Union[bool, bytes]:
+        # Read up to `length` bytes of a file starting at `offset`, touching only the extents holding them
+        file_node = self.get_file_node(name)
+        if not file_node:
+            return False
+        if not 0 <= offset <= file_node.size:
+            print(f"{ErrorMessages.InvalidOffsetError.value}{offset}")
+            return False
+        if length < 0:
+            print(ErrorMessages.InvalidLengthError.value)
+            return False
+        return bytes(self.memory_buffer.gather(self.get_file_ranges(file_node, offset, length)))
+
+    def write_at(self, name: Union[TreeNode, str], offset: int, data) -> bool:
+        """
+        Write bytes to a file starting at `offset`, overwriting only the affected bytes.
+        The part of the data that goes past the end of the file is appended.
+        """
+        file_node = self.get_file_node(name)
+        if not file_node:
+            return False
+        if not 0 <= offset <= file_node.size:
+            print(f"{ErrorMessages.InvalidOffsetError.value}{offset}")
+            return False
+        data = memoryview(data).cast("B")
+        if not self.make_extents_private(file_node, offset, len(data)):
+            return False
+        file_node.generation += 1
+        position = 0
+        for memory_index, part_length in self.get_file_ranges(file_node, offset, len(data)):
+            self.memory_buffer[memory_index:memory_index + part_length] = data[position:position + part_length]
+            position += part_length
+        if position < len(data):
+            # Append the rest, the size and modification time are updated by the write
+            return self.write_content(file_node, data[position:], append=True)
+        last_modified_time = time.time()
+        file_node.last_modified = last_modified_time
+        self.update_parents(node_to_start_to_update=file_node.parent_node, last_modification_time=last_modified_time)
+        return True
+
+    def truncate_file(self, name: Union[TreeNode, str], length: Union[int, str]) -> bool:
+        # Cut a file to `length` bytes, releasing the tail extents without copying (or extend it with zero bytes)
+        if isinstance(length, str):
+            if not self.is_positive_or_zero_integer(length):
+                print(ErrorMessages.InvalidLengthError.value)
+                return False
+            length = int(length)
+        file_node = self.get_file_node(name)
+        if not file_node:
+            return False
+        if length >= file_node.size:
+            return self.write_content(file_node, memoryview(bytes(length - file_node.size)), append=True)
+        if length and not self.make_extents_private(file_node, length - 1, 1):
+            # The extent holding the new end of the file is cut, it must not be shared
+            return False
+        file_node.generation += 1
+        for start_index, end_index in file_node.file_memory_allocations.truncate(length, self.block_size):
+            self.release_extent(start_index, end_index)
+        last_modified_time = time.time()
+        file_node.last_modified = last_modified_time
+        self.update_file_size(file_node)
+        self.update_parents(node_to_start_to_update=file_node.parent_node,
+                            last_modification_time=last_modified_time)
+        return True
+
+    def write_content(self, file_node: TreeNode, data: memoryview, append: bool = True) -> bool:
+        # Write bytes to a file, small appends go through the write-back buffer of the file when it is enabled
+        if append and len(data) < self.write_back_size:
+            return self.buffer_append(file_node, data)
+        if append and not self.flush_write_back(file_node):
+            # The pending appends are committed first to keep the order of the data, nothing is written if they fail
+            return False
+        return self.commit_content(file_node, data, append)
+
+    def buffer_append(self, file_node: TreeNode, data: memoryview) -> bool:
+        # Collect a small append in memory, it is committed once the buffer is big enough or old enough
+        pending_data = self.write_back_buffers.get(file_node)
+        if pending_data is None:
+            pending_data = self.write_back_buffers[file_node] = bytearray()
+            self.write_back_times[file_node] = time.time()
+        pending_data += data
+        if (len(pending_data) >= self.write_back_size
+                or time.time() - self.write_back_times[file_node] >= self.write_back_delay
+                or file_node.size + len(pending_data) > self.max_file_size):
+            if not self.flush_write_back(file_node):
+                # This append fails, the earlier ones (already reported as written) stay in the buffer
+                del pending_data[len(pending_data) - len(data):]
+                if not pending_data:
+                    del self.write_back_buffers[file_node]
+                    del self.write_back_times[file_node]
+                return False
+        return True
+
+    def flush_write_back(self, file_node: Optional[TreeNode] = None) -> bool:
+        """
+        Commit the pending appends of a file (or of all the files) to the memory buffer.
+        The appends were already reported as written, so when a commit fails (the memory is full) they are put back
+        in the buffer and committed again once the write-back delay has passed again.
+        """
+        file_nodes = [file_node] if file_node is not None else list(self.write_back_buffers)
+        success = True
+        for node in file_nodes:
+            pending_data = self.write_back_buffers.pop(node, None)
+            if pending_data is None:
+                continue
+            del self.write_back_times[node]
+            if not self.commit_content(node, memoryview(pending_data), append=True):
+                self.write_back_buffers[node] = pending_data
+                self.write_back_times[node] = time.time()
+                print(f"{ErrorMessages.WriteBackError.value}{self.path_handler.get_node_path(node)}")
+                success = False
+        return success
+
+    def commit_content(self, file_node: TreeNode, data: memoryview, append: bool = True) -> bool:
+        """
+        Write bytes to a file in a single pass: all the missing space is reserved with one allocation, the data is
+        copied with one slice assignment per extent, and the parent directories are marked for update once.
+        """
+        file_node.generation += 1
+        if not append:
+            self.delete_memory_buffer(file_node)
+        elif file_node.compressed and not self.decompress_file(file_node):
+            return False
+        file_node.last_access = time.time()
+        allocations = file_node.file_memory_allocations
+        # A file written in one piece has no open tail to append to, its last extent can be deduplicated too
+        whole_content = not allocations.size
+        # Only the last extent of a file may have unused space, the data is written from there
+        first_index = len(allocations) - 1 if allocations else 0
+        missing_size = len(data) - (allocations.capacity - allocations.size)
+        if missing_size > 0:
+            # Reserve the rest of the content at once, growing the last extent in place when possible
+            allocation_success = self.allocate_memory_buffer(file_node, missing_size)
+            if not allocation_success:
+                return False
+        position = 0
+        for index in range(first_index, len(allocations)):
+            if position == len(data):
+                break
+            start_index, end_index, used_range = allocations[index]
+            length = min(end_index - start_index - used_range, len(data) - position)
+            if length > 0:
+                self.memory_buffer[start_index + used_range:start_index + used_range + length] = \
+                    data[position:position + length]
+                allocations.add_used(length, index)
+                position += length
+        if self.dedup:
+            self.deduplicate_extents(file_node, first_index, seal_last=whole_content)
+        # Update the last modification time of the file to the current time
+        last_modified_time = time.time()
+        file_node.last_modified = last_modified_time
+        self.update_file_size(file_node)
+        # Mark the sizes and modification times of the parent directories for update
+        self.update_parents(node_to_start_to_update=file_node.parent_node,
+                            last_modification_time=last_modified_time)
+        return True
+
+    def expand_paths(self, pattern: str, top_level_only: bool = False) -> List[PathComponents]:
+        # Expand a path with wildcards, optionally without the matches that are under another match
+        matches = self.path_handler.expand_pattern(pattern)
+        if not matches:
+            print(f"{ErrorMessages.NotFoundError.value}{pattern}")
+        elif top_level_only:
+            # The matches are sorted, so the nodes under a match follow it
+            top_level_matches = [matches[0]]
+            for path_components in matches[1:]:
+                if path_components[:len(top_level_matches[-1])] != top_level_matches[-1]:
+                    top_level_matches.append(path_components)
+            matches = top_level_matches
+        return matches
+
+    def get_destination_directory(self, destination_path: Union[str, PathComponents]) -> Optional[PathComponents]:
+        # Get the destination directory of a batch of matches, it is created if it does not exist
+        destination_components = self.path_handler.normalize_path(destination_path)
+        destination_node = self.path_handler.get_node_by_path(destination_components, show_errors=False)
+        if not destination_node:
+            if not self.create_file_or_dir(destination_components, file=False, recursive=True):
+                return None
+        elif destination_node.is_file:
+            print(f"{ErrorMessages.InvalidPath.value}{self.path_handler.to_path(destination_components)} "
+                  f"the destination path should a directory format")
+            return None
+        return destination_components
+
+    def delete_file_or_dir(self, name: Union[str, PathComponents]) -> bool:
         # Delete a file or a directory
-        parent_dir_path, name_to_del = self.path_handler.split_path(name)
-        parent_dir = self.path_handler.get_node_by_path(parent_dir_path, show_errors=True)
+        if self.path_handler.is_pattern(name):
+            # Delete all the matches, a match under a matched directory is deleted with it
+            matches = self.expand_paths(name, top_level_only=True)
+            return bool(matches) and all([self.delete_file_or_dir(path_components) for path_components in matches])
         node_to_del = self.path_handler.get_node_by_path(name, show_errors=True)
-        if not parent_dir:
-            # If the parent directory does not exist, cannot delete
-            return False
-        elif not node_to_del:
+        if not node_to_del:
             # If the node to delete does not exist, cannot delete
             return False
-        else:
-            delta_size = 0
-            if node_to_del.is_file:
-                # If the node to be deleted is a file, delete its memory buffer
-                old_file_size = node_to_del.size
-                self.delete_memory_buffer(node_to_del)
-                delta_size = -old_file_size if old_file_size !=0 else 0
-            else:
-                # If the node to be deleted is a directory, recursively delete its contents
-                for child in node_to_del.children.copy():
-                    child_path = f"{parent_dir_path}/{name_to_del}/{child.name}" if parent_dir_path != "/" \
-                                else f"/{name_to_del}/{child.name}"
-                    # Recursively call delete_file_or_dir to delete each child node
-                    self.delete_file_or_dir(child_path)
-            # Remove the node to be deleted from the parent directory
-            parent_dir.remove_child(name_to_del)
-            last_modified_time = time.time()
-            # Check if delta_size is non-zero, indicating a change in size
-            if delta_size != 0:
-                # If delta_size is not zero, update the parent directory's size and last modification time
-                # and propagate the size change up the directory hierarchy
-                self.update_parents(node_to_start_to_update=parent_dir,
-                                    last_modification_time=last_modified_time,
-                                    delta_size=delta_size)
-            else:
-                # If delta_size is zero, only update the parent directory's
-                # last modification time without changing its size
-                self.update_parents(node_to_start_to_update=parent_dir,
-                                    last_modification_time=last_modified_time)
+        if node_to_del is self.root:
+            # Deleting the root deletes its content
+            for child in list(self.root.children):
+                self.delete_node(child)
             return True
+        self.delete_node(node_to_del)
+        return True
+
+    def delete_node(self, node_to_del: TreeNode) -> None:
+        """
+        Delete a node and its whole subtree. The node is detached from its parent first, then the detached subtree is
+        walked iteratively (without recursion) to collect the extents of its files, and the memory no other file
+        shares is released in one bulk operation. The parent directory is marked changed once.
+        """
+        parent_dir = node_to_del.parent_node
+        self.path_handler.invalidate(node_to_del)
+        self.path_handler.forget_subtree(node_to_del, parent_dir)
+        parent_dir.remove_child(node_to_del.name)
+        released_ranges = []
+        nodes_to_visit = [node_to_del]
+        while nodes_to_visit:
+            node = nodes_to_visit.pop()
+            if node.is_file:
+                released_ranges.extend(self.drop_file_content(node))
+            else:
+                nodes_to_visit.extend(node.children)
+        self.release_memory_ranges(released_ranges)
+        # The size and last modification time of the parent directory are updated when they are read
+        self.update_parents(node_to_start_to_update=parent_dir, last_modification_time=time.time())
 
 
-    def copy_file_or_dir(self, source_path: str, destination_path: str, recursive: bool = False,
-                         first_run: bool = True) -> bool:
+    def copy_file_or_dir(self, source_path: Union[str, PathComponents], destination_path: Union[str, PathComponents],
+                         recursive: bool = False, first_run: bool = True) -> bool:
         # Copy a file or directory from the source path to the destination path.
-        source_dir_node = self.path_handler.get_node_by_path(source_path, show_errors=True)
+        if self.path_handler.is_pattern(source_path):
+            # Copy all the matches into the destination directory
+            matches = self.expand_paths(source_path, top_level_only=True)
+            destination_components = self.get_destination_directory(destination_path) if matches else None
+            return destination_components is not None and all(
+                [self.copy_file_or_dir(path_components, destination_components, recursive=recursive)
+                 for path_components in matches])
+        source_components = self.path_handler.normalize_path(source_path)
+        destination_components = self.path_handler.normalize_path(destination_path)
+        source_dir_node = self.path_handler.get_node_by_path(source_components, show_errors=True)
         if not source_dir_node:
             # The source path does not exist, cannot copy
-            print(ErrorMessages.InvalidPath.value + source_path)
+            print(ErrorMessages.InvalidPath.value + self.path_handler.to_path(source_components))
             return False
         if source_dir_node.is_file:
             # if source is a file - copy it
-            destination_node = self.path_handler.get_node_by_path(destination_path, show_errors=False)
+            # The copy shares the extents of the source, the bytes are copied only when one of the files is modified
+            destination_node = self.path_handler.get_node_by_path(destination_components, show_errors=False)
             if not destination_node:  # if the destination file does not exist - create it
-                return self.create_file_or_dir(destination_path, file=True, content=self.read_file(source_dir_node,
-                                                                                                   print_text=False),
-                                               recursive=True)
-            else:
-                if destination_node.is_file:  # if the destination file exist - write the content of the source file
-                    return self.write_to_file(destination_node, content=self.read_file(source_dir_node,
-                                                                                       print_text=False), append=False)
-                else:  # if the destination directory exist - create the file on this directory
-                    filename = self.path_handler.split_path(source_path)[1]
-                    new_des_path = f"{destination_path}/{filename}" if destination_path != "/" \
-                        else f"/{destination_path}"
-                    return self.create_file_or_dir(new_des_path, file=True,
-                                                   content=self.read_file(source_dir_node, print_text=False),
-                                                   recursive=True)
+                if not self.create_file_or_dir(destination_components, file=True, recursive=True):
+                    return False
+                destination_node = self.path_handler.get_node_by_path(destination_components)
+            elif not destination_node.is_file:  # if the destination directory exist - create the file on this directory
+                new_des_components = destination_components + (source_dir_node.name,)
+                if not self.create_file_or_dir(new_des_components, file=True, recursive=True):
+                    return False
+                destination_node = self.path_handler.get_node_by_path(new_des_components)
+            # if the destination file exist - its content is replaced by the content of the source file
+            return self.share_file_content(source_dir_node, destination_node)
 
         else:  # if the source is a directory
-            destination_node = self.path_handler.get_node_by_path(destination_path, show_errors=False)
+            destination_node = self.path_handler.get_node_by_path(destination_components, show_errors=False)
             if isinstance(destination_node, TreeNode):
                 # Ensure the destination is not a file (directories should be copied to directories)
                 if destination_node.is_file:
-                    print(f"{ErrorMessages.InvalidPath.value}{destination_path} "
+                    print(f"{ErrorMessages.InvalidPath.value}{self.path_handler.to_path(destination_components)} "
                           f"the destination path should a directory format")
                     return False
             else:
                 # if the destination directory does not exist - create it
-                result = self.create_file_or_dir(destination_path, file=False, recursive=True)
+                result = self.create_file_or_dir(destination_components, file=False, recursive=True)
                 if not result:
                     return False
             if first_run:
                 # On the first run, create a new directory at the destination
-                copy_dir_name = self.path_handler.split_path(source_path)[1]
-                new_des_copy_path = f"{destination_path}/{copy_dir_name}" if destination_path != "/" \
-                    else f"/{copy_dir_name}"
-                new_des_copy_node = self.create_file_or_dir(new_des_copy_path, file=False)
+                new_des_copy_components = destination_components + (source_dir_node.name,)
+                self.create_file_or_dir(new_des_copy_components, file=False)
             else:
-                new_des_copy_path = destination_path
+                new_des_copy_components = destination_components
             # Copy files and directories recursively from the source to the destination if recursive is True
-            for child in source_dir_node.children:
-                child_source_node = source_dir_node.get_child_by_name(child.name)
-                child_source_path = f"{source_path}/{child.name}" if source_path != "/" \
-                                    else f"/{child.name}"
-                new_destination_path = f"{new_des_copy_path}/{child.name}" if destination_path != "/" \
-                                       else f"/{child.name}"
-                if child_source_node.is_file:
-                    result = self.copy_file_or_dir(child_source_path, new_destination_path, recursive=True)
+            for child in list(source_dir_node.children):
+                child_source_components = source_components + (child.name,)
+                new_destination_components = new_des_copy_components + (child.name,)
+                if child.is_file:
+                    result = self.copy_file_or_dir(child_source_components, new_destination_components,
+                                                   recursive=True)
                 else:
                     if not recursive:
-                        result = self.create_file_or_dir(new_destination_path, file=False)
+                        result = self.create_file_or_dir(new_destination_components, file=False)
                     else:
-                        result = self.copy_file_or_dir(child_source_path, new_destination_path, recursive=True,
-                                                       first_run=False)
+                        result = self.copy_file_or_dir(child_source_components, new_destination_components,
+                                                       recursive=True, first_run=False)
 
                 if not result:
                     return False
             return True
 
-    def move_file_or_dir(self, source_path: str, destination_path: str, recursive: bool = False) -> bool:
+    def move_file_or_dir(self, source_path: Union[str, PathComponents], destination_path: Union[str, PathComponents],
+                         recursive: bool = False) -> bool:
         # Move a file or directory from the source path to the destination path.
-        source_dir_node = self.path_handler.get_node_by_path(source_path, show_errors=True)
+        if self.path_handler.is_pattern(source_path):
+            # Move all the matches into the destination directory
+            matches = self.expand_paths(source_path, top_level_only=True)
+            destination_components = self.get_destination_directory(destination_path) if matches else None
+            return destination_components is not None and all(
+                [self.move_file_or_dir(path_components, destination_components, recursive=recursive)
+                 for path_components in matches])
+        source_components = self.path_handler.normalize_path(source_path)
+        destination_components = self.path_handler.normalize_path(destination_path)
+        source_dir_node = self.path_handler.get_node_by_path(source_components, show_errors=True)
         if not source_dir_node:
             # The source path does not exist, cannot move
-            print(ErrorMessages.InvalidPath.value + source_path)
+            print(ErrorMessages.InvalidPath.value + self.path_handler.to_path(source_components))
+            return False
+        if source_dir_node is self.root or \
+                destination_components[:len(source_components)] == source_components:
+            # A node cannot be moved into itself or one of its subdirectories (existing or not), checked before the
+            # destination is created
+            print(f"{ErrorMessages.InvalidPath.value}{self.path_handler.to_path(destination_components)} "
+                  f"the destination is inside the source")
             return False
+        destination_node = self.path_handler.get_node_by_path(destination_components, show_errors=False)
+        old_parent_node = source_dir_node.parent_node
         if source_dir_node.is_file:
             # If the source is a file, handle moving it
-            old_parent_node = self.path_handler.get_node_by_path(self.path_handler.split_path(source_path)[0])
-            destination_node = self.path_handler.get_node_by_path(destination_path, show_errors=False)
             if isinstance(destination_node, TreeNode) and destination_node.is_file:
                 # If the destination is an existing file, overwrite it with the content of the source file
                 # and delete the source file
-                self.write_to_file(destination_node, content=self.read_file(source_dir_node, print_text=False),
-                                   append=False)
-                return self.delete_file_or_dir(source_path)
+                if not self.share_file_content(source_dir_node, destination_node):
+                    return False
+                return self.delete_file_or_dir(source_components)
             else:
                 # If the destination is an existing directory or a new directory
                 if not isinstance(destination_node, TreeNode):
                     # If the destination directory does not exist, create it
-                    self.create_file_or_dir(destination_path, file=False, recursive=True)
+                    self.create_file_or_dir(destination_components, file=False, recursive=True)
                 # Get the new parent node for the source node (the destination directory)
-                new_parent_node = self.path_handler.get_node_by_path(destination_path)
+                new_parent_node = self.path_handler.get_node_by_path(destination_components)
+                existing_node = new_parent_node.get_child_by_name(source_dir_node.name)
+                if existing_node is not None and existing_node is not source_dir_node:
+                    print(f"{source_dir_node.name}{ErrorMessages.ExistsError.value}")
+                    return False
                 # Move the source node to the destination
+                self.path_handler.invalidate(source_dir_node)
+                old_parent_node.remove_child(source_dir_node.name)
                 new_parent_node.add_child(source_dir_node)
                 source_dir_node.parent_node = new_parent_node
-                old_parent_node.remove_child(source_dir_node.name)
                 # Update the last modified time and sizes of the affected nodes
                 last_modified_time = time.time()
-                self.update_parents(node_to_start_to_update=old_parent_node, last_modification_time=last_modified_time,
-                                    delta_size=-source_dir_node.size if source_dir_node.size != 0 else 0)
-                self.update_parents(node_to_start_to_update=new_parent_node, last_modification_time=last_modified_time,
-                                    delta_size=source_dir_node.size if source_dir_node.size != 0 else 0)
+                self.update_parents(node_to_start_to_update=old_parent_node, last_modification_time=last_modified_time)
+                self.update_parents(node_to_start_to_update=new_parent_node, last_modification_time=last_modified_time)
                 return True
 
         else:  # if the source is a directory
-            destination_node = self.path_handler.get_node_by_path(destination_path, show_errors=False)
             if isinstance(destination_node, TreeNode):
                 if destination_node.is_file:
-                    print(f"{ErrorMessages.InvalidPath.value}{destination_path} "
+                    print(f"{ErrorMessages.InvalidPath.value}{self.path_handler.to_path(destination_components)} "
                           f"the destination path should a directory format")
                     return False
 
             else:
                 # if the destination directory does not exist, create it
-                self.create_file_or_dir(destination_path, file=False, recursive=True)
-                destination_node = self.path_handler.get_node_by_path(destination_path, show_errors=False)
-            source_parent_path, source_dir_name = self.path_handler.split_path(source_path)
+                self.create_file_or_dir(destination_components, file=False, recursive=True)
+                destination_node = self.path_handler.get_node_by_path(destination_components, show_errors=False)
+            source_dir_name = source_dir_node.name
             if recursive:
                 # Handle recursive move
-                old_parent_node = self.path_handler.get_node_by_path(source_parent_path)
-                dir_to_move = old_parent_node.get_child_by_name(source_dir_name)
+                existing_node = destination_node.get_child_by_name(source_dir_name)
+                if existing_node is not None and existing_node is not source_dir_node:
+                    print(f"{source_dir_name}{ErrorMessages.ExistsError.value}")
+                    return False
                 # Add the directory to the destination
-                destination_node.add_child(dir_to_move)
+                self.path_handler.invalidate(source_dir_node)
                 old_parent_node.remove_child(source_dir_name)
-                dir_to_move.parent_node = destination_node
+                destination_node.add_child(source_dir_node)
+                source_dir_node.parent_node = destination_node
                 # Update last modified time and sizes for affected nodes
                 last_modified_time = time.time()
-                self.update_parents(node_to_start_to_update=old_parent_node, last_modification_time=last_modified_time,
-                                    delta_size=-dir_to_move.size if dir_to_move.size != 0 else 0)
-                self.update_parents(node_to_start_to_update=destination_node, last_modification_time=last_modified_time,
-                                    delta_size=dir_to_move.size if dir_to_move.size != 0 else 0)
+                self.update_parents(node_to_start_to_update=old_parent_node, last_modification_time=last_modified_time)
+                self.update_parents(node_to_start_to_update=destination_node, last_modification_time=last_modified_time)
             else:
                 # Handle non-recursive move
                 # Create a new directory in the destination with the same name as the source directory
-                self.create_file_or_dir(name=f"{destination_path}/{source_dir_name}", file=False)
+                self.create_file_or_dir(destination_components + (source_dir_name,), file=False)
             return True
 
-    def display_directory_content(self, name: str, recursive: bool = False, indent: int = 0) -> bool:
+    def display_directory_content(self, name: Union[str, PathComponents], recursive: bool = False, indent: int = 0,
+                                  prefix: str = "", limit: str = "", after: str = "") -> bool:
         # Display the content of a directory
-        if name == ".":
-            # If the name is ".", it represents the current directory.
-            dir_node = self.path_handler.get_node_by_path(self.path_handler.current_directory)
-            name = self.path_handler.current_directory
-        else:
-            # Get the directory node by the specified name/path.
-            dir_node = self.path_handler.get_node_by_path(name, show_errors=True)
+        if self.path_handler.is_pattern(name):
+            # Display the matching files, and the content of the matching directories
+            matches = self.expand_paths(name)
+            for path_components in matches:
+                if self.path_handler.get_node_by_path(path_components).is_file:
+                    print(f"{'    ' * indent}├── {self.path_handler.to_path(path_components)}")
+                elif not self.display_directory_content(path_components, recursive, indent, prefix, limit, after):
+                    return False
+            return bool(matches)
+        path_components = self.path_handler.normalize_path(name)
+        # Get the directory node by the specified name/path ("." is the current directory)
+        dir_node = self.path_handler.get_node_by_path(path_components, show_errors=True)
+        name = self.path_handler.to_path(path_components)
         if not dir_node:
             # If the directory node doesn't exist, return False.
             return False
@@ -720,21 +1477,47 @@ class FileSystemManager:
             # If it's a file, print an error message and return False.
             print(f"{ErrorMessages.InvalidPath.value}{name} the path should a directory and not a file")
             return False
+        elif limit and (not self.is_positive_or_zero_integer(limit) or int(limit) == 0):
+            print(ErrorMessages.InvalidLimitError.value)
+            return False
         else:
             print(f"{'    ' * indent}└── {dir_node.name}")
-            for child in dir_node.children:
+            has_more = False
+            if prefix or limit or after:
+                # Page through the entries sorted by name, starting after the cursor
+                children = dir_node.iter_sorted_children(prefix, after or None)
+                if limit:
+                    # Read one more entry to know if the listing continues
+                    children = list(islice(children, int(limit) + 1))
+                    has_more = len(children) > int(limit)
+                    children = children[:int(limit)]
+            else:
+                children = dir_node.children
+            for child in children:
                 if recursive and not child.is_file:
                     # If recursive is True and the child is a directory, recursively display its content.
-                    self.display_directory_content(f"{name}/{child.name}", recursive=True, indent=indent + 1)
+                    self.display_directory_content(path_components + (child.name,), recursive=True,
+                                                   indent=indent + 1)
                 else:
                     if child.is_file:
                         print(f"{'    ' * (indent + 1)}├── {child.name}")
                     else:
                         print(f"{'    ' * (indent + 1)}└── {child.name}")
+            if has_more:
+                cursor = shlex.quote(children[-1].name)
+                print(f"{'    ' * (indent + 1)}... more entries, continue with --after {cursor}")
             return True
 
     def get_size(self, name: str) -> bool:
         # Get the size of in bytes
+        self.flush_write_back()
+        if self.path_handler.is_pattern(name):
+            # Print the size of each match
+            matches = self.expand_paths(name)
+            for path_components in matches:
+                print(f"{self.path_handler.to_path(path_components)}: "
+                      f"{self.path_handler.get_node_by_path(path_components).size}")
+            return bool(matches)
         node = self.path_handler.get_node_by_path(name, show_errors=True)
         if not node:  # Check if the node exists
             return False
@@ -752,6 +1535,7 @@ class FileSystemManager:
 
     def get_last_modified_time(self, name: str) -> bool:
         # Get the last modification time
+        self.flush_write_back()
         node = self.path_handler.get_node_by_path(name, show_errors=True)
         if not node:  # Check if node exists
             return False
@@ -774,14 +1558,7 @@ class FileSystemManager:
             print(f"{ErrorMessages.InvalidPath.value}{name}"
                   f" The new current directory should be a path, not a file")
             return False
-        elif self.path_handler.is_absolute_path(name):
-            self.path_handler.change_current_dir(name)
-        else:
-            if self.path_handler.current_directory != "/":
-                self.path_handler.change_current_dir(f"{self.path_handler.current_directory}/{name}")
-            else:
-                self.path_handler.change_current_dir(f"/{name}")
-        return True
+        return self.path_handler.change_current_dir(exist_dir)
 
     def go_to_previous_dir(self) -> bool:
         # Change the current working directory to the previous directory
@@ -824,6 +1601,7 @@ class FileSystemManager:
         if all(param in [None, ""] for param in (search_name, search_content, file_extension, min_size, max_size)):
             print(ErrorMessages.NoSearchCriteriaError.value)
             return False
+        self.flush_write_back()  # The sizes of the files are compared, commit the pending appends
         # Check and validate min_size and max_size
         if min_size:
             if not self.is_positive_or_zero_integer(min_size):
@@ -841,8 +1619,7 @@ class FileSystemManager:
                     and (not min_size or current_node.size >= int(min_size))
                     and (not max_size or current_node.size <= int(max_size))
                     and (not search_name or search_name.lower() in current_node.name.lower())
-                    and (not search_content or search_content.lower() in self.read_file(current_node,
-                                                                                        print_text=False).lower())
+                    and (not search_content or self.file_contains_text(current_node, search_content))
             ):
                 file_results.append(current_node_path)
             elif not current_node.is_file and (search_name and search_name.lower() in current_node.name.lower()):
@@ -859,21 +1636,52 @@ class FileSystemManager:
         search_node = self.path_handler.get_node_by_path(start_path, show_errors=True)
         if not search_node:
             return False
-        dfs_search(search_node, start_path)
+        if self.use_node_table:
+            file_results, directory_results = self.search_node_table(search_node, start_path, search_name,
+                                                                     search_content, file_extension, min_size,
+                                                                     max_size)
+        else:
+            dfs_search(search_node, start_path)
         self.output_search(file_results, directory_results)
         return True
 
+    def get_node_table(self) -> NodeTable:
+        # Return the columnar snapshot of the tree, built again if the tree changed since the last one
+        if self.node_table is None:
+            self.node_table = NodeTable(self.root)
+        return self.node_table
+
+    def search_node_table(self, search_node: TreeNode, start_path: str, search_name: str = None,
+                          search_content: str = None, file_extension: str = None, min_size: str = None,
+                          max_size: str = None) -> Tuple[List[str], List[str]]:
+        # Search with vectorized filters over the node table, only the content is checked file by file
+        node_table = self.get_node_table()
+        start_index = node_table.index_of(search_node)
+        file_rows = node_table.select(start_index, is_file=True,
+                                      min_size=int(min_size) if min_size else None,
+                                      max_size=int(max_size) if max_size else None,
+                                      name_contains=search_name, name_suffix=file_extension)
+        file_results = [node_table.path(row, start_index, start_path) for row in file_rows
+                        if not search_content or self.file_contains_text(node_table.nodes[row], search_content)]
+        directory_results = []
+        if search_name:
+            directory_rows = node_table.select(start_index, is_file=False, name_contains=search_name)
+            directory_results = [node_table.path(row, start_index, start_path) for row in directory_rows]
+        return file_results, directory_results
+
     def recursive_tree_to_dict(self, node: TreeNode) -> dict:
         # Convert the TreeNode hierarchy to a dictionary
         node_dict = {
             "name": node.name,
             "is_file": node.is_file,
             "last_modified": node.last_modified,
-            "creation_time": node.last_modified,
+            "creation_time": node.creation_time,
             "size": node.size
         }
         if node.is_file:
-            node_dict["file_memory_allocations"] = node.file_memory_allocations
+            node_dict["file_memory_allocations"] = node.file_memory_allocations.to_list()
+            if node.compressed:
+                node_dict["compressed"] = True
         else:
             node_dict["children"] = [self.recursive_tree_to_dict(child) for child in node.children]
         return node_dict
@@ -883,19 +1691,25 @@ class FileSystemManager:
         tree_dict = {
             "metadata": {"buffer_size": self.buffer_size,
                          "next_available_end_buffer_index": self.next_available_end_buffer_index,
-                         "allocation_available": self.allocation_available},
+                         "allocation_available": self.free_space.to_list(),
+                         "extent_hashes": self.extent_hashes},
             "root": self.recursive_tree_to_dict(node)
         }
         return tree_dict
 
     def create_backup(self) -> bool:
+        self.flush_write_back()
         filesystem_dict = self.tree_to_dict(self.root)
         # Serialize the dictionary to JSON and save it to a file
         try:
             with open(JSON_FILE, "w") as json_file:
                 json.dump(filesystem_dict, json_file, indent=4)
-            # Save the NumPy array to a file
-            np.save(NUMPY_FILE, self.memory_buffer)
+            if self.memory_map_file:
+                # The content is already in the memory-mapped file, only write the changed segments
+                self.flush_memory_buffer()
+            else:
+                # Save the NumPy array to a file
+                np.save(NUMPY_FILE, self.memory_buffer.to_array())
             return True
         except Exception as e:
             print(f"Backup creation failed: {e}")
@@ -912,11 +1726,11 @@ class FileSystemManager:
         node.creation_time = node_dict.get("creation_time")
         node.size = node_dict.get("size")
         if node_dict["is_file"]:
-            node.file_memory_allocations = node_dict.get("file_memory_allocations")
+            node.file_memory_allocations = ExtentMap(node_dict.get("file_memory_allocations"))
+            node.compressed = node_dict.get("compressed", False)
         else:
-            node.children = [self.recursive_dict_to_tree(child_dict, node) for child_dict in node_dict.get("children", [])]
-            for child_node in node.children:
-                child_node.parent_node = node
+            for child_dict in node_dict.get("children", []):
+                node.add_child(self.recursive_dict_to_tree(child_dict, node))
         return node
 
     def dict_to_tree(self, tree_dict: Dict):
@@ -927,15 +1741,26 @@ class FileSystemManager:
         metadata_dict = tree_dict["metadata"]
         self.buffer_size = metadata_dict["buffer_size"]
         self.next_available_end_buffer_index = metadata_dict["next_available_end_buffer_index"]
-        self.allocation_available = metadata_dict["allocation_available"]
+        # Older backups may hold unmerged free blocks, the index merges them while loading
+        self.free_space = FreeSpaceIndex(metadata_dict["allocation_available"])
+        # JSON keys are strings, the extents are indexed by their integer start index
+        self.extent_hashes = {int(start_index): content_hash
+                              for start_index, content_hash in metadata_dict.get("extent_hashes", {}).items()}
+        self.shrink_buffer_tail()
         self.recursive_dict_to_tree(root_dict)
+        self.path_handler = PathHandler(self.root)  # The cached paths and working directories belong to the old tree
+        self.rebuild_extent_refcounts()
 
     def restore_backup(self):
+        if self.memory_map_file:
+            # Map the existing content file lazily instead of loading it
+            self.memory_buffer = self.create_memory_buffer(self.mem_size)
+        else:
+            # Load the NumPy array from the file into a segmented memory buffer
+            self.memory_buffer = MemoryArena.from_array(np.load(NUMPY_FILE), self.segment_size)
         # Load the JSON data from the file
         with open(JSON_FILE, "r") as json_file:
             filesystem_dict = json.load(json_file)
         # Create the root node and other nodes from the loaded data and the metadata
         self.dict_to_tree(filesystem_dict)
-
-        # Load the NumPy array from the file
-        self.memory_buffer = np.load(NUMPY_FILE)
+        self.buffer_size = self.memory_buffer.size
@@ -0,0 +1,100 @@
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, Iterator, List, Optional, Tuple
+
+"""
+FreeSpaceIndex keeps track of the free ranges of the memory buffer.
+Free ranges are kept sorted both by address and by size: neighbouring ranges are merged when memory is released,
+and allocations are served by a best-fit lookup in O(log n).
+"""
+
+
+class FreeSpaceIndex:
+    def __init__(self, free_ranges: Optional[List[List[int]]] = None):
+        self.starts: List[int] = []  # Sorted start indexes of the free ranges
+        self.ends: Dict[int, int] = {}  # Map the start index of each free range to its end index
+        self.sizes: List[Tuple[int, int]] = []  # Sorted (size, start index) pairs, used for best-fit lookups
+        self.free_size = 0  # Total number of free bytes
+        for start_index, end_index in free_ranges or []:
+            self.add(start_index, end_index)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __iter__(self) -> Iterator[List[int]]:
+        # Iterate over the free ranges ordered by address
+        for start_index in self.starts:
+            yield [start_index, self.ends[start_index]]
+
+    def _insert(self, start_index: int, end_index: int) -> None:
+        # Insert a free range that does not overlap or touch any other free range
+        insort(self.starts, start_index)
+        self.ends[start_index] = end_index
+        insort(self.sizes, (end_index - start_index, start_index))
+        self.free_size += end_index - start_index
+
+    def _remove(self, start_index: int) -> int:
+        # Remove the free range starting at start_index and return its end index
+        end_index = self.ends.pop(start_index)
+        del self.starts[bisect_left(self.starts, start_index)]
+        del self.sizes[bisect_left(self.sizes, (end_index - start_index, start_index))]
+        self.free_size -= end_index - start_index
+        return end_index
+
+    def add(self, start_index: int, end_index: int) -> None:
+        # Mark a range as free, merging it with the free ranges right before and after it
+        if start_index >= end_index:
+            return
+        position = bisect_left(self.starts, start_index)
+        if position > 0:
+            previous_start = self.starts[position - 1]
+            if self.ends[previous_start] == start_index:
+                self._remove(previous_start)
+                start_index = previous_start
+        if end_index in self.ends:
+            end_index = self._remove(end_index)
+        self._insert(start_index, end_index)
+
+    def take_best_fit(self, size: int) -> Optional[int]:
+        # Take `size` bytes from the smallest free range that is big enough and return its start index
+        position = bisect_left(self.sizes, (size, -1))
+        if position == len(self.sizes):
+            return None
+        _, start_index = self.sizes[position]
+        end_index = self._remove(start_index)
+        if end_index - start_index > size:
+            self._insert(start_index + size, end_index)
+        return start_index
+
+    def take_at(self, start_index: int, size: int) -> bool:
+        # Take `size` bytes starting exactly at start_index, if that memory is free
+        end_index = self.ends.get(start_index)
+        if end_index is None or end_index - start_index < size:
+            return False
+        self._remove(start_index)
+        if end_index - start_index > size:
+            self._insert(start_index + size, end_index)
+        return True
+
+    def pop_range_ending_at(self, end_index: int) -> Optional[int]:
+        # Remove the free range that ends at end_index (if any) and return its start index
+        position = bisect_left(self.starts, end_index) - 1
+        if position >= 0 and self.ends[self.starts[position]] == end_index:
+            start_index = self.starts[position]
+            self._remove(start_index)
+            return start_index
+        return None
+
+    def first(self) -> Optional[List[int]]:
+        # Return the free range with the lowest address
+        if not self.starts:
+            return None
+        return [self.starts[0], self.ends[self.starts[0]]]
+
+    def contains(self, start_index: int, end_index: int) -> bool:
+        # Check if the whole range is free
+        position = bisect_right(self.starts, start_index) - 1
+        return position >= 0 and self.ends[self.starts[position]] >= end_index
+
+    def to_list(self) -> List[List[int]]:
+        # Serialize the free ranges as a list of [start index, end index] pairs
+        return list(self)
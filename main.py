@@ -1,16 +1,33 @@
+import argparse
 import signal
 import sys
-from typing import List
+from typing import List, Optional
 from file_system_manager import FileSystemManager
 from parser_command import Parser
 
 is_running: bool = True  # Initialize a flag to control whether the program is running
+terminate_requested: bool = False  # Set by SIGTERM: the program exits without asking about a backup
+waiting_for_input: bool = False  # True while the main loop waits for a command, no command is running then
 STOP_EXECUTION_SIGNALS: List = [signal.SIGINT, signal.SIGTERM]  # Define a list of signals that can stop the program
 
 
+class StopExecution(Exception):
+    # Raised by the signal handler to leave the prompt while it waits for a command
+    pass
+
+
 def exit_type_signal_handler(signum, frame):
-    global is_running
+    """
+    The handler may run in the middle of a command, while the allocator and the extent maps are partly updated, so
+    it only records the request: the main loop stops after the current command returns, and the write-back buffers
+    are flushed there. When the loop is waiting for input, nothing is being modified and the prompt is left at once.
+    """
+    global is_running, terminate_requested
     is_running = False
+    if signum == signal.SIGTERM:
+        terminate_requested = True
+    if waiting_for_input:
+        raise StopExecution()
 
 
 # Register the signal handler for each signal in STOP_EXECUTION_SIGNALS
@@ -18,19 +35,27 @@ for sig in STOP_EXECUTION_SIGNALS:
     signal.signal(sig, exit_type_signal_handler)
 
 
-def main():
+def main(memory_map_file: Optional[str] = None, write_back_size: int = 0, dedup: bool = False,
+         compress_after: Optional[float] = None):
+    global waiting_for_input
     # Create instances of FileSystemManager and Parser
-    file_system_manager = FileSystemManager()
+    file_system_manager = FileSystemManager(memory_map_file=memory_map_file, write_back_size=write_back_size,
+                                            dedup=dedup, compress_after=compress_after)
     parser = Parser()
 
     while is_running:
         current_dir = file_system_manager.show_current_directory()
         try:
             # Get user input through the parser and retrieve command arguments and the command name
+            waiting_for_input = True
             command_args, command_name = parser.get_input(current_dir)
         except EOFError:
             print(f"did not receive user command...", file=sys.stderr)
             continue
+        except StopExecution:
+            break
+        finally:
+            waiting_for_input = False
         if command_args is None:
             continue
         if command_name == "quit":
@@ -56,7 +81,17 @@ def main():
                       f" to {command_args['destination_path']}")
             else:
                 print(f"{file_system_manager.get_failure_message_from_name(command_name)}")
+        # Use the time between commands to commit delayed appends and defragment the memory buffer
+        file_system_manager.maintain_memory_buffer()
 
+    # Commit the appends still waiting in the write-back buffers
+    file_system_manager.flush_write_back()
+    if terminate_requested:
+        # Terminated by SIGTERM, there is nobody to answer the backup prompt. A memory-mapped buffer is written to
+        # disk together with the metadata (the same as a backup), so the next start finds them consistent
+        if file_system_manager.memory_map_file:
+            file_system_manager.create_backup()
+        return
     # This block will always execute, ensuring create_backup is called
     while True:
         result = input("Create backup? (y/n) ").strip().lower()
@@ -68,4 +103,17 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    arguments_parser = argparse.ArgumentParser(description="File System")
+    arguments_parser.add_argument("--memory_map_file",
+                                  help="(optional): Store the content of the files in a memory-mapped file.")
+    arguments_parser.add_argument("--write_back_size", type=int, default=0,
+                                  help="(optional): Collect appends smaller than this number of bytes in memory and "
+                                       "commit them in batches.")
+    arguments_parser.add_argument("--dedup", action="store_true",
+                                  help="(optional): Store identical content once, shared by the files holding it.")
+    arguments_parser.add_argument("--compress_after", type=float, default=None,
+                                  help="(optional): Compress the files that were not accessed for this number of "
+                                       "minutes.")
+    arguments = arguments_parser.parse_args()
+    compress_after = arguments.compress_after * 60 if arguments.compress_after is not None else None
+    main(arguments.memory_map_file, arguments.write_back_size, arguments.dedup, compress_after)
@@ -0,0 +1,179 @@
+import os
+import numpy as np
+from typing import Iterator, List, Set, Tuple, Union
+
+SEGMENT_SIZE = 256 * 1024
+
+"""
+MemoryArena stores the content of the files in fixed-size NumPy segments.
+An address in the arena is mapped to a (segment, offset) pair, so growing the arena only adds segments and never
+copies the existing content, and trailing segments can be dropped again when they are no longer used.
+Slicing the arena works like slicing a flat NumPy array.
+"""
+
+
+class MemoryArena:
+    def __init__(self, size: int, segment_size: int = SEGMENT_SIZE):
+        self.segment_size = segment_size
+        self.segments: List[np.ndarray] = []  # List of the fixed-size segments
+        self.grow(size)
+
+    @property
+    def size(self) -> int:
+        # The total size of the arena in bytes
+        return len(self.segments) * self.segment_size
+
+    def __len__(self) -> int:
+        return self.size
+
+    def new_segment(self) -> np.ndarray:
+        # Create a new zeroed segment
+        return np.zeros(dtype=np.int8, shape=(self.segment_size,))
+
+    def grow(self, size: int) -> None:
+        # Add segments until the arena holds at least `size` bytes
+        while self.size < size:
+            self.segments.append(self.new_segment())
+
+    def shrink(self, size: int) -> None:
+        # Drop the trailing segments that are not needed to hold `size` bytes
+        segments_count = max(1, -(-size // self.segment_size))
+        del self.segments[segments_count:]
+
+    def locate(self, index: int) -> Tuple[int, int]:
+        # Map an address of the arena to a (segment, offset) pair
+        return divmod(index, self.segment_size)
+
+    def _slice_bounds(self, key: slice) -> Tuple[int, int]:
+        # Convert a slice to (start, end) indexes, clipped to the arena size like NumPy slicing
+        if not isinstance(key, slice) or key.step not in (None, 1):
+            raise TypeError("MemoryArena only supports contiguous slices")
+        start_index, end_index, _ = key.indices(self.size)
+        return start_index, max(start_index, end_index)
+
+    def iter_ranges(self, start_index: int, end_index: int) -> Iterator[Tuple[np.ndarray, int, int, int]]:
+        # Split a range of addresses into (segment, segment start, segment end, position in the range) parts
+        position = 0
+        while start_index < end_index:
+            segment_index, offset = self.locate(start_index)
+            length = min(self.segment_size - offset, end_index - start_index)
+            yield self.segments[segment_index], offset, offset + length, position
+            start_index += length
+            position += length
+
+    def __getitem__(self, key: slice) -> np.ndarray:
+        # Return the content of a range, a view when the range is inside a single segment
+        start_index, end_index = self._slice_bounds(key)
+        parts = [segment[segment_start:segment_end]
+                 for segment, segment_start, segment_end, _ in self.iter_ranges(start_index, end_index)]
+        if len(parts) == 1:
+            return parts[0]
+        if not parts:
+            return np.empty(dtype=np.int8, shape=(0,))
+        return np.concatenate(parts)
+
+    def __setitem__(self, key: slice, value: Union[int, bytes, bytearray, np.ndarray]) -> None:
+        # Write a value (a scalar or a sequence of bytes) into a range
+        start_index, end_index = self._slice_bounds(key)
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            value = np.frombuffer(value, dtype=np.int8)
+        for segment, segment_start, segment_end, position in self.iter_ranges(start_index, end_index):
+            if np.isscalar(value):
+                segment[segment_start:segment_end] = value
+            else:
+                segment[segment_start:segment_end] = value[position:position + segment_end - segment_start]
+
+    def gather(self, ranges: List[Tuple[int, int]]) -> memoryview:
+        """
+        Return the content of several (start index, length) ranges, concatenated, as a memoryview of bytes.
+        A single range inside one segment is returned without copying, otherwise the parts are copied into one
+        array with a slice assignment per part.
+        """
+        parts = [segment[segment_start:segment_end]
+                 for start_index, length in ranges
+                 for segment, segment_start, segment_end, _ in self.iter_ranges(start_index, start_index + length)]
+        if len(parts) == 1:
+            return memoryview(parts[0]).cast("B")
+        content = np.empty(dtype=np.int8, shape=(sum(len(part) for part in parts),))
+        position = 0
+        for part in parts:
+            content[position:position + len(part)] = part
+            position += len(part)
+        return memoryview(content).cast("B")
+
+    def move(self, source_index: int, destination_index: int, length: int) -> None:
+        # Copy `length` bytes inside the arena, the source and destination ranges may overlap
+        if length <= 0:
+            return
+        source = self[source_index:source_index + length]
+        touched_segments = {self.locate(index)[0] for index in (source_index, source_index + length - 1,
+                                                                 destination_index, destination_index + length - 1)}
+        if len(touched_segments) > 1:
+            # The ranges span several segments, copy the source before it can be overwritten
+            source = source.copy()
+        self[destination_index:destination_index + length] = source
+
+    def flush(self) -> None:
+        # The segments live in RAM, there is nothing to write to disk
+        pass
+
+    def to_array(self) -> np.ndarray:
+        # Return the content of the whole arena as one flat array
+        return np.concatenate(self.segments)
+
+    @classmethod
+    def from_array(cls, array: np.ndarray, segment_size: int = SEGMENT_SIZE) -> "MemoryArena":
+        # Create an arena holding the content of a flat array
+        arena = cls(len(array), segment_size)
+        arena[0:len(array)] = array
+        return arena
+
+
+"""
+MemoryMappedArena is a MemoryArena whose segments are np.memmap views over a file on disk.
+An existing file is mapped lazily (nothing is read until it is accessed), and the arena can be larger than the
+available RAM. The segments are mapped copy-on-write: changes stay in private pages until flush() writes the changed
+segments to the file, so the file always holds the content of the last flush (done by a backup, together with the
+metadata) and a session that ends without a backup leaves it untouched.
+"""
+
+
+class MemoryMappedArena(MemoryArena):
+    def __init__(self, path: str, size: int, segment_size: int = SEGMENT_SIZE):
+        self.path = path
+        self.dirty_segments: Set[int] = set()  # Indexes of the segments changed since the last flush
+        if not os.path.exists(path):
+            open(path, "wb").close()
+        # Map at least the content that already exists in the file
+        super().__init__(max(size, os.path.getsize(path)), segment_size)
+
+    def new_segment(self) -> np.ndarray:
+        # Map the next segment of the file, extending the file when needed (the new bytes read as zeros)
+        offset = len(self.segments) * self.segment_size
+        if os.path.getsize(self.path) < offset + self.segment_size:
+            with open(self.path, "r+b") as file:
+                file.truncate(offset + self.segment_size)
+        return np.memmap(self.path, dtype=np.int8, mode="c", offset=offset, shape=(self.segment_size,))
+
+    def __setitem__(self, key: slice, value: Union[int, bytes, bytearray, np.ndarray]) -> None:
+        # Record the segments changed by the write, they are written to the file by the next flush
+        start_index, end_index = self._slice_bounds(key)
+        if start_index < end_index:
+            self.dirty_segments.update(range(self.locate(start_index)[0], self.locate(end_index - 1)[0] + 1))
+        super().__setitem__(key, value)
+
+    def shrink(self, size: int) -> None:
+        # The dropped segments hold no used content, their changes are discarded (the file keeps its size)
+        super().shrink(size)
+        self.dirty_segments = {segment_index for segment_index in self.dirty_segments
+                               if segment_index < len(self.segments)}
+
+    def flush(self) -> None:
+        # Write the changed segments to the file (the private pages of a copy-on-write mapping are never written back)
+        if not self.dirty_segments:
+            return
+        with open(self.path, "r+b") as file:
+            for segment_index in sorted(self.dirty_segments):
+                file.seek(segment_index * self.segment_size)
+                file.write(memoryview(self.segments[segment_index]).cast("B"))
+        self.dirty_segments.clear()
@@ -0,0 +1,87 @@
+import numpy as np
+from typing import Dict, List, Optional
+from tree_node import TreeNode
+
+IS_FILE = 1  # Flag of the file nodes in the flags column
+
+"""
+NodeTable is a columnar snapshot of the file system tree.
+The metadata of the nodes is stored in NumPy arrays (parent index, size, creation and modification times, flags and
+an interned name id), in depth-first order, so the nodes under a directory are a contiguous range of rows.
+Bulk metadata queries, like filtering the files of a subtree by size, name or extension, run vectorized.
+"""
+
+
+class NodeTable:
+    def __init__(self, root: TreeNode):
+        self.nodes: List[TreeNode] = []  # The nodes, in depth-first (pre-order) order
+        self.names: List[str] = []  # Interned names, each distinct name is stored once
+        name_ids: Dict[str, int] = {}
+        parents, name_column = [], []
+        nodes_to_visit = [(root, -1)]
+        while nodes_to_visit:
+            node, parent_index = nodes_to_visit.pop()
+            index = len(self.nodes)
+            self.nodes.append(node)
+            parents.append(parent_index)
+            name_column.append(name_ids.setdefault(node.name, len(name_ids)))
+            if not node.is_file:
+                # Push the children in reverse, so they are visited in their order
+                nodes_to_visit.extend((child, index) for child in reversed(node.children))
+        self.names = list(name_ids)
+        self.node_indexes: Dict[int, int] = {id(node): index for index, node in enumerate(self.nodes)}
+        self.parent = np.array(parents, dtype=np.int32)
+        self.name_id = np.array(name_column, dtype=np.int32)
+        self.size = np.array([node.size for node in self.nodes], dtype=np.int64)
+        self.creation_time = np.array([node.creation_time for node in self.nodes], dtype=np.float64)
+        self.last_modified = np.array([node.last_modified for node in self.nodes], dtype=np.float64)
+        self.flags = np.array([IS_FILE if node.is_file else 0 for node in self.nodes], dtype=np.uint8)
+        # The rows of the subtree of a node end at subtree_end (exclusive), children are counted before parents
+        subtree_sizes = np.ones(len(self.nodes), dtype=np.int32)
+        for index in range(len(self.nodes) - 1, 0, -1):
+            subtree_sizes[parents[index]] += subtree_sizes[index]
+        self.subtree_end = np.arange(len(self.nodes), dtype=np.int32) + subtree_sizes
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def index_of(self, node: TreeNode) -> Optional[int]:
+        # Return the row of a node, or None if it is not in the table
+        return self.node_indexes.get(id(node))
+
+    def names_matching(self, name_contains: Optional[str] = None, name_suffix: Optional[str] = None) -> np.ndarray:
+        # Return a boolean mask over the interned names, matched case-insensitively
+        lower_names = np.char.lower(np.array(self.names, dtype=str))
+        mask = np.ones(len(self.names), dtype=bool)
+        if name_contains:
+            mask &= np.char.find(lower_names, name_contains.lower()) >= 0
+        if name_suffix:
+            mask &= np.char.endswith(lower_names, name_suffix.lower())
+        return mask
+
+    def select(self, start_index: int = 0, is_file: Optional[bool] = None, min_size: Optional[int] = None,
+               max_size: Optional[int] = None, name_contains: Optional[str] = None,
+               name_suffix: Optional[str] = None) -> np.ndarray:
+        # Return the rows of the subtree of start_index matching all the given criteria, in depth-first order
+        rows = slice(start_index, self.subtree_end[start_index])
+        mask = np.ones(self.subtree_end[start_index] - start_index, dtype=bool)
+        if is_file is not None:
+            mask &= (self.flags[rows] & IS_FILE).astype(bool) == is_file
+        if min_size is not None:
+            mask &= self.size[rows] >= min_size
+        if max_size is not None:
+            mask &= self.size[rows] <= max_size
+        if name_contains or name_suffix:
+            mask &= self.names_matching(name_contains, name_suffix)[self.name_id[rows]]
+        return np.flatnonzero(mask) + start_index
+
+    def path(self, index: int, start_index: int = 0, start_path: str = "/") -> str:
+        # Build the path of a row, relative to the row start_index whose path is start_path
+        components = []
+        while index != start_index:
+            components.append(self.names[self.name_id[index]])
+            index = self.parent[index]
+        components.reverse()
+        if not components:
+            return start_path
+        return start_path.rstrip("/") + "/" + "/".join(components) if start_path != "/" else "/" + "/".join(components)
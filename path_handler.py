@@ -1,73 +1,232 @@
+import re
+from collections import OrderedDict
+from fnmatch import translate
 from tree_node import TreeNode
 from error_messages import ErrorMessages
-from typing import Union
+from typing import Callable, List, Optional, Tuple, Union
+
+PATH_CACHE_SIZE = 1024  # Maximum number of resolved paths kept in the cache
+WILDCARD_CHARACTERS = re.compile(r"[*?\[]")  # A path with one of these characters is a pattern
+RECURSIVE_WILDCARD = "**"  # Path component matching any number of directories (including none)
+
+# A normalized path: the names leading from the root to a node, "/" is the empty tuple
+PathComponents = Tuple[str, ...]
 
 """
 PathHandler manages file system paths.
+A path is normalized once into a tuple of components from the root: empty and "." components are dropped and ".."
+goes up to the parent directory (the parent of the root is the root). Commands pass that tuple around instead of
+splitting the path string again, and it is the key of the path cache.
+Resolved paths are kept in a bounded LRU cache (like the dentry cache of a kernel), so resolving a path that was used
+recently is a single lookup instead of a walk from the root. Only existing nodes are cached, so creating a node never
+makes an entry stale; detaching a node (delete or move) invalidates the cached paths of its whole subtree.
+The current and previous directories are node references: relative paths are resolved from the current node, and
+its printable path is built from the parent pointers when needed, so it follows the directory when it is moved.
+Paths with wildcards ("*", "?", "[...]" and "**" for any number of directories) are expanded by a walk of the tree,
+which follows literal components directly and compiles each wildcard component to a regular expression once. A path
+naming an existing node literally is never expanded, so names holding wildcard characters can still be used.
 """
 
 
 class PathHandler:
-    def __init__(self, root: TreeNode):
+    def __init__(self, root: TreeNode, cache_size: int = PATH_CACHE_SIZE):
         self.root = root
-        self.current_directory = "/"
-        self.previous_directory = None
+        self.current_node = root  # The current working directory
+        self.previous_node: Optional[TreeNode] = None  # The previous working directory
+        # Components of the current directory, None until they are built again from the parent pointers
+        self.current_components: Optional[PathComponents] = ()
+        self.cache_size = cache_size
+        self.path_cache: "OrderedDict[PathComponents, TreeNode]" = OrderedDict()  # Least recently used first
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def get_current_components(self) -> PathComponents:
+        # The components of the current working directory
+        if self.current_components is None:
+            self.current_components = self.get_node_components(self.current_node)
+        return self.current_components
+
+    @property
+    def current_directory(self) -> str:
+        # The path of the current working directory
+        return self.to_path(self.get_current_components())
+
+    @property
+    def previous_directory(self) -> Optional[str]:
+        # The path of the previous working directory
+        return self.get_node_path(self.previous_node) if self.previous_node else None
 
     def is_absolute_path(self, path: str) -> bool:
         # Check if he given path is an absolute path (starts with the root directory separator character ("/"))
         return path.startswith("/")
 
-    def split_path(self, path: str) -> tuple:
+    def normalize_path(self, path: Union[str, PathComponents]) -> PathComponents:
+        # Convert a path to its canonical components from the root, an already normalized path is returned as is
+        if isinstance(path, tuple):
+            return path
+        components = [] if self.is_absolute_path(path) else list(self.get_current_components())
+        for component in path.split("/"):
+            if component == "..":
+                if components:
+                    components.pop()
+            elif component and component != ".":
+                components.append(component)
+        return tuple(components)
+
+    def to_path(self, components: PathComponents) -> str:
+        # Convert normalized components to an absolute path
+        return "/" + "/".join(components)
+
+    def split_path(self, path: Union[str, PathComponents]) -> tuple:
         #  Split the given path into parent directory and name
-        if self.is_absolute_path(path):
-            # Check if the path is absolute
-            parent_dir_path, _, file_or_dir_name = path.rpartition("/")
-            if not parent_dir_path:  # If parent_dir_path is empty, set it to "/"
-                parent_dir_path = "/"
-        else:  # Relative path
-            current_dir = self.current_directory  # Get the current working directory name
-            path_components = path.strip("/").split("/")
-            if current_dir == "/":
-                parent_dir_path = "/" + "/".join(path_components[:-1])
-            else:
-                parent_dir_path = current_dir + "/" + "/".join(path_components[:-1])
-            file_or_dir_name = path_components[-1]
-        return parent_dir_path, file_or_dir_name
+        components = self.normalize_path(path)
+        if not components:
+            return "/", ""
+        return self.to_path(components[:-1]), components[-1]
 
-    def get_node_by_path(self, path: str, show_errors: bool = True) -> Union[TreeNode, bool]:
-        # Get the node corresponding to the given path
-        if not path:
+    def get_node_by_path(self, path: Union[str, PathComponents], show_errors: bool = True) -> Union[TreeNode, bool]:
+        # Get the node corresponding to the given path (a path string or normalized components)
+        if isinstance(path, str) and not path:
             return False
-        elif path == "/":
+        components = self.normalize_path(path)
+        if not components:
             return self.root
-        elif self.is_absolute_path(path):
+        current_node = self.path_cache.get(components)
+        if current_node is not None:
+            self.cache_hits += 1
+            self.path_cache.move_to_end(components)
+            return current_node
+        self.cache_misses += 1
+        current_components = self.get_current_components()
+        if current_components and components[:len(current_components)] == current_components:
+            # The path is under the current directory, start searching from the current node
+            current_node = self.current_node
+            start_index = len(current_components)
+        else:
             # Start searching from the root node
             current_node = self.root
-        else:
-            # Start searching from the current node
-            current_node = self.get_node_by_path(self.current_directory)   # start to search from the current node
-        path_components = path.strip("/").split("/")
-        for component in path_components:
-            next_node = current_node.get_child_by_name(component)
+            start_index = 0
+        for component in components[start_index:]:
+            next_node = current_node.get_child_by_name(component) if not current_node.is_file else None
             if not next_node:
                 if show_errors:   # show error if the node is not found.
-                    print(f"{ErrorMessages.NotFoundError.value}{path}")
+                    print(f"{ErrorMessages.NotFoundError.value}{path if isinstance(path, str) else self.to_path(path)}")
                 return False
             current_node = next_node
+        self.path_cache[components] = current_node
+        if len(self.path_cache) > self.cache_size:
+            self.path_cache.popitem(last=False)  # Evict the least recently used path
         return current_node
 
-    def change_current_dir(self, new_cur_directory: str) -> bool:
-        # change the current working directory to the specified directory
-        self.previous_directory = self.current_directory
-        self.current_directory = new_cur_directory
+    def has_wildcards(self, path: Union[str, PathComponents]) -> bool:
+        # Check if a path has wildcard characters, normalized components are always literal names
+        return isinstance(path, str) and WILDCARD_CHARACTERS.search(path) is not None
+
+    def is_pattern(self, path: Union[str, PathComponents]) -> bool:
+        # Check if a path has to be expanded: it has wildcards and no node has that literal name (like "report[1]")
+        return self.has_wildcards(path) and not self.get_node_by_path(path, show_errors=False)
+
+    def expand_pattern(self, pattern: str) -> List[PathComponents]:
+        """
+        Return the components of the nodes matching a path with wildcards, sorted: a directory comes right before
+        the nodes under it, and the children of a directory are sorted by name.
+        """
+        matchers: List[Union[str, Callable]] = []
+        for component in self.normalize_path(pattern):
+            if component == RECURSIVE_WILDCARD or not WILDCARD_CHARACTERS.search(component):
+                matchers.append(component)
+            else:
+                matchers.append(re.compile(translate(component)).match)
+        matches = set()  # "**" can reach the same node in several ways
+        nodes_to_visit = [(self.root, (), 0)]
+        while nodes_to_visit:
+            node, components, matcher_index = nodes_to_visit.pop()
+            if matcher_index == len(matchers):
+                matches.add(components)
+                continue
+            if node.is_file:
+                continue
+            matcher = matchers[matcher_index]
+            if matcher == RECURSIVE_WILDCARD:
+                # Descend into every subdirectory keeping "**", after matching it with no directory at all
+                nodes_to_visit.extend((child, components + (child.name,), matcher_index)
+                                      for child in node.children if not child.is_file)
+                nodes_to_visit.append((node, components, matcher_index + 1))
+            elif isinstance(matcher, str):
+                # Literal component, a single lookup
+                child = node.get_child_by_name(matcher)
+                if child:
+                    nodes_to_visit.append((child, components + (matcher,), matcher_index + 1))
+            else:
+                nodes_to_visit.extend((child, components + (child.name,), matcher_index + 1)
+                                      for child in node.children if matcher(child.name))
+        return sorted(matches)
+
+    def get_node_components(self, node: TreeNode) -> PathComponents:
+        # Build the components of a node from its ancestors
+        names = []
+        while node.parent_node is not None:
+            names.append(node.name)
+            node = node.parent_node
+        return tuple(reversed(names))
+
+    def get_node_path(self, node: TreeNode) -> str:
+        # Build the absolute path of a node from its ancestors
+        return self.to_path(self.get_node_components(node))
+
+    def invalidate(self, node: TreeNode) -> None:
+        # Drop the cached paths of a node and of its whole subtree, called before the node is detached from its parent
+        self.current_components = None  # The current directory may be in the subtree, it is built again when needed
+        if not self.path_cache:
+            return
+        node_components = self.get_node_components(node)
+        self.path_cache.pop(node_components, None)
+        if not node.is_file:
+            prefix_length = len(node_components)
+            for cached_components in [cached_components for cached_components in self.path_cache
+                                      if cached_components[:prefix_length] == node_components]:
+                del self.path_cache[cached_components]
+
+    def clear_cache(self) -> None:
+        # Drop all the cached paths
+        self.path_cache.clear()
+
+    def is_in_subtree(self, node: Optional[TreeNode], subtree_root: TreeNode) -> bool:
+        # Check if a node is subtree_root or one of its descendants
+        while node is not None:
+            if node is subtree_root:
+                return True
+            node = node.parent_node
+        return False
+
+    def forget_subtree(self, subtree_root: TreeNode, parent_node: TreeNode) -> None:
+        # Called when a subtree is deleted: a working directory inside it moves to the parent of the subtree
+        if self.is_in_subtree(self.current_node, subtree_root):
+            self.current_node = parent_node
+            self.current_components = None
+        if self.is_in_subtree(self.previous_node, subtree_root):
+            self.previous_node = None
+
+    def change_current_dir(self, new_cur_directory: Union[TreeNode, str]) -> bool:
+        # change the current working directory to the specified directory (a node or a path)
+        if not isinstance(new_cur_directory, TreeNode):
+            new_cur_directory = self.get_node_by_path(new_cur_directory, show_errors=True)
+            if not new_cur_directory:
+                return False
+        if new_cur_directory.is_file:
+            print(f"{ErrorMessages.InvalidPath.value}{new_cur_directory.name}"
+                  f" The new current directory should be a path, not a file")
+            return False
+        self.previous_node = self.current_node
+        self.current_node = new_cur_directory
+        self.current_components = None
         return True
 
     def go_back_dir(self) -> bool:
         # change the current working directory to the previous directory
-        if not self.previous_directory:
+        if not self.previous_node:
             print(f"{ErrorMessages.NotFoundError.value}previous directory does not found")
             return False
-        cur_dir = self.current_directory
-        self.current_directory = self.previous_directory
-        self.previous_directory = cur_dir
+        self.current_node, self.previous_node = self.previous_node, self.current_node
+        self.current_components = None
         return True
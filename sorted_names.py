@@ -0,0 +1,82 @@
+from bisect import bisect_left, bisect_right, insort
+from typing import Iterable, Iterator, List
+
+BUCKET_SIZE = 1000  # Number of names a bucket holds after a split, a bucket is split when it reaches twice that
+
+"""
+SortedNames keeps a set of names sorted, for ordered and prefix scans of large directories.
+The names are stored in a list of small sorted buckets (a square-root decomposition, like SortedList): adding or
+removing a name is a binary search over the bucket maxima and an insertion into one bucket, so it never sorts or
+shifts the whole set, and a scan starts with two binary searches and reads the buckets in order.
+"""
+
+
+class SortedNames:
+    def __init__(self, names: Iterable[str] = (), bucket_size: int = BUCKET_SIZE):
+        self.bucket_size = bucket_size
+        sorted_names = sorted(names)
+        self.buckets: List[List[str]] = [sorted_names[index:index + bucket_size]
+                                         for index in range(0, len(sorted_names), bucket_size)]
+        self.maxes: List[str] = [bucket[-1] for bucket in self.buckets]  # The last (largest) name of each bucket
+        self.length = len(sorted_names)
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __iter__(self) -> Iterator[str]:
+        return self.irange("")
+
+    def add(self, name: str) -> None:
+        # Insert a name that is not in the set yet, splitting its bucket when it gets too large
+        if not self.buckets:
+            self.buckets.append([name])
+            self.maxes.append(name)
+            self.length = 1
+            return
+        position = bisect_left(self.maxes, name)
+        if position == len(self.maxes):
+            # The name is the largest one, it goes at the end of the last bucket
+            position -= 1
+            self.buckets[position].append(name)
+            self.maxes[position] = name
+        else:
+            insort(self.buckets[position], name)
+        self.length += 1
+        bucket = self.buckets[position]
+        if len(bucket) >= 2 * self.bucket_size:
+            self.buckets[position:position + 1] = [bucket[:self.bucket_size], bucket[self.bucket_size:]]
+            self.maxes[position:position + 1] = [bucket[self.bucket_size - 1], bucket[-1]]
+
+    def remove(self, name: str) -> bool:
+        # Remove a name, return False if it is not in the set
+        position = bisect_left(self.maxes, name)
+        if position == len(self.maxes):
+            return False
+        bucket = self.buckets[position]
+        index = bisect_left(bucket, name)
+        if bucket[index] != name:
+            return False
+        del bucket[index]
+        self.length -= 1
+        if not bucket:
+            del self.buckets[position]
+            del self.maxes[position]
+        elif index == len(bucket):
+            self.maxes[position] = bucket[-1]
+        return True
+
+    def irange(self, start: str, inclusive: bool = True) -> Iterator[str]:
+        """
+        Iterate over the names from `start` (included or not) in order.
+        Each bucket is copied when the iteration reaches it and the next one is looked up again from the last name,
+        so the set may change during the iteration.
+        """
+        bisect = bisect_left if inclusive else bisect_right
+        while True:
+            position = bisect(self.maxes, start)
+            if position == len(self.maxes):
+                return
+            bucket = self.buckets[position]
+            names = bucket[bisect(bucket, start):]
+            yield from names
+            start, bisect = names[-1], bisect_right
@@ -0,0 +1,65 @@
+import unittest
+from extent_map import ExtentMap
+
+
+class TestExtentMap(unittest.TestCase):
+    def setUp(self):
+        # Create an instance of the ExtentMap class for testing
+        self.extent_map = ExtentMap()
+
+    def test_append_grow_and_add_used(self):
+        # Test that the size and capacity follow the changes of the extents
+        self.extent_map.append(0, 10, 10)
+        self.extent_map.append(50, 60)
+        self.extent_map.grow_last(20)
+        self.extent_map.add_used(25)
+        self.assertEqual(self.extent_map.to_list(), [[0, 10, 10], [50, 80, 25]])
+        self.assertEqual(self.extent_map.size, 35)
+        self.assertEqual(self.extent_map.capacity, 40)
+        self.assertEqual(self.extent_map.last(), [50, 80, 25])
+
+    def test_find(self):
+        # Test mapping file offsets to extents
+        self.extent_map = ExtentMap([[100, 110, 10], [0, 30, 30], [200, 220, 5]])
+        self.assertEqual(self.extent_map.find(0), 0)
+        self.assertEqual(self.extent_map.find(9), 0)
+        self.assertEqual(self.extent_map.find(10), 1)
+        self.assertEqual(self.extent_map.find(39), 1)
+        self.assertEqual(self.extent_map.find(42), 2)
+
+    def test_truncate(self):
+        # Test cutting the content, the tail extents and the unused blocks are released
+        extent_map = ExtentMap([[0, 10, 10], [20, 30, 10], [40, 50, 10]])
+        self.assertEqual(extent_map.truncate(12, block_size=5), [[40, 50], [25, 30]])
+        self.assertEqual(extent_map, [[0, 10, 10], [20, 25, 2]])
+        self.assertEqual(extent_map.size, 12)
+        self.assertEqual(extent_map.capacity, 15)
+        self.assertEqual(extent_map.truncate(0, block_size=5), [[0, 10], [20, 25]])
+        self.assertEqual(len(extent_map), 0)
+        self.assertEqual(extent_map.capacity, 0)
+
+    def test_check_consistency(self):
+        # Test the debug check of the incremental bookkeeping
+        extent_map = ExtentMap([[0, 10, 10], [20, 30, 4]])
+        extent_map.add_used(3)
+        self.assertTrue(extent_map.check_consistency())
+        extent_map.extents[0][2] = 8
+        self.assertFalse(extent_map.check_consistency())
+
+    def test_clear(self):
+        # Test that clearing returns the extents and resets the map
+        self.extent_map.append(0, 10, 5)
+        self.assertEqual(self.extent_map.clear(), [[0, 10, 5]])
+        self.assertEqual(len(self.extent_map), 0)
+        self.assertEqual(self.extent_map.size, 0)
+        self.assertEqual(self.extent_map.capacity, 0)
+
+    def test_equality_with_list(self):
+        # Test comparing the map with its serialized form
+        self.extent_map.append(0, 10, 5)
+        self.assertEqual(self.extent_map, [[0, 10, 5]])
+        self.assertEqual(self.extent_map, ExtentMap([[0, 10, 5]]))
+
+
+if __name__ == "__main__":
+    unittest.main()
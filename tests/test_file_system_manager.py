@@ -1,5 +1,8 @@
 import os
+import sys
+import tempfile
 import textwrap
+import time
 import unittest
 import numpy as np
 from io import StringIO
@@ -7,6 +10,8 @@ from unittest.mock import patch, MagicMock
 from file_system_manager import FileSystemManager, MEM_SIZE, MAX_MEM_SIZE,DEFAULT_FILE_SIZE, MAX_FILE_SIZE\
     , JSON_FILE, NUMPY_FILE
 from error_messages import ErrorMessages
+from free_space import FreeSpaceIndex
+from memory_arena import MemoryArena, MemoryMappedArena
 
 
 
@@ -42,6 +47,20 @@ class TestFileSystemManager(unittest.TestCase):
             self.assertEqual(file_node.get_last_modified(), file_node.parent_node.get_last_modified())
             self.assertEqual(file_node.size+start_root_size, file_node.parent_node.size)
 
+    def test_get_file_content(self):
+        # Test gathering the content of a file as a memoryview of the memory buffer
+        file_name = "/gather_file.txt"
+        content = "This is a test file."
+        self.file_system_manager.create_file_or_dir(file_name, file=True, content=content)
+        file_node = self.file_system_manager.path_handler.get_node_by_path(file_name)
+        file_content = self.file_system_manager.get_file_content(file_node)
+        self.assertIsInstance(file_content, memoryview)
+        self.assertEqual(bytes(file_content), content.encode("utf-8"))
+        # A file stored in a single extent is returned without copying
+        start_index = file_node.file_memory_allocations[0][0]
+        self.assertTrue(np.shares_memory(np.asarray(file_content),
+                                         self.file_system_manager.memory_buffer[start_index:start_index + 1]))
+
     def test_get_size_and_get_times(self):
         # Test for the get_size, get_creation_time and get_last_modified_time functionalities
         file_name = "test_file.txt"
@@ -105,6 +124,219 @@ class TestFileSystemManager(unittest.TestCase):
             file_size = self.file_system_manager.path_handler.get_node_by_path(file_name).size
             self.assertEqual(len(new_content), file_size)
 
+    def test_write_and_read_multi_byte_text(self):
+        # Test that the size of a file is counted in bytes
+        file_name = "/unicode_file.txt"
+        content = "héllo wörld ✓"
+        self.file_system_manager.create_file_or_dir(file_name, file=True, content=content)
+        self.file_system_manager.write_to_file(file_name, "ü" * 10, append=True)
+        file_node = self.file_system_manager.path_handler.get_node_by_path(file_name)
+        self.assertEqual(file_node.size, len((content + "ü" * 10).encode("utf-8")))
+        self.assertEqual(self.file_system_manager.read_file(file_name, print_text=False), content + "ü" * 10)
+
+    def test_write_bytes_and_read_bytes(self):
+        # Test storing binary data from different buffer-protocol objects
+        file_name = "/binary_file.bin"
+        data = bytes(range(256))
+        self.file_system_manager.create_file_or_dir(file_name, file=True)
+        self.assertTrue(self.file_system_manager.write_bytes(file_name, data, append=False))
+        self.assertTrue(self.file_system_manager.write_bytes(file_name, np.arange(4, dtype=np.int32)))
+        self.assertTrue(self.file_system_manager.write_bytes(file_name, memoryview(b"end")))
+        expected_content = data + np.arange(4, dtype=np.int32).tobytes() + b"end"
+        self.assertEqual(self.file_system_manager.read_bytes(file_name), expected_content)
+        file_node = self.file_system_manager.path_handler.get_node_by_path(file_name)
+        self.assertEqual(file_node.size, len(expected_content))
+        # Copying a binary file keeps its bytes
+        self.assertTrue(self.file_system_manager.copy_file_or_dir(file_name, "/binary_copy.bin"))
+        self.assertEqual(self.file_system_manager.read_bytes("/binary_copy.bin"), expected_content)
+        # Reading or writing bytes of a directory is not allowed
+        self.file_system_manager.create_file_or_dir("/binary_dir", file=False)
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            self.assertFalse(self.file_system_manager.read_bytes("/binary_dir"))
+            self.assertFalse(self.file_system_manager.write_bytes("/binary_dir", b"data"))
+            self.assertIn(ErrorMessages.IsADirectoryError.value, mock_stdout.getvalue())
+
+    def test_write_bytes_non_contiguous(self):
+        # Test storing a strided buffer, which is copied before being written
+        file_name = "/strided_file.bin"
+        strided_data = np.arange(10, dtype=np.uint8)[::2]
+        strided_rows = np.arange(12, dtype=np.int16).reshape(3, 4)[:, 1:3]
+        self.file_system_manager.create_file_or_dir(file_name, file=True)
+        self.assertTrue(self.file_system_manager.write_bytes(file_name, strided_data, append=False))
+        self.assertTrue(self.file_system_manager.write_bytes(file_name, strided_rows))
+        self.assertEqual(self.file_system_manager.read_bytes(file_name),
+                         strided_data.tobytes() + strided_rows.tobytes())
+
+    def test_write_back_buffer(self):
+        # Test that small appends are collected in memory and committed in one batch
+        self.file_system_manager = FileSystemManager(check_for_backup_files=False, write_back_size=16,
+                                                     write_back_delay=60)
+        file_name = "/log_file.txt"
+        self.file_system_manager.create_file_or_dir(file_name, file=True)
+        file_node = self.file_system_manager.path_handler.get_node_by_path(file_name)
+        for line in ["a\n", "b\n", "c\n"]:
+            self.assertTrue(self.file_system_manager.write_to_file(file_name, line, append=True))
+        self.assertEqual(self.file_system_manager.write_back_buffers[file_node], b"a\nb\nc\n")
+        self.assertEqual(file_node.size, 0)
+        # Reads see the buffered data
+        self.assertEqual(self.file_system_manager.read_file(file_name, print_text=False), "a\nb\nc\n")
+        self.assertNotIn(file_node, self.file_system_manager.write_back_buffers)
+        self.assertEqual(file_node.size, 6)
+        self.assertEqual(self.file_system_manager.root.size, 6)
+        # Reaching the size threshold commits the buffer
+        self.file_system_manager.write_to_file(file_name, "0123456789", append=True)
+        self.file_system_manager.write_to_file(file_name, "abcdef", append=True)
+        self.assertNotIn(file_node, self.file_system_manager.write_back_buffers)
+        self.assertEqual(file_node.size, 22)
+        # Overwriting the file drops the pending appends
+        self.file_system_manager.write_to_file(file_name, "lost", append=True)
+        self.file_system_manager.write_to_file(file_name, "new", append=False)
+        self.assertEqual(self.file_system_manager.read_file(file_name, print_text=False), "new")
+
+    def test_write_back_buffer_delay(self):
+        # Test that appends waiting longer than the delay are committed between commands
+        self.file_system_manager = FileSystemManager(check_for_backup_files=False, write_back_size=16,
+                                                     write_back_delay=60)
+        file_name = "/log_file.txt"
+        self.file_system_manager.create_file_or_dir(file_name, file=True)
+        file_node = self.file_system_manager.path_handler.get_node_by_path(file_name)
+        self.file_system_manager.write_to_file(file_name, "line", append=True)
+        self.file_system_manager.maintain_memory_buffer()
+        self.assertEqual(file_node.size, 0)
+        self.file_system_manager.write_back_delay = 0
+        self.file_system_manager.maintain_memory_buffer()
+        self.assertEqual(file_node.size, 4)
+        self.assertEqual(self.file_system_manager.write_back_buffers, {})
+
+    def test_write_back_commit_failure(self):
+        # Test that buffered appends are kept when they cannot be committed, and committed once there is space
+        self.file_system_manager = FileSystemManager(check_for_backup_files=False, mem_size=64, max_mem_size=64,
+                                                     segment_size=16, write_back_size=32, write_back_delay=0)
+        self.file_system_manager.create_file_or_dir("/big", file=True, content="x" * 60)
+        self.file_system_manager.create_file_or_dir("/log", file=True)
+        self.file_system_manager.write_back_delay = 60
+        self.assertTrue(self.file_system_manager.write_to_file("/log", "abcde"))
+        self.assertTrue(self.file_system_manager.write_to_file("/log", "fghij"))
+        self.file_system_manager.write_back_delay = 0
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            self.file_system_manager.maintain_memory_buffer()
+            self.assertIn(ErrorMessages.WriteBackError.value + "/log", mock_stdout.getvalue())
+            # A later append that fails too is not kept, the earlier ones are
+            self.assertFalse(self.file_system_manager.write_to_file("/log", "klm"))
+        log_node = self.file_system_manager.path_handler.get_node_by_path("/log")
+        self.assertEqual(bytes(self.file_system_manager.write_back_buffers[log_node]), b"abcdefghij")
+        self.assertTrue(self.file_system_manager.delete_file_or_dir("/big"))
+        self.file_system_manager.maintain_memory_buffer()
+        self.assertEqual(self.file_system_manager.read_file("/log", print_text=False), "abcdefghij")
+
+    def test_iter_file_chunks(self):
+        # Test streaming the content of a file spread over several extents and segments
+        self.file_system_manager = FileSystemManager(check_for_backup_files=False, mem_size=64, segment_size=16)
+        file_name = "/streamed_file.bin"
+        self.file_system_manager.create_file_or_dir(file_name, file=True, content=b"0123456")
+        self.file_system_manager.create_file_or_dir("/other_file.bin", file=True, content="x")
+        self.file_system_manager.write_bytes(file_name, b"789abcdefghijklmnopqrstuvwxyz")
+        chunks = list(self.file_system_manager.iter_file_chunks(file_name, chunk_size=8))
+        self.assertTrue(all(isinstance(chunk, memoryview) and len(chunk) <= 8 for chunk in chunks))
+        self.assertEqual(b"".join(chunks), self.file_system_manager.read_bytes(file_name))
+        # Changing the file during the iteration is detected
+        chunk_iterator = self.file_system_manager.iter_file_chunks(file_name, chunk_size=8)
+        next(chunk_iterator)
+        self.file_system_manager.write_bytes(file_name, b"more")
+        with self.assertRaises(RuntimeError):
+            next(chunk_iterator)
+        # Truncating or deleting the file during the iteration is detected too
+        chunk_iterator = self.file_system_manager.iter_file_chunks(file_name, chunk_size=8)
+        next(chunk_iterator)
+        self.assertTrue(self.file_system_manager.truncate_file(file_name, 4))
+        with self.assertRaises(RuntimeError):
+            next(chunk_iterator)
+        chunk_iterator = self.file_system_manager.iter_file_chunks(file_name, chunk_size=2)
+        next(chunk_iterator)
+        self.assertTrue(self.file_system_manager.delete_file_or_dir(file_name))
+        with self.assertRaises(RuntimeError):
+            next(chunk_iterator)
+        # The chunk size is checked before the iteration starts
+        for chunk_size in (0, -5):
+            with self.assertRaises(ValueError):
+                self.file_system_manager.iter_file_chunks("/other_file.bin", chunk_size=chunk_size)
+
+    def test_read_at_and_write_at(self):
+        # Test random access inside a file spread over several extents
+        self.file_system_manager = FileSystemManager(check_for_backup_files=False, max_file_size=100)
+        file_name = "/positional_file.bin"
+        self.file_system_manager.create_file_or_dir(file_name, file=True, content=b"01234")
+        self.file_system_manager.create_file_or_dir("/other_file.bin", file=True, content="x")
+        self.file_system_manager.write_bytes(file_name, b"56789abcdef")
+        file_node = self.file_system_manager.path_handler.get_node_by_path(file_name)
+        self.assertGreater(len(file_node.file_memory_allocations), 1)
+        self.assertEqual(self.file_system_manager.read_at(file_name, 8, 4), b"89ab")
+        self.assertEqual(self.file_system_manager.read_at(file_name, 14, 10), b"ef")
+        self.assertEqual(self.file_system_manager.read_at(file_name, 16, 4), b"")
+        # Overwrite bytes across the extent boundary, then write past the end of the file
+        self.assertTrue(self.file_system_manager.write_at(file_name, 8, b"XYZ"))
+        self.assertTrue(self.file_system_manager.write_at(file_name, 14, b"EFGH"))
+        self.assertEqual(self.file_system_manager.read_bytes(file_name), b"01234567XYZbcdEFGH")
+        self.assertEqual(file_node.size, 18)
+        self.assertEqual(self.file_system_manager.root.size, 19)
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            self.assertFalse(self.file_system_manager.read_at(file_name, 19, 1))
+            self.assertFalse(self.file_system_manager.write_at(file_name, -1, b"data"))
+            self.assertIn(ErrorMessages.InvalidOffsetError.value, mock_stdout.getvalue())
+
+    def test_truncate_file(self):
+        # Test cutting a file, the tail extents are released and the directory sizes are updated
+        self.file_system_manager = FileSystemManager(check_for_backup_files=False, max_file_size=100)
+        file_name = "/truncated_file.bin"
+        self.file_system_manager.create_file_or_dir(file_name, file=True, content=bytes(range(5)))
+        self.file_system_manager.create_file_or_dir("/other_file.bin", file=True, content="x")
+        self.file_system_manager.write_bytes(file_name, bytes(range(5, 25)))
+        file_node = self.file_system_manager.path_handler.get_node_by_path(file_name)
+        released_start_index = file_node.file_memory_allocations[-1][0]
+        self.assertTrue(self.file_system_manager.truncate_file(file_name, "3"))
+        self.assertEqual(self.file_system_manager.read_bytes(file_name), bytes(range(3)))
+        self.assertEqual(file_node.size, 3)
+        self.assertEqual(file_node.file_memory_allocations.capacity, DEFAULT_FILE_SIZE)
+        self.assertEqual(self.file_system_manager.root.size, 4)
+        self.assertTrue(self.file_system_manager.is_memory_available(released_start_index,
+                                                                     released_start_index + DEFAULT_FILE_SIZE))
+        # Truncating to a larger length extends the file with zero bytes
+        self.assertTrue(self.file_system_manager.truncate_file(file_name, 5))
+        self.assertEqual(self.file_system_manager.read_bytes(file_name), bytes(range(3)) + bytes(2))
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            self.assertFalse(self.file_system_manager.truncate_file(file_name, "-1"))
+            self.assertIn(ErrorMessages.InvalidLengthError.value, mock_stdout.getvalue())
+
+    def test_file_size_consistency_checks(self):
+        # Test that the incremental file sizes match the extents through writes, truncation and copies
+        self.file_system_manager = FileSystemManager(check_for_backup_files=False, max_file_size=1000)
+        with patch("file_system_manager.DEBUG_CONSISTENCY_CHECKS", True):
+            self.file_system_manager.create_file_or_dir("/a.txt", file=True, content="start")
+            self.file_system_manager.create_file_or_dir("/b.txt", file=True, content="other")
+            for index in range(20):
+                self.file_system_manager.write_to_file(["/a.txt", "/b.txt"][index % 2], "0123456789")
+            self.file_system_manager.write_at("/a.txt", 3, b"abcdefghijklmnop")
+            self.file_system_manager.truncate_file("/a.txt", "42")
+            self.file_system_manager.copy_file_or_dir("/a.txt", "/b.txt")
+            self.file_system_manager.write_to_file("/b.txt", "end")
+        self.assertEqual(self.file_system_manager.path_handler.get_node_by_path("/a.txt").size, 42)
+        self.assertEqual(self.file_system_manager.path_handler.get_node_by_path("/b.txt").size, 45)
+
+    def test_deep_tree_lazy_propagation(self):
+        # Test that sizes and modification times of a deep tree are correct when they are read
+        deep_path = "/" + "/".join(f"level{depth}" for depth in range(200))
+        self.file_system_manager.create_file_or_dir(deep_path, file=False, recursive=True)
+        self.file_system_manager.create_file_or_dir(f"{deep_path}/file.txt", file=True, content="12345")
+        for _ in range(10):
+            self.file_system_manager.write_to_file(f"{deep_path}/file.txt", "678")
+        file_node = self.file_system_manager.path_handler.get_node_by_path(f"{deep_path}/file.txt")
+        self.assertTrue(self.file_system_manager.root.is_dirty)
+        self.assertEqual(self.file_system_manager.root.size, 35)
+        self.assertEqual(self.file_system_manager.root.last_modified, file_node.last_modified)
+        self.assertFalse(self.file_system_manager.root.is_dirty)
+        self.file_system_manager.delete_file_or_dir(f"{deep_path}/file.txt")
+        self.assertEqual(self.file_system_manager.path_handler.get_node_by_path("/level0").size, 0)
+
     def test_create_directory(self):
         # Test creating a directory
         dir_name = "test_directory"
@@ -189,7 +421,27 @@ class TestFileSystemManager(unittest.TestCase):
             start_index, end_index, _ = allocation
             freed_memory = np.zeros(end_index - start_index)  # Create an array of zeros with the same size
             self.assertTrue(np.array_equal(self.file_system_manager.memory_buffer[start_index:end_index], freed_memory))
-            self.assertIn(allocation[:-1], self.file_system_manager.allocation_available)
+            self.assertTrue(self.file_system_manager.is_memory_available(start_index, end_index))
+
+    def test_delete_deep_directory_releases_memory_in_bulk(self):
+        # Test deleting a tree deeper than the recursion limit, with a copy sharing the memory of a file
+        depth = sys.getrecursionlimit() + 100
+        deep_path = "/deep/" + "/".join(f"d{index}" for index in range(depth))
+        self.file_system_manager.create_file_or_dir(f"{deep_path}/file.txt", file=True, content="deep content",
+                                                    recursive=True)
+        self.file_system_manager.create_file_or_dir("/deep/first.txt", file=True, content="first")
+        self.assertTrue(self.file_system_manager.copy_file_or_dir("/deep/first.txt", "/deep/d0/copy.txt"))
+        self.file_system_manager.create_file_or_dir("/kept.txt", file=True, content="kept")
+        kept_extents = self.file_system_manager.path_handler.get_node_by_path("/kept.txt").file_memory_allocations
+        with patch.object(self.file_system_manager, "release_memory_range") as release_memory_range:
+            self.assertTrue(self.file_system_manager.delete_file_or_dir("/deep"))
+            release_memory_range.assert_not_called()
+        self.assertFalse(self.file_system_manager.path_handler.get_node_by_path("/deep", show_errors=False))
+        self.assertEqual(self.file_system_manager.root.size, 4)
+        self.assertEqual(self.file_system_manager.extent_refcounts, {})
+        # All the memory before the kept file is one free range
+        self.assertEqual(self.file_system_manager.free_space.to_list(), [[0, kept_extents[0][0]]])
+        self.assertEqual(self.file_system_manager.read_file("/kept.txt", print_text=False), "kept")
 
     def test_delete_existing_directory(self):
         # Test deleting an existing directory with multiple files and subdirectories
@@ -241,19 +493,19 @@ class TestFileSystemManager(unittest.TestCase):
             start_index, end_index, _ = allocation
             freed_memory = np.zeros(end_index - start_index)
             self.assertTrue(np.array_equal(self.file_system_manager.memory_buffer[start_index:end_index], freed_memory))
-            self.assertIn(allocation[:-1], self.file_system_manager.allocation_available)
+            self.assertTrue(self.file_system_manager.is_memory_available(start_index, end_index))
 
         for allocation in file2_memory_allocations:
             start_index, end_index, _ = allocation
             freed_memory = np.zeros(end_index - start_index)
             self.assertTrue(np.array_equal(self.file_system_manager.memory_buffer[start_index:end_index], freed_memory))
-            self.assertIn(allocation[:-1], self.file_system_manager.allocation_available)
+            self.assertTrue(self.file_system_manager.is_memory_available(start_index, end_index))
 
         for allocation in file3_memory_allocations:
             start_index, end_index, _ = allocation
             freed_memory = np.zeros(end_index - start_index)
             self.assertTrue(np.array_equal(self.file_system_manager.memory_buffer[start_index:end_index], freed_memory))
-            self.assertIn(allocation[:-1], self.file_system_manager.allocation_available)
+            self.assertTrue(self.file_system_manager.is_memory_available(start_index, end_index))
 
     def test_show_current_directory(self):
         # Test the show_current_directory function
@@ -262,6 +514,88 @@ class TestFileSystemManager(unittest.TestCase):
             # Assert that the current directory is the root directory initially
             self.assertEqual(current_dir, "/")
 
+    def test_current_directory_after_move_and_delete(self):
+        # Test that the current directory follows a moved ancestor, and leaves a deleted one
+        self.file_system_manager.create_file_or_dir("/a/b/file.txt", file=True, content="data", recursive=True)
+        self.file_system_manager.create_file_or_dir("/c", file=False)
+        self.assertTrue(self.file_system_manager.update_current_dir("/a/b"))
+        self.assertTrue(self.file_system_manager.move_file_or_dir("/a", "/c", recursive=True))
+        self.assertEqual(self.file_system_manager.show_current_directory(), "/c/a/b")
+        self.assertEqual(self.file_system_manager.read_file("file.txt", print_text=False), "data")
+        self.assertTrue(self.file_system_manager.delete_file_or_dir("/c/a"))
+        self.assertEqual(self.file_system_manager.show_current_directory(), "/c")
+
+    def test_relative_paths_with_dots(self):
+        # Test commands with "." and ".." in their paths
+        self.file_system_manager.create_file_or_dir("/a/b", file=False, recursive=True)
+        self.assertTrue(self.file_system_manager.update_current_dir("/a/b"))
+        self.assertTrue(self.file_system_manager.create_file_or_dir("../file.txt", file=True, content="data"))
+        self.assertTrue(self.file_system_manager.copy_file_or_dir("..//file.txt", "./copy.txt"))
+        self.assertEqual(self.file_system_manager.read_file("/a/b/copy.txt", print_text=False), "data")
+        self.assertTrue(self.file_system_manager.update_current_dir(".."))
+        self.assertEqual(self.file_system_manager.show_current_directory(), "/a")
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            self.assertTrue(self.file_system_manager.display_directory_content("."))
+            self.assertEqual(mock_stdout.getvalue().strip(), "└── a\n    └── b\n    ├── file.txt")
+        # A directory cannot be moved into its own subtree
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            self.assertFalse(self.file_system_manager.move_file_or_dir("/a", "/a/b", recursive=True))
+            self.assertIn(ErrorMessages.InvalidPath.value, mock_stdout.getvalue())
+        # Also when the destination under the source does not exist yet, and nothing is created
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            self.assertFalse(self.file_system_manager.move_file_or_dir("/a", "/a/new", recursive=True))
+            self.assertFalse(self.file_system_manager.move_file_or_dir("/a", "b/new/deeper", recursive=True))
+            self.assertIn(ErrorMessages.InvalidPath.value, mock_stdout.getvalue())
+        self.assertIs(self.file_system_manager.path_handler.get_node_by_path("/a").parent_node,
+                      self.file_system_manager.root)
+        self.assertFalse(self.file_system_manager.path_handler.get_node_by_path("/a/new", show_errors=False))
+        self.assertFalse(self.file_system_manager.path_handler.get_node_by_path("/a/b/new", show_errors=False))
+        self.assertEqual(self.file_system_manager.read_file("/a/file.txt", print_text=False), "data")
+        self.assertTrue(self.file_system_manager.delete_file_or_dir("b/../b"))
+        self.assertFalse(self.file_system_manager.path_handler.get_node_by_path("/a/b", show_errors=False))
+
+    def test_wildcard_commands(self):
+        # Test delete, copy, move, size and list with wildcards
+        for index in range(20):
+            self.file_system_manager.create_file_or_dir(f"/tmp/file{index}.tmp", file=True, content="x" * index,
+                                                        recursive=True)
+        self.file_system_manager.create_file_or_dir("/tmp/keep.txt", file=True, content="keep")
+        self.file_system_manager.create_file_or_dir("/tmp/sub/nested.tmp", file=True, content="n", recursive=True)
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            self.assertTrue(self.file_system_manager.get_size("/tmp/file1?.tmp"))
+            self.assertEqual(len(mock_stdout.getvalue().splitlines()), 10)
+            self.assertIn("/tmp/file19.tmp: 19", mock_stdout.getvalue())
+        self.assertTrue(self.file_system_manager.copy_file_or_dir("/tmp/file[12].tmp", "/backup"))
+        self.assertEqual(self.file_system_manager.read_file("/backup/file2.tmp", print_text=False), "xx")
+        self.assertTrue(self.file_system_manager.move_file_or_dir("/tmp/**/nested.tmp", "/backup"))
+        self.assertTrue(self.file_system_manager.path_handler.get_node_by_path("/backup/nested.tmp"))
+        self.assertTrue(self.file_system_manager.delete_file_or_dir("/tmp/*.tmp"))
+        tmp_node = self.file_system_manager.path_handler.get_node_by_path("/tmp")
+        self.assertEqual([child.name for child in tmp_node.children], ["keep.txt", "sub"])
+        self.assertEqual(tmp_node.size, 4)
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            self.assertTrue(self.file_system_manager.display_directory_content("/*"))
+            self.assertIn("└── backup\n    ├── file1.tmp", mock_stdout.getvalue())
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            self.assertFalse(self.file_system_manager.delete_file_or_dir("/tmp/*.missing"))
+            self.assertIn(ErrorMessages.NotFoundError.value, mock_stdout.getvalue())
+
+    def test_literal_names_with_wildcard_characters(self):
+        # Test that a node whose name holds wildcard characters is used literally, not expanded
+        self.file_system_manager.create_file_or_dir("/report[1].txt", file=True, content="first")
+        self.file_system_manager.create_file_or_dir("/report1.txt", file=True, content="other")
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            self.assertTrue(self.file_system_manager.get_size("/report[1].txt"))
+            self.assertEqual(mock_stdout.getvalue().strip(), "5")
+        self.assertTrue(self.file_system_manager.copy_file_or_dir("/report[1].txt", "/copy?.txt"))
+        self.assertEqual(self.file_system_manager.read_file("/copy?.txt", print_text=False), "first")
+        self.assertTrue(self.file_system_manager.delete_file_or_dir("/report[1].txt"))
+        self.assertFalse(self.file_system_manager.path_handler.get_node_by_path("/report[1].txt", show_errors=False))
+        self.assertTrue(self.file_system_manager.path_handler.get_node_by_path("/report1.txt"))
+        # Without a literal match, the path is a pattern
+        self.assertTrue(self.file_system_manager.delete_file_or_dir("/report[1].txt".replace("[1]", "[0-9]")))
+        self.assertFalse(self.file_system_manager.path_handler.get_node_by_path("/report1.txt", show_errors=False))
+
     def test_update_current_dir(self):
         # Test the update_current_dir function
         dir_name = "test_directory"
@@ -319,7 +653,7 @@ class TestFileSystemManager(unittest.TestCase):
         # Capture the expected values of the file system manager metadata
         excepted_buffer_size = self.file_system_manager.buffer_size
         excepted_next_available_end_buffer_index = self.file_system_manager.next_available_end_buffer_index
-        excepted_allocation_available = self.file_system_manager.allocation_available
+        excepted_allocation_available = self.file_system_manager.free_space.to_list()
 
         # Retrieve specific nodes by path
         root_node = self.file_system_manager.path_handler.root
@@ -334,7 +668,8 @@ class TestFileSystemManager(unittest.TestCase):
             "metadata": {
                 "buffer_size": excepted_buffer_size,
                 "next_available_end_buffer_index": excepted_next_available_end_buffer_index,
-                "allocation_available": excepted_allocation_available
+                "allocation_available": excepted_allocation_available,
+                "extent_hashes": {}
             },
             "root": {
                 "name": "/",
@@ -417,9 +752,9 @@ class TestFileSystemManager(unittest.TestCase):
 
         # Verify that the TreeNode hierarchy is restored
         self.assertEqual(len(self.file_system_manager.root.children), 2)
-        self.assertEqual(self.file_system_manager.root.children[0].name,
+        self.assertEqual(list(self.file_system_manager.root.children)[0].name,
                          self.file_system_manager.path_handler.split_path(file_name)[1])
-        self.assertEqual(self.file_system_manager.root.children[1].name,
+        self.assertEqual(list(self.file_system_manager.root.children)[1].name,
                          self.file_system_manager.path_handler.split_path(dir_name)[1])
         file_node = self.file_system_manager.path_handler.get_node_by_path(file_name)
         self.assertIsNotNone(file_node)
@@ -428,6 +763,24 @@ class TestFileSystemManager(unittest.TestCase):
 
 
 
+    def test_create_backup_and_restore_backup_memory_mapped(self):
+        # Test a backup and restore when the content of the files is stored in a memory-mapped file
+        with tempfile.TemporaryDirectory() as temp_dir:
+            memory_map_file = os.path.join(temp_dir, "memory_buffer.bin")
+            self.file_system_manager = FileSystemManager(check_for_backup_files=False,
+                                                         memory_map_file=memory_map_file)
+            content = "This is a mapped file."
+            self.file_system_manager.create_file_or_dir(name="/file1", file=True, content=content)
+            self.assertIsInstance(self.file_system_manager.memory_buffer, MemoryMappedArena)
+            self.assertTrue(self.file_system_manager.create_backup())
+            # Restoring maps the content file instead of loading the NumPy file
+            self.file_system_manager.restore_backup()
+            self.file_system_manager.path_handler.root = self.file_system_manager.root
+            self.assertIsInstance(self.file_system_manager.memory_buffer, MemoryMappedArena)
+            self.assertEqual(self.file_system_manager.read_file("/file1", print_text=False), content)
+            self.file_system_manager.memory_buffer = None
+        FileSystemManager(check_for_backup_files=False)
+
     def test_display_directory_content(self):
         # Test displaying an existing directory
         directory_name = "/existing_directory"
@@ -454,6 +807,24 @@ class TestFileSystemManager(unittest.TestCase):
             printed_output = mock_stdout.getvalue().strip()
             self.assertEqual(expected_output, printed_output)
 
+    def test_display_directory_content_paginated(self):
+        # Test listing a directory page by page, sorted by name, with a prefix
+        for name in ["log-3", "data", "log-1", "log-2"]:
+            self.file_system_manager.create_file_or_dir(name=f"/logs/{name}", file=True, recursive=True)
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            self.assertTrue(self.file_system_manager.display_directory_content("/logs", prefix="log", limit="2"))
+            self.assertEqual(mock_stdout.getvalue().strip(), "└── logs\n"
+                                                             "    ├── log-1\n"
+                                                             "    ├── log-2\n"
+                                                             "    ... more entries, continue with --after log-2")
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            self.assertTrue(self.file_system_manager.display_directory_content("/logs", prefix="log", limit="2",
+                                                                               after="log-2"))
+            self.assertEqual(mock_stdout.getvalue().strip(), "└── logs\n    ├── log-3")
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            self.assertFalse(self.file_system_manager.display_directory_content("/logs", limit="0"))
+            self.assertIn(ErrorMessages.InvalidLimitError.value, mock_stdout.getvalue())
+
     def test_display_nonexistent_directory(self):
         # Test displaying a directory that does not exist
         directory_name = "/nonexistent_directory"
@@ -596,6 +967,205 @@ class TestFileSystemManager(unittest.TestCase):
         self.assertEqual(self.file_system_manager.read_file(source_file_path, print_text=False),
                          self.file_system_manager.read_file(destination_file_path, print_text=False))
 
+    def test_copy_shares_extents_copy_on_write(self):
+        # Test that a copy shares the extents of the source until one of the files writes to them
+        source_file, copy_file = "/source.bin", "/copy.bin"
+        self.file_system_manager.create_file_or_dir(source_file, file=True, content=b"0123456789abc")
+        used_memory = self.file_system_manager.next_available_end_buffer_index
+        self.assertTrue(self.file_system_manager.copy_file_or_dir(source_file, copy_file))
+        source_node = self.file_system_manager.path_handler.get_node_by_path(source_file)
+        copy_node = self.file_system_manager.path_handler.get_node_by_path(copy_file)
+        # No memory is allocated for the copy, the unused end of the last extent is released
+        self.assertLessEqual(self.file_system_manager.next_available_end_buffer_index, used_memory)
+        self.assertEqual(copy_node.file_memory_allocations, source_node.file_memory_allocations)
+        self.assertEqual(self.file_system_manager.extent_refcounts, {0: 2})
+        self.assertEqual(self.file_system_manager.root.size, 26)
+        # Writing to the copy copies the shared extent, the source keeps its content
+        self.assertTrue(self.file_system_manager.write_at(copy_file, 0, b"X"))
+        self.assertTrue(self.file_system_manager.write_bytes(copy_file, b"!"))
+        self.assertEqual(self.file_system_manager.read_bytes(source_file), b"0123456789abc")
+        self.assertEqual(self.file_system_manager.read_bytes(copy_file), b"X123456789abc!")
+        self.assertEqual(self.file_system_manager.extent_refcounts, {})
+        # Deleting a file only releases the memory no other file shares
+        self.file_system_manager.copy_file_or_dir(source_file, copy_file)
+        source_extents = source_node.file_memory_allocations.copy()
+        self.file_system_manager.delete_file_or_dir(source_file)
+        self.assertFalse(self.file_system_manager.is_memory_available(source_extents[0][0], source_extents[0][1]))
+        self.assertEqual(self.file_system_manager.read_bytes(copy_file), b"0123456789abc")
+        self.file_system_manager.delete_file_or_dir(copy_file)
+        self.assertEqual(self.file_system_manager.next_available_end_buffer_index, 0)
+
+    def test_copy_on_write_with_compaction_and_backup(self):
+        # Test that shared extents stay shared when they are moved by compaction or saved in a backup
+        self.file_system_manager.create_file_or_dir("/hole.txt", file=True, content="x" * 30)
+        self.file_system_manager.create_file_or_dir("/dir", file=False)
+        self.file_system_manager.create_file_or_dir("/dir/file.txt", file=True, content="shared content")
+        self.file_system_manager.copy_file_or_dir("/dir", "/dir_copy", recursive=True)
+        copy_node = self.file_system_manager.path_handler.get_node_by_path("/dir_copy/dir/file.txt")
+        self.assertEqual(self.file_system_manager.read_file(copy_node, print_text=False), "shared content")
+        self.file_system_manager.delete_file_or_dir("/hole.txt")
+        self.file_system_manager.compact_memory_buffer()
+        self.assertEqual(copy_node.file_memory_allocations[0][0], 0)
+        self.assertEqual(self.file_system_manager.extent_refcounts, {0: 2})
+        self.assertEqual(self.file_system_manager.read_file(copy_node, print_text=False), "shared content")
+        self.assertTrue(self.file_system_manager.create_backup())
+        self.file_system_manager = FileSystemManager(check_for_backup_files=True)
+        self.assertEqual(self.file_system_manager.extent_refcounts, {0: 2})
+        self.file_system_manager.write_to_file("/dir/file.txt", "changed", append=False)
+        self.assertEqual(self.file_system_manager.read_file("/dir_copy/dir/file.txt", print_text=False),
+                         "shared content")
+
+    def test_dedup_identical_content(self):
+        # Test that identical content written to different files is stored once
+        self.file_system_manager = FileSystemManager(check_for_backup_files=False, dedup=True)
+        boilerplate = "# Licensed under the MIT License\n" * 8
+        for file_name in ["/a.py", "/b.py", "/c.py"]:
+            self.file_system_manager.create_file_or_dir(file_name, file=True, content=boilerplate)
+        self.file_system_manager.create_file_or_dir("/other.py", file=True, content="print('other')")
+        stats = self.file_system_manager.get_memory_stats()
+        self.assertEqual(stats["logical_size"], 3 * len(boilerplate) + 14)
+        self.assertEqual(stats["stored_size"], len(boilerplate) + 14)
+        # The small file is not deduplicated, it keeps its last block
+        self.assertEqual(self.file_system_manager.next_available_end_buffer_index, len(boilerplate) + 20)
+        self.assertGreater(stats["dedup_ratio"], 2)
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            self.assertTrue(self.file_system_manager.display_stats())
+            self.assertIn("Dedup ratio: 2.", mock_stdout.getvalue())
+        # Writing to a deduplicated file does not change the other files
+        self.file_system_manager.write_to_file("/b.py", "import os\n", append=True)
+        self.file_system_manager.write_at("/c.py", 0, b"//")
+        self.assertEqual(self.file_system_manager.read_file("/a.py", print_text=False), boilerplate)
+        self.assertEqual(self.file_system_manager.read_file("/b.py", print_text=False), boilerplate + "import os\n")
+        self.assertEqual(self.file_system_manager.read_file("/c.py", print_text=False), "//" + boilerplate[2:])
+        # The savings persist across a backup
+        stats = self.file_system_manager.get_memory_stats()
+        self.assertTrue(self.file_system_manager.create_backup())
+        self.file_system_manager = FileSystemManager(check_for_backup_files=True, dedup=True)
+        self.assertEqual(self.file_system_manager.get_memory_stats(), stats)
+        self.file_system_manager.create_file_or_dir("/d.py", file=True, content=boilerplate)
+        self.assertEqual(self.file_system_manager.get_memory_stats()["stored_size"], stats["stored_size"])
+
+    def test_dedup_keeps_appends_in_place(self):
+        # Test that with dedup the open tail of a file grows in place and small content is not indexed
+        self.file_system_manager = FileSystemManager(check_for_backup_files=False, dedup=True)
+        self.file_system_manager.create_file_or_dir("/a.log", file=True)
+        for _ in range(1000):
+            self.file_system_manager.write_bytes("/a.log", b"x")
+        file_node = self.file_system_manager.path_handler.get_node_by_path("/a.log")
+        self.assertEqual(len(file_node.file_memory_allocations), 1)
+        self.assertEqual(len(self.file_system_manager.free_space), 0)
+        # Identical small appends to different files do not share an extent
+        self.file_system_manager.create_file_or_dir("/b.log", file=True)
+        self.file_system_manager.create_file_or_dir("/c.log", file=True)
+        for _ in range(100):
+            self.file_system_manager.write_bytes("/b.log", b"y")
+            self.file_system_manager.write_bytes("/c.log", b"y")
+        self.assertEqual(self.file_system_manager.extent_hashes, {})
+        self.assertEqual(self.file_system_manager.extent_refcounts, {})
+        # Large appends seal the extents they fill, the sealed extents are deduplicated
+        chunk = bytes(range(256)) * 2
+        for _ in range(3):
+            self.file_system_manager.write_bytes("/a.log", chunk)
+            self.file_system_manager.write_bytes("/b.log", chunk)
+        self.assertGreater(len(self.file_system_manager.extent_hashes), 0)
+        self.assertEqual(self.file_system_manager.read_bytes("/a.log"), b"x" * 1000 + chunk * 3)
+        self.assertEqual(self.file_system_manager.read_bytes("/b.log"), b"y" * 100 + chunk * 3)
+
+    def run_cold_files_pass(self):
+        # Run the maintenance between commands until the pass over the cold files is complete (it is time-budgeted)
+        self.file_system_manager.maintain_memory_buffer()
+        while self.file_system_manager.compression_nodes_to_visit is not None:
+            self.file_system_manager.maintain_memory_buffer()
+
+    def test_compress_cold_files(self):
+        # Test that files not accessed for a while are compressed and decompressed on access
+        self.file_system_manager = FileSystemManager(check_for_backup_files=False, compress_after=60)
+        text = "All work and no play makes Jack a dull boy. " * 50
+        random_data = np.random.default_rng(0).integers(0, 256, 1000, dtype=np.uint8).tobytes()
+        self.file_system_manager.create_file_or_dir("/cold.txt", file=True, content=text)
+        self.file_system_manager.create_file_or_dir("/random.bin", file=True, content=random_data)
+        self.file_system_manager.create_file_or_dir("/hot.txt", file=True, content=text)
+        cold_node = self.file_system_manager.path_handler.get_node_by_path("/cold.txt")
+        random_node = self.file_system_manager.path_handler.get_node_by_path("/random.bin")
+        cold_node.last_access -= 120
+        random_node.last_access -= 120
+        self.run_cold_files_pass()
+        # Only the cold file that compresses well is compressed, its size is still the size of the content
+        self.assertTrue(cold_node.compressed)
+        self.assertFalse(random_node.compressed)
+        self.assertFalse(self.file_system_manager.path_handler.get_node_by_path("/hot.txt").compressed)
+        self.assertEqual(cold_node.size, len(text))
+        self.assertLess(cold_node.file_memory_allocations.size, len(text) // 10)
+        self.assertEqual(self.file_system_manager.root.size, 2 * len(text) + len(random_data))
+        stats = self.file_system_manager.get_memory_stats()
+        self.assertEqual(stats["compressed_files"], 1)
+        self.assertEqual(stats["compression_saved_size"], len(text) - cold_node.file_memory_allocations.size)
+        # The compressed state persists across a backup
+        self.assertTrue(self.file_system_manager.create_backup())
+        self.file_system_manager = FileSystemManager(check_for_backup_files=True, compress_after=60)
+        cold_node = self.file_system_manager.path_handler.get_node_by_path("/cold.txt")
+        self.assertTrue(cold_node.compressed)
+        # Reading the file decompresses it, and appending to it works as usual
+        self.assertEqual(self.file_system_manager.read_file("/cold.txt", print_text=False), text)
+        self.assertFalse(cold_node.compressed)
+        cold_node.last_access -= 120
+        self.file_system_manager.next_compression_time = 0
+        self.run_cold_files_pass()
+        self.assertTrue(cold_node.compressed)
+        self.assertTrue(self.file_system_manager.write_to_file("/cold.txt", "The end."))
+        self.assertEqual(self.file_system_manager.read_file("/cold.txt", print_text=False), text + "The end.")
+        self.assertEqual(cold_node.size, len(text) + 8)
+
+    def test_search_compressed_files(self):
+        # Test that a content search streams the compressed files without decompressing them into the memory buffer
+        self.file_system_manager = FileSystemManager(check_for_backup_files=False, compress_after=60, segment_size=16)
+        for index in range(5):
+            text = f"Line {index} of a log that compresses well. " * 20 + f"needle{index}"
+            self.file_system_manager.create_file_or_dir(f"/cold{index}.txt", file=True, content=text)
+        cold_nodes = [self.file_system_manager.path_handler.get_node_by_path(f"/cold{index}.txt") for index in range(5)]
+        for cold_node in cold_nodes:
+            cold_node.last_access -= 120
+        self.run_cold_files_pass()
+        self.assertTrue(all(cold_node.compressed for cold_node in cold_nodes))
+        last_accesses = [cold_node.last_access for cold_node in cold_nodes]
+        # No memory is left to decompress a file, the search still reads them
+        self.file_system_manager.max_mem_size = self.file_system_manager.next_available_end_buffer_index
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            self.assertTrue(self.file_system_manager.search(search_content="NEEDLE3"))
+            self.assertIn("/cold3.txt", mock_stdout.getvalue())
+            self.assertNotIn("/cold2.txt", mock_stdout.getvalue())
+        self.assertTrue(all(cold_node.compressed for cold_node in cold_nodes))
+        self.assertEqual([cold_node.last_access for cold_node in cold_nodes], last_accesses)
+
+    def test_compress_cold_files_resumes(self):
+        # Test that the pass over the cold files stops when its time budget runs out and resumes on the next call
+        self.file_system_manager = FileSystemManager(check_for_backup_files=False, compress_after=60)
+        text = "All work and no play makes Jack a dull boy. " * 50
+        for index in range(20):
+            self.file_system_manager.create_file_or_dir(f"/dir{index}", file=False)
+            self.file_system_manager.create_file_or_dir(f"/dir{index}/cold.txt", file=True, content=text)
+        cold_nodes = [self.file_system_manager.path_handler.get_node_by_path(f"/dir{index}/cold.txt")
+                      for index in range(20)]
+        for cold_node in cold_nodes:
+            cold_node.last_access -= 120
+        now = time.time()
+        # With no time left, a single node is visited per call
+        self.assertFalse(self.file_system_manager.compress_cold_files(now, time_budget=-1))
+        self.assertIsNotNone(self.file_system_manager.compression_nodes_to_visit)
+        calls = 1
+        while not self.file_system_manager.compress_cold_files(now, time_budget=-1):
+            calls += 1
+            if calls == 10:
+                # A file deleted while the pass is running is skipped
+                self.assertTrue(self.file_system_manager.delete_file_or_dir("/dir0"))
+        self.assertGreater(calls, 20)
+        self.assertIsNone(self.file_system_manager.compression_nodes_to_visit)
+        self.assertTrue(all(cold_node.compressed for cold_node in cold_nodes[1:]))
+        self.assertFalse(cold_nodes[0].compressed)
+        self.assertEqual(self.file_system_manager.get_memory_stats()["compressed_files"], 19)
+        for cold_node in cold_nodes[1:]:
+            self.assertEqual(self.file_system_manager.read_file(cold_node, print_text=False), text)
+
     def test_copy_existing_file_to_existing_file(self):
         # Test copying from an existing file to another existing file
         source_file_path = "/source_file.txt"
@@ -731,6 +1301,35 @@ class TestFileSystemManager(unittest.TestCase):
         self.assertNotEqual(excepted_children, len(destination_node.children))
         self.assertEqual(0, len(destination_node.children))
 
+    def test_move_file_to_directory_with_same_name(self):
+        # Test that moving a file does not replace a node with the same name in the destination
+        self.file_system_manager.create_file_or_dir("/source/file.txt", file=True, content="source", recursive=True)
+        self.file_system_manager.create_file_or_dir("/destination/file.txt/inner", file=False, recursive=True)
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            self.assertFalse(self.file_system_manager.move_file_or_dir("/source/file.txt", "/destination"))
+            self.assertIn(ErrorMessages.ExistsError.value, mock_stdout.getvalue())
+        self.assertTrue(self.file_system_manager.path_handler.get_node_by_path("/source/file.txt").is_file)
+        self.assertFalse(self.file_system_manager.path_handler.get_node_by_path("/destination/file.txt").is_file)
+        # Moving a file to its own directory keeps it
+        self.assertTrue(self.file_system_manager.move_file_or_dir("/source/file.txt", "/source"))
+        self.assertTrue(self.file_system_manager.path_handler.get_node_by_path("/source/file.txt"))
+
+    def test_path_cache_after_delete_and_move(self):
+        # Test that the cached paths do not resolve to deleted or moved nodes
+        self.file_system_manager.create_file_or_dir("/a/b/file.txt", file=True, content="data", recursive=True)
+        self.file_system_manager.create_file_or_dir("/c", file=False)
+        self.assertTrue(self.file_system_manager.path_handler.get_node_by_path("/a/b/file.txt"))
+        self.assertTrue(self.file_system_manager.move_file_or_dir("/a/b", "/c", recursive=True))
+        self.assertFalse(self.file_system_manager.path_handler.get_node_by_path("/a/b/file.txt", show_errors=False))
+        self.assertTrue(self.file_system_manager.path_handler.get_node_by_path("/c/b/file.txt"))
+        self.assertTrue(self.file_system_manager.delete_file_or_dir("/c"))
+        self.assertFalse(self.file_system_manager.path_handler.get_node_by_path("/c/b/file.txt", show_errors=False))
+        # A node created again at the same path is found
+        self.file_system_manager.create_file_or_dir("/c/b/file.txt", file=True, content="new", recursive=True)
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            self.file_system_manager.read_file("/c/b/file.txt")
+            self.assertEqual(mock_stdout.getvalue().strip(), "new")
+
     def test_search_no_results(self):
         # Test when no relevant files or directories are found
         self.file_system_manager.create_file_or_dir("/file1.txt", file=True, content="This is a sample file.")
@@ -773,6 +1372,43 @@ class TestFileSystemManager(unittest.TestCase):
             self.assertIn("Directory results:", printed_message)
             self.assertIn("/dir2", printed_message)
 
+    def test_search_content_across_chunks(self):
+        # Test that a content search finds matches that span two chunks of the file
+        self.file_system_manager = FileSystemManager(check_for_backup_files=False, mem_size=64, segment_size=16)
+        self.file_system_manager.create_file_or_dir("/chunked.txt", file=True,
+                                                    content="0123456789abcdeMATCHING content here")
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            self.assertTrue(self.file_system_manager.search(search_content="matching CONTENT"))
+            self.assertIn("/chunked.txt", mock_stdout.getvalue())
+
+    def test_search_with_node_table(self):
+        # Test that the vectorized search finds the same results as the depth-first search
+        searches = [{"search_name": "dir"}, {"file_extension": ".txt", "min_size": "10"},
+                    {"search_content": "content", "max_size": "30", "start_path": "/dir1"},
+                    {"search_name": "file", "start_path": "dir1"}]
+        outputs = []
+        for node_table in [False, True]:
+            self.file_system_manager = FileSystemManager(check_for_backup_files=False, node_table=node_table)
+            self.file_system_manager.create_file_or_dir("/dir1/file1.txt", file=True, content="Some content",
+                                                        recursive=True)
+            self.file_system_manager.create_file_or_dir("/dir1/dir2/file2.TXT", file=True,
+                                                        content="More content in a larger file", recursive=True)
+            self.file_system_manager.create_file_or_dir("/file3.md", file=True, content="Not matching")
+            with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+                for search_arguments in searches:
+                    self.assertTrue(self.file_system_manager.search(**search_arguments))
+                outputs.append(mock_stdout.getvalue())
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertIn("/dir1/dir2/file2.TXT", outputs[1])
+        # The snapshot is built again after the tree changes
+        node_table = self.file_system_manager.node_table
+        self.file_system_manager.create_file_or_dir("/dir1/file4.txt", file=True)
+        self.assertIsNone(self.file_system_manager.node_table)
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            self.file_system_manager.search(search_name="file4")
+            self.assertIn("/dir1/file4.txt", mock_stdout.getvalue())
+        self.assertIsNot(self.file_system_manager.node_table, node_table)
+
     def test_search_no_criteria_error(self):
         # Test when no search criteria are provided, expecting an error
         with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
@@ -806,6 +1442,7 @@ class TestFileSystemManager(unittest.TestCase):
 
     def test_allocate_memory_buffer_max_file_size(self):
         # Test allocation error when reaching max file size
+        self.file_system_manager = FileSystemManager(check_for_backup_files=False, max_file_size=100)
         file_name = "/max_size_file.txt"
         self.file_system_manager.create_file_or_dir(file_name, file=True)
         file_node = self.file_system_manager.path_handler.get_node_by_path(file_name)
@@ -829,11 +1466,13 @@ class TestFileSystemManager(unittest.TestCase):
         file_node = self.file_system_manager.path_handler.get_node_by_path(file_name)
         allocation_count = 4
         for i in range(allocation_count):
-            # Allocate memory for the file
+            # Allocate memory for the file, the extent should grow in place
             result = self.file_system_manager.allocate_memory_buffer(file_node)
             self.assertTrue(result)
             file_allocation = file_node.file_memory_allocations
-            self.assertEqual(len(file_allocation), i+1)
+            self.assertEqual(len(file_allocation), 1)
+            start_index, end_index, _ = file_allocation[0]
+            self.assertEqual(end_index - start_index, DEFAULT_FILE_SIZE * (i + 1))
         old_file_allocation = file_node.file_memory_allocations.copy()
         # freeing the memory
         result = self.file_system_manager.delete_memory_buffer(file_node)
@@ -843,16 +1482,158 @@ class TestFileSystemManager(unittest.TestCase):
             start_index, end_index, _ = allocation
             freed_memory = np.zeros(end_index - start_index)  # Create an array of zeros with the same size
             self.assertTrue(np.array_equal(self.file_system_manager.memory_buffer[start_index:end_index], freed_memory))
-            self.assertIn(allocation[:-1], self.file_system_manager.allocation_available)
-        old_allocation_available = self.file_system_manager.allocation_available.copy()
-        for i in range(allocation_count):
-            # Allocate memory for the file
-            result = self.file_system_manager.allocate_memory_buffer(file_node)
-            self.assertTrue(result)
-            file_allocation = file_node.file_memory_allocations
-            self.assertEqual(len(file_allocation), i+1)
-            # Check if the newly allocated memory reuses available memory space
-            self.assertIn(file_allocation[-1][:-1], old_allocation_available)
+            self.assertTrue(self.file_system_manager.is_memory_available(start_index, end_index))
+        # Allocate the whole freed range at once and check that it reuses the freed memory
+        result = self.file_system_manager.allocate_memory_buffer(file_node, DEFAULT_FILE_SIZE * allocation_count)
+        self.assertTrue(result)
+        self.assertEqual(file_node.file_memory_allocations[0][:-1], old_file_allocation[0][:-1])
+
+    def test_delete_memory_buffer_merges_free_ranges_and_shrinks_tail(self):
+        # Test that freed neighbouring ranges are merged and that freeing the tail lowers the high-water mark
+        start_index = self.file_system_manager.next_available_end_buffer_index
+        for file_name in ["/file_a", "/file_b", "/file_c"]:
+            self.file_system_manager.create_file_or_dir(file_name, file=True, content="0123456789")
+        self.file_system_manager.delete_file_or_dir("/file_a")
+        self.file_system_manager.delete_file_or_dir("/file_b")
+        self.assertEqual(self.file_system_manager.free_space.to_list(),
+                         [[start_index, start_index + 2 * DEFAULT_FILE_SIZE]])
+        self.file_system_manager.delete_file_or_dir("/file_c")
+        self.assertEqual(len(self.file_system_manager.free_space), 0)
+        self.assertEqual(self.file_system_manager.next_available_end_buffer_index, start_index)
+
+    def create_fragmented_files(self) -> dict:
+        # Create files and delete every second one, leaving holes in the memory buffer
+        contents = {}
+        for i in range(6):
+            file_name = f"/fragment_{i}"
+            self.file_system_manager.create_file_or_dir(file_name, file=True, content=f"content {i}" * (i + 1))
+            contents[file_name] = f"content {i}" * (i + 1)
+        for i in range(0, 6, 2):
+            self.file_system_manager.delete_file_or_dir(f"/fragment_{i}")
+            del contents[f"/fragment_{i}"]
+        return contents
+
+    def test_compact_memory_buffer(self):
+        # Test that compaction removes the holes and keeps the content of the files
+        contents = self.create_fragmented_files()
+        self.assertTrue(len(self.file_system_manager.free_space) > 0)
+        used_memory = self.file_system_manager.next_available_end_buffer_index - \
+            self.file_system_manager.free_space.free_size
+        self.assertTrue(self.file_system_manager.compact_memory_buffer())
+        self.assertEqual(len(self.file_system_manager.free_space), 0)
+        self.assertEqual(self.file_system_manager.next_available_end_buffer_index, used_memory)
+        for file_name, content in contents.items():
+            self.assertEqual(self.file_system_manager.read_file(file_name, print_text=False), content)
+
+    def test_compact_memory_buffer_incremental(self):
+        # Test that a compaction with a time budget advances step by step until the buffer is compacted
+        contents = self.create_fragmented_files()
+        steps = 0
+        while len(self.file_system_manager.free_space):
+            self.assertTrue(self.file_system_manager.compact_memory_buffer(time_budget="0"))
+            steps += 1
+        self.assertTrue(steps > 1)
+        self.assertFalse(self.file_system_manager.compaction_running)
+        for file_name, content in contents.items():
+            self.assertEqual(self.file_system_manager.read_file(file_name, print_text=False), content)
+        # Check that an invalid time budget is rejected
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            self.assertFalse(self.file_system_manager.compact_memory_buffer(time_budget="-1"))
+            self.assertIn(ErrorMessages.InvalidTimeBudgetError.value, mock_stdout.getvalue())
+
+    def test_compaction_continues_across_changes(self):
+        # Test that files created and deleted between compaction steps do not restart or break the compaction
+        contents = self.create_fragmented_files()
+        index = 0
+        while not self.file_system_manager.compaction_step(time_budget=0):
+            index += 1
+            file_name = f"/between_steps_{index}"
+            self.file_system_manager.create_file_or_dir(file_name, file=True, content=f"step {index}" * index)
+            contents[file_name] = f"step {index}" * index
+            if index == 2:
+                self.file_system_manager.delete_file_or_dir("/fragment_3")
+                del contents["/fragment_3"]
+        self.assertEqual(len(self.file_system_manager.free_space), 0)
+        for file_name, content in contents.items():
+            self.assertEqual(self.file_system_manager.read_file(file_name, print_text=False), content)
+
+    def test_compaction_stops_at_lost_memory(self):
+        # Test that memory no file owns (lost by an inconsistent backup) is never moved over or handed out
+        contents = self.create_fragmented_files()
+        lost_node = self.file_system_manager.path_handler.get_node_by_path("/fragment_3")
+        self.file_system_manager.root.remove_child("fragment_3")
+        for extent in lost_node.file_memory_allocations:
+            del self.file_system_manager.extents_by_start[extent[0]]
+        del contents["/fragment_3"]
+        self.assertTrue(self.file_system_manager.compact_memory_buffer())
+        self.assertGreater(len(self.file_system_manager.free_space), 0)
+        for extent in lost_node.file_memory_allocations:
+            self.assertFalse(self.file_system_manager.is_memory_available(extent[0], extent[1]))
+        self.file_system_manager.create_file_or_dir("/new_file", file=True, content="new content" * 3)
+        contents["/new_file"] = "new content" * 3
+        for file_name, content in contents.items():
+            self.assertEqual(self.file_system_manager.read_file(file_name, print_text=False), content)
+
+    def test_allocate_memory_buffer_compacts_full_buffer(self):
+        # Test that an allocation that does not fit in a fragmented full buffer triggers compaction
+        self.create_fragmented_files()
+        used_end_index = self.file_system_manager.next_available_end_buffer_index
+        self.file_system_manager.max_mem_size = used_end_index
+        result = self.file_system_manager.create_file_or_dir("/new_file", file=True, content="x" * 60)
+        self.assertTrue(result)
+        self.assertEqual(self.file_system_manager.read_file("/new_file", print_text=False), "x" * 60)
+        self.assertEqual(len(self.file_system_manager.free_space), 0)
+
+    def test_allocate_memory_buffer_variable_size_extent(self):
+        # Test that a large write is stored in a single extent sized to the content
+        self.file_system_manager = FileSystemManager(check_for_backup_files=False, max_file_size=100)
+        file_name = "/extent_file.txt"
+        content = "x" * (self.file_system_manager.max_file_size - DEFAULT_FILE_SIZE)
+        self.file_system_manager.create_file_or_dir(file_name, file=True, content=content)
+        file_node = self.file_system_manager.path_handler.get_node_by_path(file_name)
+        self.assertEqual(len(file_node.file_memory_allocations), 1)
+        self.assertEqual(file_node.size, len(content))
+        self.assertEqual(self.file_system_manager.read_file(file_name, print_text=False), content)
+        # Block the memory after the file, so the next append has to split into a new extent
+        self.file_system_manager.create_file_or_dir("/blocker.txt", file=True, content="blocker")
+        self.assertTrue(self.file_system_manager.write_to_file(file_name, "12345", append=True))
+        self.assertEqual(len(file_node.file_memory_allocations), 2)
+        self.assertEqual(self.file_system_manager.read_file(file_name, print_text=False), content + "12345")
+        self.assertEqual(file_node.size, len(content) + 5)
+
+    def test_write_to_file_single_pass(self):
+        # Test that a write filling the last extent and needing a new one allocates and propagates only once
+        file_name = "/single_pass_file.txt"
+        self.file_system_manager.create_file_or_dir(file_name, file=True, content="12345")
+        # Block the memory after the file, so the write has to continue in a new extent
+        self.file_system_manager.create_file_or_dir("/blocker.txt", file=True, content="blocker")
+        file_node = self.file_system_manager.path_handler.get_node_by_path(file_name)
+        content = "abcdefghij" * 5
+        with patch.object(self.file_system_manager, "allocate_memory_buffer",
+                          wraps=self.file_system_manager.allocate_memory_buffer) as mock_allocate, \
+                patch.object(self.file_system_manager, "update_parents",
+                             wraps=self.file_system_manager.update_parents) as mock_update_parents:
+            self.assertTrue(self.file_system_manager.write_to_file(file_name, content, append=True))
+            self.assertEqual(mock_allocate.call_count, 1)
+            self.assertEqual(mock_update_parents.call_count, 1)
+        self.assertEqual(len(file_node.file_memory_allocations), 2)
+        self.assertEqual(file_node.file_memory_allocations.offsets, [0, DEFAULT_FILE_SIZE])
+        self.assertEqual(self.file_system_manager.read_file(file_name, print_text=False), "12345" + content)
+        self.assertEqual(file_node.size, len("12345" + content))
+
+    def test_large_file_with_custom_limits(self):
+        # Test a multi-megabyte file with a custom block size
+        self.file_system_manager = FileSystemManager(check_for_backup_files=False, block_size=4096)
+        file_name = "/large_file.txt"
+        content = "0123456789" * 300 * 1024
+        self.assertTrue(self.file_system_manager.create_file_or_dir(file_name, file=True, content=content))
+        self.assertTrue(self.file_system_manager.write_to_file(file_name, "tail", append=True))
+        file_node = self.file_system_manager.path_handler.get_node_by_path(file_name)
+        self.assertEqual(file_node.size, len(content) + 4)
+        self.assertEqual(len(file_node.file_memory_allocations), 1)
+        self.assertEqual(file_node.file_memory_allocations.capacity % 4096, 0)
+        self.assertEqual(self.file_system_manager.read_file(file_name, print_text=False), content + "tail")
+        self.assertTrue(self.file_system_manager.buffer_size > MEM_SIZE)
 
     def test_allocate_memory_buffer_max_buffer_expansion(self):
         # Test buffer expansion when allocation exceeds the buffer size
@@ -862,17 +1643,18 @@ class TestFileSystemManager(unittest.TestCase):
 
         # Set the buffer size to a smaller value for testing
         new_buffer_size = DEFAULT_FILE_SIZE
-        self.file_system_manager.memory_buffer = np.empty(dtype=np.int8, shape=(new_buffer_size,))
+        self.file_system_manager.memory_buffer = MemoryArena(new_buffer_size, segment_size=DEFAULT_FILE_SIZE)
         self.file_system_manager.buffer_size = new_buffer_size
         self.file_system_manager.next_available_end_buffer_index = 0  # Track the current used length
-        self.file_system_manager.allocation_available = []
+        self.file_system_manager.free_space = FreeSpaceIndex()
         # Allocate memory once, this will consume the initial buffer size
         self.file_system_manager.allocate_memory_buffer(file_node)
         # Try allocating memory again for the same file, this should trigger buffer expansion
         result = self.file_system_manager.allocate_memory_buffer(file_node)
         self.assertTrue(result)
-        # Check if the number of memory allocations matches the buffer size
-        self.assertEqual(len(file_node.file_memory_allocations), self.file_system_manager.buffer_size/DEFAULT_FILE_SIZE)
+        # Check that the extent grew in place and covers the whole expanded buffer
+        self.assertEqual(file_node.file_memory_allocations, [[0, self.file_system_manager.buffer_size, 0]])
+        self.assertEqual(self.file_system_manager.buffer_size, 2 * DEFAULT_FILE_SIZE)
 
     def test_allocate_memory_buffer_max_mem_size(self):
         # Test memory allocation error when exceeding max memory size
@@ -882,11 +1664,11 @@ class TestFileSystemManager(unittest.TestCase):
 
         # Set the buffer size to a maximum value for testing
         new_buffer_size = MAX_MEM_SIZE
-        self.file_system_manager.memory_buffer = np.empty(dtype=np.int8, shape=(new_buffer_size))
+        self.file_system_manager.memory_buffer = MemoryArena(new_buffer_size)
         self.file_system_manager.buffer_size = new_buffer_size
         # Initialize the end buffer index to the maximum memory size (to simulate a fully utilized buffer)
         self.file_system_manager.next_available_end_buffer_index = MAX_MEM_SIZE
-        self.file_system_manager.allocation_available = []
+        self.file_system_manager.free_space = FreeSpaceIndex()
 
         # Try allocating memory again for the same file
         with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
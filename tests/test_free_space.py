@@ -0,0 +1,60 @@
+import unittest
+from free_space import FreeSpaceIndex
+
+
+class TestFreeSpaceIndex(unittest.TestCase):
+    def setUp(self):
+        # Create an instance of the FreeSpaceIndex class for testing
+        self.free_space = FreeSpaceIndex()
+
+    def test_add_merges_neighbouring_ranges(self):
+        # Test that adjacent free ranges are merged into one range
+        self.free_space.add(10, 20)
+        self.free_space.add(30, 40)
+        self.assertEqual(self.free_space.to_list(), [[10, 20], [30, 40]])
+        self.free_space.add(20, 30)
+        self.assertEqual(self.free_space.to_list(), [[10, 40]])
+        self.assertEqual(self.free_space.free_size, 30)
+
+    def test_take_best_fit(self):
+        # Test that the smallest range big enough is used and the rest stays free
+        self.free_space.add(0, 50)
+        self.free_space.add(60, 75)
+        self.assertEqual(self.free_space.take_best_fit(10), 60)
+        self.assertEqual(self.free_space.to_list(), [[0, 50], [70, 75]])
+        self.assertEqual(self.free_space.take_best_fit(20), 0)
+        self.assertIsNone(self.free_space.take_best_fit(100))
+
+    def test_take_at(self):
+        # Test taking memory starting at a specific index
+        self.free_space.add(10, 30)
+        self.assertFalse(self.free_space.take_at(15, 5))
+        self.assertFalse(self.free_space.take_at(10, 25))
+        self.assertTrue(self.free_space.take_at(10, 5))
+        self.assertEqual(self.free_space.to_list(), [[15, 30]])
+
+    def test_pop_range_ending_at(self):
+        # Test removing the free range at the end of the used memory
+        self.free_space.add(0, 10)
+        self.free_space.add(20, 40)
+        self.assertIsNone(self.free_space.pop_range_ending_at(30))
+        self.assertEqual(self.free_space.pop_range_ending_at(40), 20)
+        self.assertEqual(self.free_space.to_list(), [[0, 10]])
+
+    def test_contains(self):
+        # Test checking if a range is free
+        self.free_space.add(10, 30)
+        self.assertTrue(self.free_space.contains(10, 30))
+        self.assertTrue(self.free_space.contains(15, 20))
+        self.assertFalse(self.free_space.contains(5, 15))
+        self.assertFalse(self.free_space.contains(25, 35))
+
+    def test_serialization(self):
+        # Test that an unmerged list of free blocks is merged when loading it
+        free_space = FreeSpaceIndex([[0, 10], [10, 20], [40, 50]])
+        self.assertEqual(free_space.to_list(), [[0, 20], [40, 50]])
+        self.assertEqual(len(free_space), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,13 @@
+import os
+import tempfile
 import unittest
 import io
 import sys
 from io import StringIO
+import signal
 from unittest.mock import patch
-from main import main
+import main as main_module
+from main import main, exit_type_signal_handler
 from file_system_manager import FileSystemManager
 from parser_command import Parser
 
@@ -58,6 +62,79 @@ class TestMainFunction(unittest.TestCase):
             # Verify that the captured output equals/contains the expected output
             self.assertIn(test_excepted_output, output_stream.getvalue().replace("[/]$", "").strip())
 
+    def test_sigterm_during_command(self):
+        # Test that SIGTERM during a command only stops the loop, and the write-back buffers are flushed after it
+        commands = iter(["create --name /log.txt --file True",
+                         "write --name /log.txt --append True --content 'abc'"])
+        original_write_to_file = FileSystemManager.write_to_file
+
+        def write_to_file_with_sigterm(file_system_manager, *args, **kwargs):
+            exit_type_signal_handler(signal.SIGTERM, None)
+            return original_write_to_file(file_system_manager, *args, **kwargs)
+
+        self.addCleanup(setattr, main_module, "is_running", True)
+        self.addCleanup(setattr, main_module, "terminate_requested", False)
+        with patch("builtins.input", side_effect=lambda prompt: next(commands)), \
+                patch("sys.stdout", new_callable=StringIO), \
+                patch.object(FileSystemManager, "write_to_file", write_to_file_with_sigterm), \
+                patch.object(FileSystemManager, "flush_write_back", autospec=True,
+                             side_effect=FileSystemManager.flush_write_back) as flush_write_back:
+            main(write_back_size=4096)
+            # Nothing was flushed from the signal handler, only once the loop stopped
+            self.assertEqual(flush_write_back.call_count, 1)
+        # The command running when the signal arrived completed, and no backup prompt was shown (no more input)
+        file_system_manager = FileSystemManager.instance()
+        self.assertEqual(file_system_manager.read_file("/log.txt", print_text=False), "abc")
+
+    def test_signal_while_waiting_for_input(self):
+        # Test that a signal received while waiting for a command leaves the prompt
+        self.addCleanup(setattr, main_module, "is_running", True)
+        self.addCleanup(setattr, main_module, "waiting_for_input", False)
+        main_module.waiting_for_input = True
+        with self.assertRaises(main_module.StopExecution):
+            exit_type_signal_handler(signal.SIGINT, None)
+        self.assertFalse(main_module.is_running)
+
+    def run_session(self, commands, **main_arguments):
+        # Run the main loop on a list of commands followed by the answer to the backup prompt
+        commands = iter(commands)
+        with patch("builtins.input", side_effect=lambda prompt: next(commands)), \
+                patch("sys.stdout", new_callable=StringIO):
+            main(**main_arguments)
+
+    def test_memory_mapped_restart_without_backup(self):
+        # Test that a session ending without a backup leaves the memory-mapped content matching the last backup
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(temp_dir.name)  # The backup files are written to the current directory
+        memory_map_file = os.path.join(temp_dir.name, "memory_buffer.bin")
+        self.run_session(["create --name /a.txt --file True --content 'AAAAAAAAAA'", "quit", "y"],
+                         memory_map_file=memory_map_file)
+        self.run_session(["delete --name /a.txt", "create --name /b.txt --file True --content 'BBBBBBBBBB'",
+                          "quit", "n"], memory_map_file=memory_map_file)
+        file_system_manager = FileSystemManager(memory_map_file=memory_map_file)
+        self.assertEqual(file_system_manager.read_file("/a.txt", print_text=False), "AAAAAAAAAA")
+        self.assertFalse(file_system_manager.path_handler.get_node_by_path("/b.txt", show_errors=False))
+        # A session stopped by SIGTERM saves the content and the metadata together
+        self.addCleanup(setattr, main_module, "is_running", True)
+        self.addCleanup(setattr, main_module, "terminate_requested", False)
+        original_delete = FileSystemManager.delete_file_or_dir
+
+        def delete_with_sigterm(file_system_manager, *args, **kwargs):
+            exit_type_signal_handler(signal.SIGTERM, None)
+            return original_delete(file_system_manager, *args, **kwargs)
+
+        with patch.object(FileSystemManager, "delete_file_or_dir", delete_with_sigterm):
+            self.run_session(["create --name /c.txt --file True --content 'CCCCCCCCCC'", "delete --name /a.txt"],
+                             memory_map_file=memory_map_file)
+        main_module.is_running = True
+        main_module.terminate_requested = False
+        file_system_manager = FileSystemManager(memory_map_file=memory_map_file)
+        self.assertFalse(file_system_manager.path_handler.get_node_by_path("/a.txt", show_errors=False))
+        self.assertEqual(file_system_manager.read_file("/c.txt", print_text=False), "CCCCCCCCCC")
+        file_system_manager.memory_buffer = None
+
 
 if __name__ == "__main__":
     unittest.main()
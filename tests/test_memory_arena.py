@@ -0,0 +1,104 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from memory_arena import MemoryArena, MemoryMappedArena
+
+
+class TestMemoryArena(unittest.TestCase):
+    def setUp(self):
+        # Create an instance of the MemoryArena class with small segments for testing
+        self.segment_size = 8
+        self.arena = MemoryArena(2 * self.segment_size, segment_size=self.segment_size)
+
+    def test_read_and_write_across_segments(self):
+        # Test that a range crossing a segment boundary is read and written like a flat array
+        self.arena[5:12] = b"abcdefg"
+        self.assertEqual(bytes(self.arena[5:12]), b"abcdefg")
+        self.assertEqual(bytes(self.arena.segments[0][5:]), b"abc")
+        self.assertEqual(bytes(self.arena.segments[1][:4]), b"defg")
+        self.arena[5:12] = 0
+        self.assertTrue(np.array_equal(self.arena[0:16], np.zeros(16)))
+
+    def test_grow_keeps_the_existing_segments(self):
+        # Test that growing the arena adds segments without copying the existing ones
+        first_segment = self.arena.segments[0]
+        self.arena.grow(3 * self.segment_size + 1)
+        self.assertEqual(self.arena.size, 4 * self.segment_size)
+        self.assertIs(self.arena.segments[0], first_segment)
+
+    def test_shrink(self):
+        # Test that trailing segments are dropped
+        self.arena.grow(4 * self.segment_size)
+        self.arena.shrink(self.segment_size + 1)
+        self.assertEqual(self.arena.size, 2 * self.segment_size)
+
+    def test_move_overlapping_ranges(self):
+        # Test moving content down over an overlapping range that crosses a segment boundary
+        self.arena[6:14] = b"01234567"
+        self.arena.move(6, 2, 8)
+        self.assertEqual(bytes(self.arena[2:10]), b"01234567")
+        self.arena.move(2, 4, 8)
+        self.assertEqual(bytes(self.arena[4:12]), b"01234567")
+
+    def test_gather(self):
+        # Test gathering several ranges, and that a range inside one segment is not copied
+        self.arena[0:16] = b"abcdefghijklmnop"
+        view = self.arena.gather([(2, 3)])
+        self.assertEqual(bytes(view), b"cde")
+        self.assertTrue(np.shares_memory(np.asarray(view), self.arena.segments[0]))
+        self.assertEqual(bytes(self.arena.gather([(6, 4), (0, 2)])), b"ghijab")
+        self.assertEqual(bytes(self.arena.gather([])), b"")
+
+    def test_to_array_and_from_array(self):
+        # Test converting the arena to a flat array and back
+        self.arena[0:5] = b"hello"
+        arena = MemoryArena.from_array(self.arena.to_array()[:12], segment_size=self.segment_size)
+        self.assertEqual(arena.size, 2 * self.segment_size)
+        self.assertEqual(bytes(arena[0:5]), b"hello")
+
+
+class TestMemoryMappedArena(unittest.TestCase):
+    def setUp(self):
+        # Create a memory-mapped arena over a temporary file
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "arena.bin")
+        self.segment_size = 8
+        self.arena = MemoryMappedArena(self.path, self.segment_size, segment_size=self.segment_size)
+
+    def tearDown(self):
+        self.arena = None
+        self.temp_dir.cleanup()
+
+    def test_segments_are_mapped_to_the_file(self):
+        # Test that growing the arena extends the file and maps the new segments
+        self.arena.grow(3 * self.segment_size)
+        self.assertIsInstance(self.arena.segments[2], np.memmap)
+        self.assertEqual(os.path.getsize(self.path), 3 * self.segment_size)
+        self.assertTrue(np.array_equal(self.arena[0:24], np.zeros(24)))
+
+    def test_flush_and_reopen(self):
+        # Test that the content written to the arena is found when mapping the file again
+        self.arena.grow(2 * self.segment_size)
+        self.arena[6:11] = b"hello"
+        self.arena.flush()
+        arena = MemoryMappedArena(self.path, 0, segment_size=self.segment_size)
+        self.assertEqual(arena.size, 2 * self.segment_size)
+        self.assertEqual(bytes(arena[6:11]), b"hello")
+
+
+    def test_changes_stay_private_until_flush(self):
+        # Test that the file is only changed by a flush, and only the changed segments are written
+        self.arena.grow(3 * self.segment_size)
+        self.arena[10:14] = b"data"
+        self.assertEqual(self.arena.dirty_segments, {1})
+        arena = MemoryMappedArena(self.path, 0, segment_size=self.segment_size)
+        self.assertEqual(bytes(arena[10:14]), bytes(4))
+        self.arena.flush()
+        self.assertEqual(self.arena.dirty_segments, set())
+        arena = MemoryMappedArena(self.path, 0, segment_size=self.segment_size)
+        self.assertEqual(bytes(arena[10:14]), b"data")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+from node_table import NodeTable, IS_FILE
+from tree_node import TreeNode
+
+
+class TestNodeTable(unittest.TestCase):
+    def setUp(self):
+        # Create a small tree: / -> docs (a.txt, b.md), src (a.txt)
+        self.root_node = TreeNode("/", is_file=False, parent_node=None)
+        self.docs_node = self.add_node("docs", False, self.root_node)
+        self.add_node("a.txt", True, self.docs_node, 10)
+        self.add_node("b.md", True, self.docs_node, 300)
+        self.src_node = self.add_node("src", False, self.root_node)
+        self.add_node("a.txt", True, self.src_node, 50)
+        self.node_table = NodeTable(self.root_node)
+
+    @staticmethod
+    def add_node(name, is_file, parent_node, size=0):
+        node = TreeNode(name, is_file=is_file, parent_node=parent_node)
+        node.size = size
+        parent_node.add_child(node)
+        return node
+
+    def test_columns(self):
+        # Test the depth-first order of the rows and the columns
+        self.assertEqual(len(self.node_table), 6)
+        self.assertEqual([node.name for node in self.node_table.nodes], ["/", "docs", "a.txt", "b.md", "src", "a.txt"])
+        self.assertEqual(self.node_table.parent.tolist(), [-1, 0, 1, 1, 0, 4])
+        self.assertEqual(self.node_table.subtree_end.tolist(), [6, 4, 3, 4, 6, 6])
+        self.assertEqual(self.node_table.flags.tolist(), [0, 0, IS_FILE, IS_FILE, 0, IS_FILE])
+        # Names are interned, "a.txt" is stored once
+        self.assertEqual(len(self.node_table.names), 5)
+        self.assertEqual(self.node_table.name_id[2], self.node_table.name_id[5])
+
+    def test_select(self):
+        # Test vectorized filters over a subtree
+        self.assertEqual(self.node_table.select(is_file=True, min_size=20).tolist(), [3, 5])
+        self.assertEqual(self.node_table.select(is_file=True, name_suffix=".TXT").tolist(), [2, 5])
+        self.assertEqual(self.node_table.select(self.node_table.index_of(self.docs_node), is_file=True,
+                                                max_size=100).tolist(), [2])
+        self.assertEqual(self.node_table.select(is_file=False, name_contains="RC").tolist(), [4])
+
+    def test_path(self):
+        # Test building absolute and relative paths from the parent column
+        self.assertEqual(self.node_table.path(5), "/src/a.txt")
+        self.assertEqual(self.node_table.path(0), "/")
+        self.assertEqual(self.node_table.path(3, self.node_table.index_of(self.docs_node), "docs"), "docs/b.md")
+
+
+if __name__ == "__main__":
+    unittest.main()
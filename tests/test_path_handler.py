@@ -9,6 +9,17 @@ class TestPathHandler(unittest.TestCase):
         root = TreeNode("/", is_file=False, parent_node=None)
         self.path_handler = PathHandler(root)
 
+    def create_directories(self, path: str) -> TreeNode:
+        # Create the directories of an absolute path and return the last one
+        node = self.path_handler.root
+        for name in path.strip("/").split("/"):
+            child_node = node.get_child_by_name(name)
+            if not child_node:
+                child_node = TreeNode(name, is_file=False, parent_node=node)
+                node.add_child(child_node)
+            node = child_node
+        return node
+
     def test_is_absolute_path(self):
         # Test case for is_absolute_path method
         self.assertTrue(self.path_handler.is_absolute_path("/absolute/path"))
@@ -23,11 +34,49 @@ class TestPathHandler(unittest.TestCase):
     def test_split_path_relative(self):
         # Test case for split_path method with a relative path
         # Set the current directory to a non-root directory
+        self.create_directories("/current/directory")
         self.path_handler.change_current_dir("/current/directory")
         parent_dir, name = self.path_handler.split_path("relative/path/to/file.txt")
         self.assertEqual(parent_dir, "/current/directory/relative/path/to")
         self.assertEqual(name, "file.txt")
 
+    def test_normalize_path(self):
+        # Test case for normalize_path method with ".", ".." and repeated slashes
+        self.assertEqual(self.path_handler.normalize_path("/a//b/./c/"), ("a", "b", "c"))
+        self.assertEqual(self.path_handler.normalize_path("/a/b/../c"), ("a", "c"))
+        self.assertEqual(self.path_handler.normalize_path("/../.."), ())
+        self.assertEqual(self.path_handler.normalize_path("/"), ())
+        self.create_directories("/current/directory")
+        self.path_handler.change_current_dir("/current/directory")
+        self.assertEqual(self.path_handler.normalize_path("."), ("current", "directory"))
+        self.assertEqual(self.path_handler.normalize_path("../other//file.txt"), ("current", "other", "file.txt"))
+        self.assertEqual(self.path_handler.split_path("file.txt"), ("/current/directory", "file.txt"))
+        self.assertIs(self.path_handler.get_node_by_path(".."), self.path_handler.root.get_child_by_name("current"))
+
+    def test_expand_pattern(self):
+        # Test case for expand_pattern method with *, ?, [...] and **
+        for path in ["/logs/a.log", "/logs/b.log", "/logs/c.txt", "/logs/old/d.log", "/logs/old/deep/e.log"]:
+            parent_node = self.create_directories(path.rpartition("/")[0])
+            file_name = path.rpartition("/")[2]
+            parent_node.add_child(TreeNode(file_name, is_file=True, parent_node=parent_node))
+        self.assertEqual(self.path_handler.expand_pattern("/logs/*.log"), [("logs", "a.log"), ("logs", "b.log")])
+        self.assertEqual(self.path_handler.expand_pattern("/logs/?.*"),
+                         [("logs", "a.log"), ("logs", "b.log"), ("logs", "c.txt")])
+        self.assertEqual(self.path_handler.expand_pattern("/logs/[bc].*"), [("logs", "b.log"), ("logs", "c.txt")])
+        self.assertEqual(self.path_handler.expand_pattern("/logs/**/*.log"),
+                         [("logs", "a.log"), ("logs", "b.log"), ("logs", "old", "d.log"),
+                          ("logs", "old", "deep", "e.log")])
+        self.assertEqual(self.path_handler.expand_pattern("/logs/**"),
+                         [("logs",), ("logs", "old"), ("logs", "old", "deep")])
+        self.assertEqual(self.path_handler.expand_pattern("/missing/*"), [])
+        self.assertTrue(self.path_handler.has_wildcards("/logs/*.log"))
+        self.assertFalse(self.path_handler.has_wildcards(("logs", "*.log")))
+        # A node named literally like a pattern is not expanded
+        logs_node = self.path_handler.get_node_by_path("/logs")
+        logs_node.add_child(TreeNode("[bc].log", is_file=True, parent_node=logs_node))
+        self.assertFalse(self.path_handler.is_pattern("/logs/[bc].log"))
+        self.assertTrue(self.path_handler.is_pattern("/logs/[bc].*"))
+
     def test_get_node_by_path_existing(self):
         # Test case for get_node_by_path method with an existing path
         dir1_node = TreeNode("dir1", is_file=False, parent_node=self.path_handler.root)
@@ -50,17 +99,70 @@ class TestPathHandler(unittest.TestCase):
     def test_change_current_dir(self):
         # Test case for change_current_dir method
         # Change the current directory and check if it's updated
-        self.path_handler.change_current_dir("/current/directory")
+        current_node = self.create_directories("/current/directory")
+        self.assertTrue(self.path_handler.change_current_dir("/current/directory"))
+        self.assertEqual(self.path_handler.current_directory, "/current/directory")
+        self.assertIs(self.path_handler.current_node, current_node)
+        # A directory that does not exist is rejected
+        self.assertFalse(self.path_handler.change_current_dir("/missing"))
         self.assertEqual(self.path_handler.current_directory, "/current/directory")
 
     def test_go_back_dir(self):
         # Test case for go_back_dir method
         # Change the current directory, go back, and check if it's updated
         current_dir = self.path_handler.current_directory
+        self.create_directories("/new/directory")
         self.path_handler.change_current_dir("/new/directory")
         self.path_handler.go_back_dir()
         self.assertEqual(self.path_handler.current_directory, current_dir)
 
+    def test_path_cache(self):
+        # Test case for the path cache: hits, relative paths, eviction and invalidation of a subtree
+        dir1_node = TreeNode("dir1", is_file=False, parent_node=self.path_handler.root)
+        self.path_handler.root.add_child(dir1_node)
+        file1_node = TreeNode("file1.txt", is_file=True, parent_node=dir1_node)
+        dir1_node.add_child(file1_node)
+        self.assertIs(self.path_handler.get_node_by_path("/dir1/file1.txt"), file1_node)
+        self.assertEqual((self.path_handler.cache_hits, self.path_handler.cache_misses), (0, 1))
+        # The same node through a relative path is a hit
+        self.path_handler.change_current_dir(dir1_node)
+        self.assertIs(self.path_handler.get_node_by_path("file1.txt"), file1_node)
+        self.assertEqual((self.path_handler.cache_hits, self.path_handler.cache_misses), (1, 1))
+        # Missing paths are not cached
+        self.assertIs(self.path_handler.get_node_by_path("/dir1/missing", show_errors=False), False)
+        self.assertNotIn(("dir1", "missing"), self.path_handler.path_cache)
+        # Invalidating a directory drops the paths of its subtree
+        self.path_handler.get_node_by_path("/dir1")
+        self.path_handler.invalidate(dir1_node)
+        self.assertEqual(len(self.path_handler.path_cache), 0)
+        # The least recently used path is evicted when the cache is full
+        self.path_handler.cache_size = 1
+        self.path_handler.get_node_by_path("/dir1")
+        self.path_handler.get_node_by_path("/dir1/file1.txt")
+        self.assertEqual(list(self.path_handler.path_cache), [("dir1", "file1.txt")])
+
+    def test_current_directory_follows_moves(self):
+        # Test case for the current directory as a node: relative paths and its path after an ancestor is moved
+        current_node = self.create_directories("/a/b/c")
+        file_node = TreeNode("file.txt", is_file=True, parent_node=current_node)
+        current_node.add_child(file_node)
+        self.path_handler.change_current_dir(current_node)
+        self.assertIs(self.path_handler.get_node_by_path("file.txt"), file_node)
+        # Move /a/b to /d/b
+        b_node = self.path_handler.get_node_by_path("/a/b")
+        d_node = self.create_directories("/d")
+        self.path_handler.invalidate(b_node)
+        b_node.parent_node.remove_child("b")
+        d_node.add_child(b_node)
+        b_node.parent_node = d_node
+        self.assertEqual(self.path_handler.current_directory, "/d/b/c")
+        self.assertIs(self.path_handler.get_node_by_path("file.txt"), file_node)
+        self.assertEqual(self.path_handler.split_path("c/file.txt")[0], "/d/b/c/c")
+        # Deleting an ancestor moves the current directory to the parent of the deleted directory
+        self.path_handler.forget_subtree(b_node, d_node)
+        self.assertIs(self.path_handler.current_node, d_node)
+        self.assertEqual(self.path_handler.current_directory, "/d")
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
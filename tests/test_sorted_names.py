@@ -0,0 +1,43 @@
+import random
+import unittest
+from sorted_names import SortedNames
+
+
+class TestSortedNames(unittest.TestCase):
+    def setUp(self):
+        # Create an instance of the SortedNames class with small buckets for testing
+        self.sorted_names = SortedNames(bucket_size=4)
+
+    def test_add_and_remove_keep_the_names_sorted(self):
+        # Test that random adds and removes give the same order as sorting the names again
+        names = [f"name-{index:03d}" for index in range(100)]
+        random.Random(0).shuffle(names)
+        for name in names:
+            self.sorted_names.add(name)
+        self.assertEqual(list(self.sorted_names), sorted(names))
+        self.assertTrue(all(len(bucket) < 8 for bucket in self.sorted_names.buckets))
+        for name in names[:60]:
+            self.assertTrue(self.sorted_names.remove(name))
+        self.assertFalse(self.sorted_names.remove(names[0]))
+        self.assertFalse(self.sorted_names.remove("zzz"))
+        self.assertEqual(list(self.sorted_names), sorted(names[60:]))
+        self.assertEqual(len(self.sorted_names), 40)
+        self.assertEqual(self.sorted_names.maxes, [bucket[-1] for bucket in self.sorted_names.buckets])
+
+    def test_irange(self):
+        # Test iterating from a name, included or not, and changing the set during the iteration
+        self.sorted_names = SortedNames([f"log-{index:02d}" for index in range(20)], bucket_size=4)
+        self.assertEqual(list(self.sorted_names.irange("log-17")), ["log-17", "log-18", "log-19"])
+        self.assertEqual(list(self.sorted_names.irange("log-17", inclusive=False)), ["log-18", "log-19"])
+        self.assertEqual(list(self.sorted_names.irange("log-195")), [])
+        names = self.sorted_names.irange("log-02")
+        self.assertEqual([next(names) for _ in range(3)], ["log-02", "log-03", "log-04"])
+        self.sorted_names.remove("log-05")
+        self.sorted_names.remove("log-08")
+        self.sorted_names.add("log-085")
+        # The current bucket was copied, the next ones are looked up again
+        self.assertEqual([next(names) for _ in range(4)], ["log-05", "log-06", "log-07", "log-085"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,3 @@
-
 import unittest
 from tree_node import TreeNode
 
@@ -36,5 +35,60 @@ class TestTreeNode(unittest.TestCase):
         not_found_child = self.root_node.get_child_by_name("non_existent_child")
         self.assertIsNone(not_found_child)
 
+    def test_children_by_name_keep_insertion_order(self):
+        # Test that children are looked up by name and listed in insertion order
+        names = [f"child{index}" for index in range(1000, 0, -1)]
+        for name in names:
+            self.root_node.add_child(TreeNode(name, is_file=True, parent_node=self.root_node))
+        self.assertEqual([child.name for child in self.root_node.children], names)
+        self.assertEqual(self.root_node.get_child_by_name("child500").name, "child500")
+        self.assertTrue(self.root_node.remove_child("child500"))
+        self.assertFalse(self.root_node.remove_child("child500"))
+        self.assertIsNone(self.root_node.get_child_by_name("child500"))
+        self.assertEqual(len(self.root_node.children), 999)
+
+    def test_iter_sorted_children(self):
+        # Test ordered iteration over the children, with a prefix and a cursor
+        for name in ["log-2026-11", "data", "log-2026-10-02", "log-2026-10-01", "log-2025-12"]:
+            self.root_node.add_child(TreeNode(name, is_file=True, parent_node=self.root_node))
+        self.assertEqual([child.name for child in self.root_node.iter_sorted_children()],
+                         ["data", "log-2025-12", "log-2026-10-01", "log-2026-10-02", "log-2026-11"])
+        self.assertEqual([child.name for child in self.root_node.iter_sorted_children("log-2026-10")],
+                         ["log-2026-10-01", "log-2026-10-02"])
+        self.assertEqual([child.name for child in self.root_node.iter_sorted_children("log", after="log-2026-10-01")],
+                         ["log-2026-10-02", "log-2026-11"])
+        # A cursor before the prefix starts the iteration at the prefix
+        self.assertEqual([child.name for child in self.root_node.iter_sorted_children("log-2026", after="data")],
+                         ["log-2026-10-01", "log-2026-10-02", "log-2026-11"])
+        self.root_node.remove_child("log-2026-10-01")
+        self.assertEqual([child.name for child in self.root_node.iter_sorted_children("log-2026-10")],
+                         ["log-2026-10-02"])
+        self.root_node.remove_all_children()
+        self.assertEqual(list(self.root_node.iter_sorted_children()), [])
+
+    def test_mark_dirty_and_refresh(self):
+        # Test that the size and last modification time of directories are computed from their children when read
+        child_dir = TreeNode("child_dir", is_file=False, parent_node=self.root_node)
+        child_file = TreeNode("child_file", is_file=True, parent_node=child_dir)
+        self.root_node.add_child(child_dir)
+        child_dir.add_child(child_file)
+        child_file.size = 10
+        child_file.last_modified = self.root_node.last_modified + 100
+        child_dir.mark_dirty()
+        self.assertTrue(child_dir.is_dirty)
+        self.assertTrue(self.root_node.is_dirty)
+        self.assertEqual(self.root_node.size, 10)
+        self.assertEqual(self.root_node.last_modified, child_file.last_modified)
+        self.assertFalse(child_dir.is_dirty)
+        self.assertFalse(self.root_node.is_dirty)
+        # Marking stops at the first dirty ancestor
+        self.root_node.mark_dirty()
+        child_dir.mark_dirty()
+        self.assertTrue(child_dir.is_dirty)
+        self.root_node.is_dirty = False
+        child_dir.mark_dirty()
+        self.assertFalse(self.root_node.is_dirty)
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
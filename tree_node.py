@@ -1,6 +1,8 @@
 import time
 from datetime import datetime
-from typing import Optional, Dict, Union
+from typing import Optional, Dict, Iterator, Union, ValuesView
+from extent_map import ExtentMap
+from sorted_names import SortedNames
 MEM_SIZE = 2 * 1024 * 1024
 DEFAULT_FILE_SIZE = 10
 MAX_FILE_SIZE = 100
@@ -12,44 +14,133 @@ It includes methods to manage and access properties such as content, and timesta
 
 
 class TreeNode:
+    # No per-node __dict__: the attributes are stored in fixed slots, the file-only and directory-only ones are left
+    # unset on the other kind of node
+    __slots__ = ("name", "is_file", "parent_node", "creation_time", "is_dirty", "_last_modified", "_size",
+                 "file_memory_allocations", "generation", "compressed", "last_access", "child_entries",
+                 "sorted_names")
+
     def __init__(self, name: str, is_file: bool, parent_node: Union['TreeNode', None]):
         self.name = name # Name of the node
         self.is_file = is_file # True if it's a file, False if it's a directory
         self.parent_node = parent_node
-        self.creation_time = time.time()
-        self.last_modified = time.time()  # Set current time as last modified time
+        now = time.time()
+        self.creation_time = now
+        self.is_dirty = False  # True when the size and last modification time of a directory have to be computed
+        self.last_modified = now  # Set current time as last modified time
         self.size = 0
         if is_file:
             # Initialize properties for files
-            self.file_memory_allocations: list = []  # List to track memory allocations for files
+            self.file_memory_allocations = ExtentMap()  # Extents of the memory buffer holding the file content
+            self.generation = 0  # Incremented on each change of the content, guards iterators over the content
+            self.compressed = False  # True when the extents hold the content compressed with zlib
+            self.last_access = now  # Last time the content was read or written
         else:
             # Initialize properties for directories
-            self.children: list = []  # List to store child nodes (subdirectories or files)
+            # Child nodes (subdirectories or files) by name, in insertion order
+            self.child_entries: Dict[str, "TreeNode"] = {}
+            # Sorted names of the children for ordered and prefix scans, built by the first scan and kept up to date
+            self.sorted_names: Optional[SortedNames] = None
+
+    @property
+    def size(self) -> int:
+        # The size of a directory is the total size of its children, computed again after they change
+        if self.is_dirty:
+            self.refresh()
+        return self._size
+
+    @size.setter
+    def size(self, size: int) -> None:
+        self._size = size
+
+    @property
+    def last_modified(self) -> float:
+        # The last modification time of a directory includes the modifications of its children
+        if self.is_dirty:
+            self.refresh()
+        return self._last_modified
+
+    @last_modified.setter
+    def last_modified(self, last_modified: float) -> None:
+        self._last_modified = last_modified
+
+    def mark_dirty(self, last_modification_time: Optional[float] = None) -> None:
+        """
+        Record a change in a directory: its size and last modification time, and the ones of its ancestors, are
+        computed again when they are read. The marking stops at the first ancestor that is already dirty (its own
+        ancestors are dirty too), so repeated changes in the same directories cost O(1).
+        """
+        if last_modification_time is not None and last_modification_time > self._last_modified:
+            self._last_modified = last_modification_time
+        node = self
+        while node is not None and not node.is_dirty:
+            node.is_dirty = True
+            node = node.parent_node
+
+    def refresh(self) -> None:
+        # Compute again the size and last modification time of the dirty directories under this one, children first
+        dirty_nodes = [self]
+        index = 0
+        while index < len(dirty_nodes):
+            dirty_nodes.extend(child for child in dirty_nodes[index].children if child.is_dirty)
+            index += 1
+        for node in reversed(dirty_nodes):
+            size = 0
+            last_modified = node._last_modified
+            for child in node.children:
+                size += child._size
+                last_modified = max(last_modified, child._last_modified)
+            node._size, node._last_modified = size, last_modified
+            node.is_dirty = False
+
+    @property
+    def children(self) -> ValuesView["TreeNode"]:
+        # The child nodes, in insertion order
+        return self.child_entries.values()
 
     def add_child(self, node: "TreeNode") -> None:
         # Add a child node (subdirectory or file) to the current node
-        self.children.append(node)
+        if node.name not in self.child_entries and self.sorted_names is not None:
+            self.sorted_names.add(node.name)
+        self.child_entries[node.name] = node
 
     def remove_child(self, child_name: str) -> bool:
-        # Remove a child node with the given name from the list of children
-        for child in self.children:
-            if child.name == child_name:
-                self.children.remove(child)
-                return True
-        return False  # Child not found
+        # Remove a child node with the given name from the children
+        if self.child_entries.pop(child_name, None) is None:
+            return False
+        if self.sorted_names is not None:
+            self.sorted_names.remove(child_name)
+        return True
 
     def remove_all_children(self) -> bool:
         # Remove all child nodes (subdirectories and files) from the current directory node.
-        while self.children:
-            self.children.pop()
+        self.child_entries.clear()
+        self.sorted_names = None
         return True
 
+    def iter_sorted_children(self, prefix: str = "", after: Optional[str] = None) -> Iterator["TreeNode"]:
+        """
+        Iterate over the children sorted by name, only the ones whose name starts with `prefix` and, when `after` is
+        given, comes after it (a cursor to resume a listing). The start is found by a binary search, so reading k
+        children costs O(log n + k). The sorted index is built by the first scan of the directory (a directory that is
+        never scanned does not pay for it), then adding and removing children update one small bucket of it.
+        """
+        if self.sorted_names is None:
+            self.sorted_names = SortedNames(self.child_entries)
+        if after is not None and after >= prefix:
+            names = self.sorted_names.irange(after, inclusive=False)
+        else:
+            names = self.sorted_names.irange(prefix)
+        for name in names:
+            if not name.startswith(prefix):
+                return
+            child = self.child_entries.get(name)
+            if child is not None:  # Skip the children removed during the scan
+                yield child
+
     def get_child_by_name(self, name: str) -> Optional["TreeNode"]:
         # Get a child node by its name
-        for child in self.children:
-            if child.name == name:
-                return child
-        return None
+        return self.child_entries.get(name)
 
     def get_last_modified(self) -> Optional[str]:
         # Get the last modification time of the node, Only applicable to files